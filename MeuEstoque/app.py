@@ -9,6 +9,7 @@ if project_root not in sys.path:
 
 from MeuEstoque.ui.main_window import MainWindow
 from MeuEstoque.database.database_manager import DatabaseManager
+from MeuEstoque.images.thumbnail_cache import ThumbnailCache
 from MeuEstoque.logger import get_logger
 
 logger = get_logger(__name__)
@@ -22,13 +23,14 @@ if __name__ == "__main__":
         logger.info(f"Diretório base de imagens garantido: {images_base_dir}")
 
         # Garante que o banco de dados seja inicializado e as tabelas criadas
-        # antes de iniciar a aplicação.
+        # antes de iniciar a aplicação. A mesma conexão é repassada à MainWindow.
         db_manager = DatabaseManager()
-        db_manager.close() # Fecha a conexão inicial, a MainWindow abrirá a sua própria.
         logger.info("Banco de dados inicializado e tabelas verificadas.")
 
         app = QApplication(sys.argv)
-        window = MainWindow()
+        # Cache de miniaturas criado aqui, na thread da interface (usa o QPixmapCache)
+        ThumbnailCache.initialize()
+        window = MainWindow(db_manager)
         window.show()
         sys.exit(app.exec())
     except Exception as e:
@@ -0,0 +1,51 @@
+import argparse
+import os
+import tempfile
+import time
+
+from MeuEstoque.benchmarks.synthetic_data import populate
+from MeuEstoque.database.database_manager import DatabaseManager
+
+# Consulta usada por get_produtos antes do índice FTS5
+LIKE_QUERY = """
+    SELECT p.id, p.nome_produto, p.codigo_produto, m.nome, p.quantidade_atual, p.descricao, p.localizacao
+    FROM produtos p
+    LEFT JOIN marcas m ON p.marca_id = m.id
+    WHERE p.nome_produto LIKE ? OR p.codigo_produto LIKE ?
+    ORDER BY p.nome_produto
+"""
+
+# Termos como digitados na caixa de busca: códigos, nomes e combinações
+TERMOS = ["COD0123456", "COD01234", "peça 15731", "amortecedor 19", "pastilha peça 1999", "correia"]
+
+
+def _media_ms(func, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        rows = func()
+    return (time.perf_counter() - inicio) * 1000 / repeticoes, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a busca de produtos com LIKE '%termo%' e com o índice FTS5.")
+    parser.add_argument("--produtos", type=int, default=200000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench_busca.db"))
+        print(f"Gerando catálogo sintético com {args.produtos} produtos...")
+        populate(db.conn, produtos=args.produtos, movimentacoes=0, compras=0, imagens_por_produto=0)
+
+        print(f"\n{'Termo':<22}{'Linhas':>8}{'LIKE (ms)':>12}{'FTS5 (ms)':>12}")
+        for termo in TERMOS:
+            like_ms, like_rows = _media_ms(
+                lambda: db.conn.execute(LIKE_QUERY, (f"%{termo}%", f"%{termo}%")).fetchall(), args.repeticoes
+            )
+            fts_ms, fts_rows = _media_ms(lambda: db.get_produtos(termo), args.repeticoes)
+            print(f"{termo:<22}{fts_rows:>8}{like_ms:>12.2f}{fts_ms:>12.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from MeuEstoque.benchmarks.synthetic_data import populate
+from MeuEstoque.config import STORAGE_PROFILES
+from MeuEstoque.database.database_manager import DatabaseManager
+
+TAMANHOS = [10, 100, 1000]
+
+
+def _itens(rng, produtos, quantidade):
+    return [
+        {'produto_id': rng.randint(1, produtos), 'quantidade': rng.randint(1, 20), 'preco_unitario': 9.9}
+        for _ in range(quantidade)
+    ]
+
+
+def _caminho_antigo(db, itens):
+    # Mesmo fluxo de AddPurchaseWindow antes de add_compra_completa: um commit por chamada
+    compra_id = db.add_compra(1, "2025-01-10", "2025-02-10", "", 100.0, 0.0, 0.0, 100.0, "")
+    for item in itens:
+        db.add_item_compra(compra_id, item['produto_id'], item['quantidade'], item['preco_unitario'])
+    db.add_conta_a_pagar(compra_id, "2025-02-10", 100.0)
+
+
+def _caminho_novo(db, itens):
+    db.add_compra_completa(1, "2025-01-10", "2025-02-10", "", 100.0, 0.0, 0.0, 100.0, "", itens, "2025-02-10")
+
+
+def _media_ms(func, db, itens, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func(db, itens)
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a gravação de compras item a item com add_compra_completa.")
+    parser.add_argument("--perfil", choices=list(STORAGE_PROFILES), default="durable")
+    parser.add_argument("--produtos", type=int, default=5000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench_compras.db"), storage_profile=args.perfil)
+        populate(db.conn, produtos=args.produtos, movimentacoes=0, compras=0, imagens_por_produto=0)
+
+        print(f"Perfil de armazenamento: {args.perfil}")
+        print(f"\n{'Itens':>8}{'Item a item (ms)':>20}{'Transação única (ms)':>24}{'Ganho':>10}")
+        for tamanho in TAMANHOS:
+            itens = _itens(rng, args.produtos, tamanho)
+            antigo_ms = _media_ms(_caminho_antigo, db, itens, args.repeticoes)
+            novo_ms = _media_ms(_caminho_novo, db, itens, args.repeticoes)
+            print(f"{tamanho:>8}{antigo_ms:>20.2f}{novo_ms:>24.2f}{antigo_ms / novo_ms:>9.1f}x")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
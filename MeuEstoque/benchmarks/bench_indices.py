@@ -0,0 +1,105 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from MeuEstoque.benchmarks.synthetic_data import populate
+from MeuEstoque.database.migrations import apply_migrations
+from MeuEstoque.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Consultas equivalentes às usadas pelo DatabaseManager nas buscas por chave estrangeira.
+QUERIES = {
+    "get_movimentacoes_by_product": (
+        "SELECT tipo, quantidade, data_hora, observacao FROM movimentacoes WHERE produto_id = ? ORDER BY data_hora DESC",
+        lambda rng, n: (rng.randint(1, n["produtos"]),)
+    ),
+    "get_product_images": (
+        "SELECT image_path FROM product_images WHERE product_id = ?",
+        lambda rng, n: (rng.randint(1, n["produtos"]),)
+    ),
+    "produto_has_compras": (
+        "SELECT COUNT(*) FROM itens_compra WHERE produto_id = ?",
+        lambda rng, n: (rng.randint(1, n["produtos"]),)
+    ),
+    "get_compra_details (itens)": (
+        "SELECT ic.produto_id, p.nome_produto, ic.quantidade, ic.preco_unitario FROM itens_compra ic JOIN produtos p ON ic.produto_id = p.id WHERE ic.compra_id = ?",
+        lambda rng, n: (rng.randint(1, n["compras"]),)
+    ),
+    "compras por período": (
+        "SELECT id, total_final FROM compras WHERE data_emissao BETWEEN ? AND ?",
+        lambda rng, n: ("2022-03-01", "2022-03-07")
+    ),
+    "contas a vencer pendentes": (
+        "SELECT id, valor FROM contas_a_pagar WHERE data_vencimento BETWEEN ? AND ? AND status = ?",
+        lambda rng, n: ("2022-03-01", "2022-03-31", "Pendente")
+    ),
+}
+
+
+def _time_query(conn, sql, make_params, sizes, repeticoes, seed):
+    rng = random.Random(seed)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        conn.execute(sql, make_params(rng, sizes)).fetchall()
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def _time_delete_produto(conn, sizes, repeticoes, seed):
+    # Mesmas instruções de delete_produto, desfeitas ao final com rollback.
+    rng = random.Random(seed)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        produto_id = rng.randint(1, sizes["produtos"])
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute("DELETE FROM itens_compra WHERE produto_id = ?", (produto_id,))
+        conn.execute("DELETE FROM movimentacoes WHERE produto_id = ?", (produto_id,))
+        conn.execute("DELETE FROM product_images WHERE product_id = ?", (produto_id,))
+        conn.execute("DELETE FROM produtos WHERE id = ?", (produto_id,))
+        conn.rollback()
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def _run_all(conn, sizes, repeticoes):
+    results = {}
+    for name, (sql, make_params) in QUERIES.items():
+        results[name] = _time_query(conn, sql, make_params, sizes, repeticoes, seed=7)
+    results["delete_produto"] = _time_delete_produto(conn, sizes, max(1, repeticoes // 5), seed=7)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o tempo das consultas antes e depois dos índices da migração 3.")
+    parser.add_argument("--produtos", type=int, default=20000)
+    parser.add_argument("--movimentacoes", type=int, default=2000000)
+    parser.add_argument("--compras", type=int, default=50000)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    sizes = {"produtos": args.produtos, "compras": args.compras}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench_indices.db")
+        conn = sqlite3.connect(db_path)
+        apply_migrations(conn, logger, target_version=2) # Esquema sem os índices
+        print(f"Gerando banco sintético ({args.produtos} produtos, {args.movimentacoes} movimentações, {args.compras} compras)...")
+        populate(conn, produtos=args.produtos, movimentacoes=args.movimentacoes, compras=args.compras)
+
+        antes = _run_all(conn, sizes, args.repeticoes)
+        inicio = time.perf_counter()
+        apply_migrations(conn, logger, target_version=3)
+        tempo_migracao = time.perf_counter() - inicio
+        depois = _run_all(conn, sizes, args.repeticoes)
+        conn.close()
+
+    print(f"\nMigração 3 (criação dos índices): {tempo_migracao:.2f} s\n")
+    print(f"{'Consulta':<32}{'Sem índice (ms)':>18}{'Com índice (ms)':>18}{'Ganho':>10}")
+    for name in antes:
+        ganho = antes[name] / depois[name] if depois[name] else float("inf")
+        print(f"{name:<32}{antes[name]:>18.3f}{depois[name]:>18.3f}{ganho:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from MeuEstoque.benchmarks.synthetic_data import populate
+from MeuEstoque.config import STORAGE_PROFILES
+from MeuEstoque.database.database_manager import DatabaseManager
+
+# Mesmas perguntas respondidas pelo livro bruto e pelo resumo diário
+TOP_BRUTO = """
+    SELECT p.id, p.nome_produto,
+           SUM(CASE m.tipo WHEN 'Entrada' THEN m.quantidade ELSE 0 END),
+           SUM(CASE m.tipo WHEN 'Entrada' THEN 0 ELSE m.quantidade END) AS saidas,
+           COUNT(*)
+    FROM movimentacoes m
+    JOIN produtos p ON p.id = m.produto_id
+    WHERE m.data_hora >= ? AND m.data_hora < ?
+    GROUP BY m.produto_id
+    ORDER BY saidas DESC, p.id
+    LIMIT 10
+"""
+SEMANAS_BRUTO = """
+    SELECT strftime('%Y-%W', data_hora) AS periodo,
+           SUM(CASE tipo WHEN 'Entrada' THEN quantidade ELSE 0 END),
+           SUM(CASE tipo WHEN 'Entrada' THEN 0 ELSE quantidade END),
+           COUNT(*)
+    FROM movimentacoes
+    WHERE data_hora >= ? AND data_hora < ?
+    GROUP BY periodo
+    ORDER BY periodo
+"""
+
+
+def _carregar(db, rng, produtos, inicio, dias, por_dia):
+    # Um dia por lote; os triggers do resumo diário rodam a cada linha, como no uso real
+    for offset in range(dias):
+        dia = (inicio + timedelta(days=offset)).isoformat()
+        db.cursor.executemany(
+            "INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao) VALUES (?, ?, ?, ?, '')",
+            [(rng.randint(1, produtos), rng.choice(["Entrada", "Saída"]), rng.randint(1, 20),
+              f"{dia} {rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}")
+             for _ in range(por_dia)]
+        )
+        db.conn.commit()
+
+
+def _medir_ms(func, *args):
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara relatórios sobre o livro de movimentações e sobre o resumo diário.")
+    parser.add_argument("--perfil", choices=list(STORAGE_PROFILES), default="fast-desktop")
+    parser.add_argument("--produtos", type=int, default=10000)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--por-dia", type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(20)
+    inicio = date(2025, 1, 1)
+    fim = inicio + timedelta(days=args.dias)
+    ultimo_mes = max(inicio, fim - timedelta(days=30))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "bench_diarias.db"), storage_profile=args.perfil)
+        populate(db.conn, produtos=args.produtos, movimentacoes=0, compras=0, imagens_por_produto=0)
+
+        total = args.dias * args.por_dia
+        carga_ms, _ = _medir_ms(_carregar, db, rng, args.produtos, inicio, args.dias, args.por_dia)
+        db.cursor.execute("SELECT COUNT(*) FROM movimentacoes_diarias")
+        linhas_resumo = db.cursor.fetchone()[0]
+        print(f"Perfil de armazenamento: {args.perfil}")
+        print(f"{total} movimentações em {args.dias} dias carregadas em {carga_ms / 1000:.1f} s "
+              f"({total / (carga_ms / 1000):,.0f} linhas/s com os triggers); resumo com {linhas_resumo} linhas.")
+        rebuild_ms, _ = _medir_ms(db.rebuild_movimentacoes_diarias)
+        print(f"Recálculo completo do resumo: {rebuild_ms / 1000:.1f} s")
+        db.cursor.execute("ANALYZE")
+
+        consultas = [
+            ("Mais movimentados (30 dias)",
+             lambda: db.cursor.execute(TOP_BRUTO, (ultimo_mes.isoformat(), fim.isoformat())).fetchall(),
+             lambda: db.get_produtos_mais_movimentados(ultimo_mes.isoformat(), (fim - timedelta(days=1)).isoformat())),
+            ("Saídas por semana (período todo)",
+             lambda: db.cursor.execute(SEMANAS_BRUTO, (inicio.isoformat(), fim.isoformat())).fetchall(),
+             lambda: db.get_totais_movimentacoes(inicio.isoformat(), (fim - timedelta(days=1)).isoformat(), "semana")),
+        ]
+        print(f"\n{'Consulta':<36}{'Livro bruto (ms)':>18}{'Resumo diário (ms)':>20}{'Ganho':>10}")
+        for nome, bruto, resumo in consultas:
+            bruto_ms, linhas_bruto = _medir_ms(bruto)
+            resumo_ms, linhas_resumo = _medir_ms(resumo)
+            assert linhas_bruto == linhas_resumo, nome
+            print(f"{nome:<36}{bruto_ms:>18.1f}{resumo_ms:>20.1f}{bruto_ms / resumo_ms:>9.1f}x")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
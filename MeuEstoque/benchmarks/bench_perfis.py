@@ -0,0 +1,94 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from MeuEstoque.benchmarks.synthetic_data import populate
+from MeuEstoque.config import STORAGE_PROFILES
+from MeuEstoque.database.database_manager import DatabaseManager
+
+
+class _SQLiteDefaultsManager(DatabaseManager):
+    # Linha de base: conexão com os padrões do SQLite (journal DELETE, synchronous FULL)
+    def _apply_storage_profile(self):
+        pass
+
+
+def _open(db_path, profile):
+    if profile is None:
+        return _SQLiteDefaultsManager(db_path)
+    return DatabaseManager(db_path, storage_profile=profile)
+
+
+def _measure_commits(db, produtos, commits, seed):
+    rng = random.Random(seed)
+    inicio = time.perf_counter()
+    for _ in range(commits):
+        db.update_produto_quantity(rng.randint(1, produtos), 1, "Entrada", "benchmark")
+    return commits / (time.perf_counter() - inicio)
+
+
+def _measure_reads_during_writes(db_path, reader_profile, writer_profile, produtos, leituras):
+    # Um escritor contínuo em outra thread; o leitor mede a latência de cada consulta.
+    stop = threading.Event()
+
+    def writer():
+        db = _open(db_path, writer_profile)
+        rng = random.Random(1)
+        while not stop.is_set():
+            db.update_produto_quantity(rng.randint(1, produtos), 1, "Entrada", "benchmark")
+        db.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    reader = _open(db_path, reader_profile)
+    rng = random.Random(2)
+    latencias = []
+    for _ in range(leituras):
+        inicio = time.perf_counter()
+        produto_id = rng.randint(1, produtos)
+        reader.get_produto_by_id(produto_id)
+        reader.get_movimentacoes_by_product(produto_id)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    stop.set()
+    thread.join()
+    reader.close()
+    latencias.sort()
+    return statistics.median(latencias), latencias[int(len(latencias) * 0.95) - 1], latencias[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara vazão de commits e latência de leitura de cada perfil de armazenamento.")
+    parser.add_argument("--produtos", type=int, default=5000)
+    parser.add_argument("--movimentacoes", type=int, default=200000)
+    parser.add_argument("--commits", type=int, default=500)
+    parser.add_argument("--leituras", type=int, default=2000)
+    args = parser.parse_args()
+
+    cenarios = [("padrão do SQLite", None)] + [(nome, nome) for nome in STORAGE_PROFILES]
+    resultados = []
+    for nome, profile in cenarios:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "bench_perfis.db")
+            # Perfis somente leitura não escrevem: o banco é preparado e alterado por um perfil gravável
+            writer_profile = "fast-desktop" if profile and STORAGE_PROFILES[profile]["query_only"] else profile
+            db = _open(db_path, writer_profile)
+            populate(db.conn, produtos=args.produtos, movimentacoes=args.movimentacoes, compras=1000)
+            commits_s = None
+            if writer_profile == profile:
+                commits_s = _measure_commits(db, args.produtos, args.commits, seed=3)
+            db.close()
+            p50, p95, pmax = _measure_reads_during_writes(db_path, profile, writer_profile, args.produtos, args.leituras)
+            resultados.append((nome, commits_s, p50, p95, pmax))
+
+    print(f"\n{'Perfil':<22}{'Commits/s':>12}{'Leitura p50 (ms)':>18}{'p95 (ms)':>12}{'máx (ms)':>12}")
+    for nome, commits_s, p50, p95, pmax in resultados:
+        commits_txt = f"{commits_s:.0f}" if commits_s is not None else "-"
+        print(f"{nome:<22}{commits_txt:>12}{p50:>18.3f}{p95:>12.3f}{pmax:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import random
+from datetime import datetime, timedelta
+
+# Geração de dados sintéticos para os benchmarks. Os dados são inseridos
+# diretamente via SQL (executemany) para que a carga seja rápida mesmo com
+# milhões de linhas.
+
+BATCH_SIZE = 50000
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def populate(conn, produtos=10000, movimentacoes=1000000, fornecedores=200, compras=20000,
+             itens_por_compra=5, imagens_por_produto=2, seed=42):
+    """
+    Popula um banco já migrado com dados sintéticos de uma loja de autopeças.
+    """
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+
+    cursor.executemany("INSERT OR IGNORE INTO marcas (nome) VALUES (?)",
+                       [(f"Marca {i}",) for i in range(50)])
+    marca_ids = [row[0] for row in cursor.execute("SELECT id FROM marcas")]
+
+    cursor.executemany(
+        "INSERT INTO produtos (nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao) VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"Peça {i} {rng.choice(['Filtro', 'Pastilha', 'Vela', 'Correia', 'Amortecedor'])}",
+          f"COD{i:07d}", f"Descrição da peça {i}", rng.choice(marca_ids),
+          rng.randint(0, 500), f"Prateleira {rng.randint(1, 99)}") for i in range(produtos))
+    )
+    cursor.executemany(
+        "INSERT INTO fornecedores (nome, contato, telefone, email, endereco) VALUES (?, ?, ?, ?, ?)",
+        ((f"Fornecedor {i}", f"Contato {i}", "11999999999", f"f{i}@email.com", f"Rua {i}") for i in range(fornecedores))
+    )
+
+    inicio = datetime(2020, 1, 1)
+    total_segundos = 5 * 365 * 24 * 3600
+
+    def movimentos():
+        for _ in range(movimentacoes):
+            data_hora = inicio + timedelta(seconds=rng.randrange(total_segundos))
+            yield (rng.randint(1, produtos), rng.choice(["Entrada", "Saída"]), rng.randint(1, 20),
+                   data_hora.strftime("%Y-%m-%d %H:%M:%S"), "")
+
+    for batch in _batches(movimentos()):
+        cursor.executemany(
+            "INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao) VALUES (?, ?, ?, ?, ?)",
+            batch
+        )
+
+    for compra_id in range(1, compras + 1):
+        data = (inicio + timedelta(days=rng.randrange(5 * 365))).strftime("%Y-%m-%d")
+        cursor.execute(
+            "INSERT INTO compras (id, fornecedor_id, data_emissao, data_entrega, subtotal, total_final) VALUES (?, ?, ?, ?, 0, 0)",
+            (compra_id, rng.randint(1, fornecedores), data, data)
+        )
+        cursor.executemany(
+            "INSERT INTO itens_compra (compra_id, produto_id, quantidade, preco_unitario) VALUES (?, ?, ?, ?)",
+            [(compra_id, rng.randint(1, produtos), rng.randint(1, 50), round(rng.uniform(5, 500), 2))
+             for _ in range(itens_por_compra)]
+        )
+        cursor.execute(
+            "INSERT INTO contas_a_pagar (compra_id, data_vencimento, valor, status) VALUES (?, ?, ?, ?)",
+            (compra_id, data, 0.0, rng.choice(["Pendente", "Pago", "Parcialmente Pago"]))
+        )
+    cursor.execute("""
+        UPDATE compras SET subtotal = (
+            SELECT COALESCE(SUM(quantidade * preco_unitario), 0) FROM itens_compra WHERE compra_id = compras.id
+        )
+    """)
+    cursor.execute("UPDATE compras SET total_final = subtotal")
+
+    cursor.executemany(
+        "INSERT INTO product_images (product_id, image_path) VALUES (?, ?)",
+        ((p, f"/tmp/product_images/{p}/foto_{n}.jpg") for p in range(1, produtos + 1) for n in range(imagens_por_produto))
+    )
+    conn.commit()
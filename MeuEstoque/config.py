@@ -6,8 +6,71 @@ HELP_TEXTS = {
     "Marcas": "Aqui você pode adicionar, editar e remover as marcas dos seus produtos.",
     "Fornecedores": "Gerencie seus fornecedores: adicione novos contatos, edite informações e mantenha um registro organizado.",
     "Compras": "Visualize e registre todas as suas compras, acompanhando o histórico de aquisições.",
-    "Contas a Pagar": "Acompanhe suas contas a pagar, registre pagamentos e gerencie suas obrigações financeiras."
+    "Contas a Pagar": "Acompanhe suas contas a pagar, registre pagamentos e gerencie suas obrigações financeiras.",
+    "Estoque Baixo": "Lista os produtos que estão no estoque mínimo ou abaixo dele, com a maior falta primeiro, e os alertas recentes de produtos que cruzaram o mínimo. O estoque mínimo de cada produto é definido no cadastro do produto."
 }
 
+# Perfis de armazenamento do SQLite, aplicados pelo DatabaseManager ao abrir a conexão.
+# journal_mode WAL permite leituras simultâneas a uma escrita; synchronous NORMAL (em WAL)
+# troca o fsync de cada commit por fsyncs nos checkpoints. cache_size negativo é em KiB.
+STORAGE_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -16000,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+        "query_only": False,
+    },
+    "fast-desktop": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "query_only": False,
+    },
+    "read-only-terminal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -32000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+        "query_only": True, # Terminais de consulta não escrevem nem migram o banco
+    },
+}
+
+# Perfil usado quando nenhum é informado ao DatabaseManager
+STORAGE_PROFILE = "fast-desktop"
+
+# Estoque mínimo sugerido para novos produtos (cada produto tem o seu; estoque baixo é quantidade <= mínimo)
+LOW_STOCK_THRESHOLD = 10
+
+# Intervalo (ms) entre as leituras do feed de alertas de estoque baixo
+LOW_STOCK_ALERT_POLL_MS = 5000
+
+# Tempo (ms) sem digitação antes de a busca das listagens ser executada
+SEARCH_DEBOUNCE_MS = 250
+
+# Máximo de resultados guardados pelo cache de consultas do DatabaseManager (LRU)
+QUERY_CACHE_MAX_ENTRIES = 128
+
+# Miniaturas das imagens de produtos: lado maior (px) de cada tamanho gravado em disco.
+# A tela usa o menor tamanho que cobre a área exibida; o original é decodificado uma única vez.
+THUMBNAIL_TIERS = (128, 512, 2048)
+THUMBNAIL_JPEG_QUALITY = 85
+
+# Orçamento (KB) do QPixmapCache para as miniaturas já decodificadas em memória
+PIXMAP_CACHE_LIMIT_KB = 64 * 1024
+
+# Imagens anexadas aos produtos: lado maior (px) e qualidade JPEG das cópias gravadas em
+# product_images/ (orientação EXIF aplicada); None em IMAGE_INGEST_WORKERS usa um processo por núcleo
+IMAGE_INGEST_MAX_SIDE = 2560
+IMAGE_INGEST_JPEG_QUALITY = 85
+IMAGE_INGEST_WORKERS = None
+
 # Outras configurações podem ser adicionadas aqui no futuro
 # Ex: DATABASE_PATH = "estoque.db"
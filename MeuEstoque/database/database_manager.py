@@ -1,153 +1,289 @@
 import sqlite3
 import os
-from datetime import datetime
+import threading
+import json
+from contextlib import contextmanager
+from types import SimpleNamespace
+from datetime import date, datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
 from MeuEstoque.logger import get_logger
+from MeuEstoque.config import STORAGE_PROFILES, STORAGE_PROFILE, LOW_STOCK_THRESHOLD, QUERY_CACHE_MAX_ENTRIES
+from MeuEstoque.database.migrations import apply_migrations, is_schema_current, REBUILD_MOVIMENTACOES_DIARIAS
+from MeuEstoque.database.query_cache import QueryCache, cached_query, invalidates
+
+def _fts_match_expression(search_term):
+    """
+    Converte o texto digitado em uma expressão MATCH do FTS5: cada palavra vira uma
+    frase entre aspas com busca por prefixo, e todas precisam estar presentes.
+    """
+    terms = []
+    for word in search_term.split():
+        if not any(char.isalnum() for char in word):
+            continue
+        terms.append('"' + word.replace('"', '""') + '"*')
+    return " ".join(terms)
+
+class ProductDetail(NamedTuple):
+    """Produto com os dados das telas de detalhes e de edição (get_product_detail)."""
+    id: int
+    nome_produto: str
+    codigo_produto: Optional[str]
+    descricao: Optional[str]
+    marca_id: Optional[int]
+    marca_nome: Optional[str]
+    quantidade_atual: int
+    localizacao: Optional[str]
+    estoque_minimo: int
+    imagens: List[str]
+    ultima_movimentacao: Optional[Tuple[str, int, str]] # (tipo, quantidade, data/hora)
+    ultimo_preco_compra: Optional[float]
+    total_movimentacoes: int
 
 class DatabaseManager:
-    def __init__(self, db_name="estoque.db"):
+    PAGE_SIZE = 200
+    # Tabelas cujo total pode ser estimado por estimate_row_count
+    COUNTABLE_TABLES = ("produtos", "compras", "contas_a_pagar", "fornecedores", "marcas", "movimentacoes")
+    # Colunas ordenáveis de cada listagem paginada -> expressão SQL do ORDER BY. Colunas que
+    # aceitam NULL usam IFNULL (com índice sobre a mesma expressão) para a comparação por chave.
+    PRODUTOS_SORT_COLUMNS = {
+        "nome_produto": "p.nome_produto",
+        "codigo_produto": "IFNULL(p.codigo_produto, '')",
+        "marca": "IFNULL(m.nome, '')",
+        "quantidade_atual": "p.quantidade_atual",
+        "localizacao": "IFNULL(p.localizacao, '')",
+    }
+    FORNECEDORES_SORT_COLUMNS = {
+        "nome": "f.nome",
+        "contato": "IFNULL(f.contato, '')",
+        "telefone": "IFNULL(f.telefone, '')",
+        "email": "IFNULL(f.email, '')",
+        "endereco": "IFNULL(f.endereco, '')",
+    }
+    COMPRAS_SORT_COLUMNS = {
+        "fornecedor": "f.nome",
+        "data_emissao": "c.data_emissao",
+        "total_final": "c.total_final",
+        "status_pagamento": "c.status_pagamento",
+    }
+    # Falta negativa (quantidade - mínimo): a ordem crescente traz a maior falta primeiro,
+    # na mesma expressão do índice parcial idx_produtos_estoque_baixo
+    ESTOQUE_BAIXO_SORT_COLUMNS = {
+        "falta": "p.quantidade_atual - p.estoque_minimo",
+    }
+    MOVIMENTACOES_SORT_COLUMNS = {
+        "data_hora": "data_hora",
+    }
+    CONTAS_A_PAGAR_SORT_COLUMNS = {
+        "fornecedor": "f.nome",
+        "data_emissao": "c.data_emissao",
+        "data_vencimento": "cap.data_vencimento",
+        "valor": "cap.valor",
+        "valor_pago": "cap.valor_pago",
+        "status": "cap.status",
+    }
+
+    def __init__(self, db_name="estoque.db", storage_profile=None):
         self.db_name = db_name
-        self.conn = None
-        self.cursor = None
+        # Pool de conexões por thread: cada thread (UI ou trabalhadores do QThreadPool)
+        # usa a sua própria conexão e cursor, abertos no primeiro acesso. O estado é indexado
+        # por threading.get_ident(), e não guardado em threading.local: as threads do
+        # QThreadPool não foram criadas pelo Python e recebem um estado de thread novo a cada
+        # tarefa, o que abriria uma conexão nova por consulta.
+        self._thread_states = {} # ident da thread -> SimpleNamespace(conn, cursor, data_version)
+        self._pool_lock = threading.Lock()
+        self._closed = False
         self.logger = get_logger(self.__class__.__name__)
+        # Resultados de consultas de dados de referência (marcas, combos de produtos e fornecedores)
+        self.query_cache = QueryCache(QUERY_CACHE_MAX_ENTRIES)
+        self.storage_profile = storage_profile or STORAGE_PROFILE
+        if self.storage_profile not in STORAGE_PROFILES:
+            self.logger.warning(f"Perfil de armazenamento desconhecido '{self.storage_profile}'. Usando 'durable'.")
+            self.storage_profile = "durable"
         self._connect()
         self._create_tables()
-        self._add_initial_brands()
+
+    @property
+    def _local(self):
+        ident = threading.get_ident()
+        with self._pool_lock:
+            state = self._thread_states.get(ident)
+            if state is None:
+                state = self._thread_states[ident] = SimpleNamespace(conn=None, cursor=None, data_version=None)
+        return state
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None and not self._closed:
+            conn = self._connect()
+        return conn
+
+    @property
+    def cursor(self):
+        if self.conn is None:
+            return None
+        return self._local.cursor
 
     def _connect(self):
         try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.cursor = self.conn.cursor()
-            self.logger.info("Conexão com o banco de dados estabelecida.")
+            # check_same_thread=False apenas para que close() feche as conexões de todas as
+            # threads; durante o uso, cada conexão é acessada somente pela thread que a abriu.
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+            self._apply_storage_profile()
+            # As chaves estrangeiras (e seus ON DELETE CASCADE/SET NULL) valem por conexão
+            self._local.cursor.execute("PRAGMA foreign_keys = ON")
+            self.logger.info(
+                f"Conexão com o banco de dados estabelecida (perfil '{self.storage_profile}', "
+                f"thread '{threading.current_thread().name}')."
+            )
+            return conn
         except sqlite3.Error as e:
+            self._local.conn = None
             self.logger.critical(f"Erro ao conectar ao banco de dados: {e}", exc_info=True)
             print(f"Erro ao conectar ao banco de dados: {e}")
+            return None
+
+    def _apply_storage_profile(self):
+        profile = STORAGE_PROFILES[self.storage_profile]
+        # busy_timeout primeiro, para que as demais pragmas aguardem outro processo escrevendo
+        self.cursor.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout'])}")
+        self.cursor.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        self.cursor.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        self.cursor.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+        self.cursor.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+        self.cursor.execute(f"PRAGMA temp_store = {profile['temp_store']}")
+        self.cursor.execute(f"PRAGMA query_only = {'ON' if profile['query_only'] else 'OFF'}")
+
+    def _is_read_only(self):
+        return STORAGE_PROFILES[self.storage_profile]["query_only"]
 
     def _create_tables(self):
         if not self.conn:
             return
 
         try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS marcas (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL UNIQUE
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS produtos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome_produto TEXT NOT NULL,
-                    codigo_produto TEXT UNIQUE,
-                    descricao TEXT,
-                    marca_id INTEGER,
-                    quantidade_atual INTEGER NOT NULL DEFAULT 0,
-                    localizacao TEXT, -- Novo campo para localização no estoque
-                    FOREIGN KEY (marca_id) REFERENCES marcas(id) ON DELETE SET NULL
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS fornecedores (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL UNIQUE,
-                    contato TEXT,
-                    telefone TEXT,
-                    email TEXT,
-                    endereco TEXT
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS compras (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    fornecedor_id INTEGER NOT NULL,
-                    data_emissao TEXT NOT NULL,
-                    data_entrega TEXT,
-                    prazo_entrega TEXT,
-                    subtotal REAL NOT NULL DEFAULT 0.0,
-                    desconto REAL NOT NULL DEFAULT 0.0,
-                    frete REAL NOT NULL DEFAULT 0.0,
-                    total_final REAL NOT NULL DEFAULT 0.0,
-                    observacao TEXT,
-                    status_pagamento TEXT NOT NULL DEFAULT 'Pendente', -- Novo campo para status de pagamento da compra
-                    FOREIGN KEY (fornecedor_id) REFERENCES fornecedores(id) ON DELETE CASCADE
-                )
-            """)
-            # Adicionar a coluna status_pagamento se ela não existir (para compatibilidade com DBs existentes)
-            self.cursor.execute("""
-                PRAGMA table_info(compras);
-            """)
-            columns = [col[1] for col in self.cursor.fetchall()]
-            if 'status_pagamento' not in columns:
-                self.cursor.execute("""
-                    ALTER TABLE compras ADD COLUMN status_pagamento TEXT NOT NULL DEFAULT 'Pendente';
-                """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS itens_compra (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    compra_id INTEGER NOT NULL,
-                    produto_id INTEGER NOT NULL,
-                    quantidade INTEGER NOT NULL,
-                    preco_unitario REAL NOT NULL,
-                    FOREIGN KEY (compra_id) REFERENCES compras(id) ON DELETE CASCADE,
-                    FOREIGN KEY (produto_id) REFERENCES produtos(id) ON DELETE CASCADE
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS contas_a_pagar (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    compra_id INTEGER NOT NULL,
-                    data_vencimento TEXT NOT NULL,
-                    valor REAL NOT NULL,
-                    valor_pago REAL NOT NULL DEFAULT 0.0,
-                    status TEXT NOT NULL DEFAULT 'Pendente', -- Pendente, Pago, Parcialmente Pago
-                    FOREIGN KEY (compra_id) REFERENCES compras(id) ON DELETE CASCADE
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS movimentacoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    produto_id INTEGER,
-                    tipo TEXT NOT NULL,
-                    quantidade INTEGER NOT NULL,
-                    data_hora TEXT NOT NULL,
-                    observacao TEXT,
-                    FOREIGN KEY (produto_id) REFERENCES produtos(id) ON DELETE CASCADE
-                )
-            """)
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS product_images (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id INTEGER NOT NULL,
-                    image_path TEXT NOT NULL,
-                    FOREIGN KEY (product_id) REFERENCES produtos(id) ON DELETE CASCADE
-                )
-            """)
-            self.conn.commit()
-            self.logger.info("Tabelas do banco de dados verificadas/criadas com sucesso.")
+            # Inicialização rápida: com o esquema (e a semeadura de marcas) já na versão
+            # atual, nenhuma DDL ou escrita é executada.
+            if is_schema_current(self.conn):
+                self.logger.info("Esquema do banco de dados já está atualizado.")
+                return
+            if self._is_read_only():
+                self.logger.error("Esquema desatualizado, mas o perfil de armazenamento é somente leitura. Migrações não aplicadas.")
+                return
+            applied = apply_migrations(self.conn, self.logger)
+            self.logger.info(f"Tabelas do banco de dados verificadas/criadas com sucesso ({applied} migrações aplicadas).")
         except sqlite3.Error as e:
             self.logger.critical(f"Erro ao criar tabelas: {e}", exc_info=True)
             print(f"Erro ao criar tabelas: {e}")
 
-    def _add_initial_brands(self):
-        initial_brands = [
-            "Chevrolet", "Volkswagen", "Fiat", "Ford", "Hyundai",
-            "Toyota", "Honda", "Renault", "Jeep", "Mercedes-Benz",
-            "BMW", "Audi", "Nissan", "Kia", "Peugeot"
-        ]
-        for brand_name in initial_brands:
+    def _check_external_writes(self):
+        # PRAGMA data_version muda quando outra conexão (outro terminal ou outra thread) grava
+        # no banco; essas escritas não passam pelos métodos que invalidam o cache
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        last_version = getattr(self._local, "data_version", None)
+        self._local.data_version = data_version
+        if last_version is not None and last_version != data_version:
+            self.query_cache.clear()
+
+    def close(self):
+        self.query_cache.log_stats(self.logger)
+        conn = getattr(self._local, "conn", None)
+        if conn and not self._is_read_only():
             try:
-                self.cursor.execute("INSERT OR IGNORE INTO marcas (nome) VALUES (?)", (brand_name,))
+                # Atualiza as estatísticas do planejador (e de estimate_row_count) quando necessário
+                conn.execute("PRAGMA optimize")
             except sqlite3.Error as e:
-                self.logger.warning(f"Erro ao adicionar marca inicial '{brand_name}': {e}")
-                print(f"Erro ao adicionar marca inicial '{brand_name}': {e}")
-        self.conn.commit()
-        self.logger.info("Marcas iniciais adicionadas/verificadas.")
+                self.logger.warning(f"Erro ao executar PRAGMA optimize: {e}")
+        with self._pool_lock:
+            states, self._thread_states = self._thread_states, {}
+            self._closed = True
+        connections = [state.conn for state in states.values() if state.conn is not None]
+        for pooled in connections:
+            pooled.close()
+        if connections:
+            self.logger.info(f"Conexões com o banco de dados fechadas ({len(connections)}).")
 
-    def close(self):
-        if self.conn:
-            self.conn.close()
-            self.logger.info("Conexão com o banco de dados fechada.")
+    # Métodos para Cancelamento de Consultas
+    @contextmanager
+    def cancel_when(self, is_cancelled, instructions=1000):
+        """
+        Durante o bloco, consultas longas verificam is_cancelled() a cada `instructions`
+        instruções da VM do SQLite e são abortadas assim que ele retornar True.
+        """
+        self.conn.set_progress_handler(lambda: 1 if is_cancelled() else 0, instructions)
+        try:
+            yield
+        finally:
+            self.conn.set_progress_handler(None, instructions)
+
+    # Métodos para Paginação
+    def _fetch_keyset_page(self, columns, from_clause, where_clauses, params, sort_exprs, descending, after, limit):
+        """
+        Busca uma página ordenada por sort_exprs (a última expressão deve ser única, ex. o id),
+        começando logo após a chave `after`. Retorna (linhas, chave_da_próxima_página ou None).
+        """
+        where_clauses = list(where_clauses)
+        params = list(params)
+        if after is not None:
+            comparison = "<" if descending else ">"
+            # O limite isolado na primeira expressão permite ao planejador buscar a posição no
+            # índice (inclusive em índices de expressão); a comparação de tuplas faz o desempate.
+            where_clauses.append(f"{sort_exprs[0]} {comparison}= ?")
+            where_clauses.append(
+                f"({', '.join(sort_exprs)}) {comparison} ({', '.join('?' for _ in sort_exprs)})"
+            )
+            params.append(after[0])
+            params.extend(after)
+        direction = "DESC" if descending else "ASC"
+        query = f"SELECT {columns}, {', '.join(sort_exprs)} FROM {from_clause}"
+        if where_clauses:
+            query += " WHERE " + " AND ".join(f"({clause})" for clause in where_clauses)
+        query += " ORDER BY " + ", ".join(f"{expr} {direction}" for expr in sort_exprs)
+        query += " LIMIT ?"
+        params.append(limit)
+
+        self.cursor.execute(query, params)
+        key_count = len(sort_exprs)
+        raw_rows = self.cursor.fetchall()
+        rows = [row[:-key_count] for row in raw_rows]
+        next_key = tuple(raw_rows[-1][-key_count:]) if len(raw_rows) == limit else None
+        return rows, next_key
+
+    def _sort_expressions(self, sort_columns, sort_by, id_expression):
+        if sort_by not in sort_columns:
+            raise ValueError(f"Coluna de ordenação inválida: {sort_by}")
+        # O id desempata linhas com o mesmo valor, tornando a ordem estável entre páginas
+        return [sort_columns[sort_by], id_expression]
+
+    def estimate_row_count(self, table):
+        """
+        Estimativa barata do total de linhas de uma tabela, lida de sqlite_stat1
+        (mantida pelo ANALYZE/PRAGMA optimize). Sem estatísticas, usa o maior id.
+        """
+        if table not in self.COUNTABLE_TABLES:
+            raise ValueError(f"Tabela não suportada para estimativa: {table}")
+        try:
+            # O primeiro número de cada linha é o total de entradas do índice; índices parciais
+            # (ex. idx_produtos_estoque_baixo) cobrem só parte da tabela e ficam de fora
+            self.cursor.execute(
+                """
+                SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1
+                WHERE tbl = ?1 AND (idx IS NULL OR idx NOT IN (SELECT name FROM pragma_index_list(?1) WHERE partial))
+                """,
+                (table,)
+            )
+            row = self.cursor.fetchone()
+            if row and row[0] is not None:
+                return row[0]
+        except sqlite3.OperationalError:
+            pass # sqlite_stat1 ainda não existe
+        self.cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        return self.cursor.fetchone()[0]
 
     # Métodos para Marcas
+    @invalidates("marcas")
     def add_marca(self, nome):
         try:
             self.cursor.execute("INSERT INTO marcas (nome) VALUES (?)", (nome,))
@@ -163,6 +299,7 @@ class DatabaseManager:
             print(f"Erro ao adicionar marca: {e}")
             return False
 
+    @invalidates("marcas")
     def update_marca(self, marca_id, novo_nome):
         try:
             self.cursor.execute("UPDATE marcas SET nome = ? WHERE id = ?", (novo_nome, marca_id))
@@ -178,12 +315,22 @@ class DatabaseManager:
             print(f"Erro ao atualizar marca: {e}")
             return False
 
-    def get_marcas(self):
-        self.cursor.execute("SELECT id, nome FROM marcas ORDER BY nome")
+    @cached_query("marcas")
+    def get_marcas(self, search_term="", descending=False):
+        direction = "DESC" if descending else "ASC"
+        match_expression = _fts_match_expression(search_term)
+        if match_expression:
+            self.cursor.execute(
+                f"SELECT id, nome FROM marcas WHERE id IN (SELECT rowid FROM marcas_fts WHERE marcas_fts MATCH ?) ORDER BY nome {direction}",
+                (match_expression,)
+            )
+        else:
+            self.cursor.execute(f"SELECT id, nome FROM marcas ORDER BY nome {direction}")
         marcas = self.cursor.fetchall()
         self.logger.debug(f"Retornadas {len(marcas)} marcas.")
         return marcas
 
+    @invalidates("marcas")
     def delete_marca(self, marca_id):
         try:
             self.cursor.execute("DELETE FROM marcas WHERE id = ?", (marca_id,))
@@ -202,6 +349,7 @@ class DatabaseManager:
         return count > 0
 
     # Métodos para Fornecedores
+    @invalidates("fornecedores")
     def add_fornecedor(self, nome, contato, telefone, email, endereco):
         try:
             self.cursor.execute(
@@ -221,14 +369,35 @@ class DatabaseManager:
             return False
 
     def get_fornecedores(self, search_term=""):
-        query = "SELECT id, nome, contato, telefone, email, endereco FROM fornecedores WHERE nome LIKE ? ORDER BY nome"
-        self.cursor.execute(query, (f"%{search_term}%",))
+        match_expression = _fts_match_expression(search_term)
+        if match_expression:
+            query = """
+                SELECT id, nome, contato, telefone, email, endereco FROM fornecedores
+                WHERE id IN (SELECT rowid FROM fornecedores_fts WHERE fornecedores_fts MATCH ?)
+                ORDER BY nome
+            """
+            self.cursor.execute(query, (match_expression,))
+        else:
+            self.cursor.execute("SELECT id, nome, contato, telefone, email, endereco FROM fornecedores ORDER BY nome")
         return self.cursor.fetchall()
 
+    def get_fornecedores_page(self, search_term="", after=None, limit=None, sort_by="nome", descending=False):
+        where, params = [], []
+        match_expression = _fts_match_expression(search_term)
+        if match_expression:
+            where.append("f.id IN (SELECT rowid FROM fornecedores_fts WHERE fornecedores_fts MATCH ?)")
+            params.append(match_expression)
+        return self._fetch_keyset_page(
+            "f.id, f.nome, f.contato, f.telefone, f.email, f.endereco", "fornecedores f",
+            where, params, self._sort_expressions(self.FORNECEDORES_SORT_COLUMNS, sort_by, "f.id"),
+            descending, after, limit or self.PAGE_SIZE
+        )
+
     def get_fornecedor_by_id(self, fornecedor_id):
         self.cursor.execute("SELECT id, nome, contato, telefone, email, endereco FROM fornecedores WHERE id = ?", (fornecedor_id,))
         return self.cursor.fetchone()
 
+    @invalidates("fornecedores")
     def update_fornecedor(self, fornecedor_id, nome, contato, telefone, email, endereco):
         try:
             self.cursor.execute(
@@ -248,18 +417,10 @@ class DatabaseManager:
             print(f"Erro ao atualizar fornecedor: {e}")
             return False
 
+    @invalidates("fornecedores")
     def delete_fornecedor(self, fornecedor_id):
         try:
-            self.conn.execute("BEGIN TRANSACTION")
-            
-            self.cursor.execute("SELECT id FROM compras WHERE fornecedor_id = ?", (fornecedor_id,))
-            compras_ids = [row[0] for row in self.cursor.fetchall()]
-            
-            for compra_id in compras_ids:
-                self.cursor.execute("DELETE FROM itens_compra WHERE compra_id = ?", (compra_id,))
-                self.cursor.execute("DELETE FROM contas_a_pagar WHERE compra_id = ?", (compra_id,))
-            
-            self.cursor.execute("DELETE FROM compras WHERE fornecedor_id = ?", (fornecedor_id,))
+            # ON DELETE CASCADE remove as compras do fornecedor e, delas, os itens e as contas a pagar
             self.cursor.execute("DELETE FROM fornecedores WHERE id = ?", (fornecedor_id,))
             self.conn.commit()
             return True
@@ -273,55 +434,182 @@ class DatabaseManager:
         return self.cursor.fetchone()[0] > 0
 
     # Métodos para Produtos
-    def add_produto(self, nome_produto, codigo_produto, descricao, marca_id, quantidade_inicial, localizacao):
+    @invalidates("produtos")
+    def add_produto(self, nome_produto, codigo_produto, descricao, marca_id, quantidade_inicial, localizacao, estoque_minimo=LOW_STOCK_THRESHOLD):
         try:
             self.cursor.execute(
-                "INSERT INTO produtos (nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao) VALUES (?, ?, ?, ?, ?, ?)",
-                (nome_produto, codigo_produto, descricao, marca_id, quantidade_inicial, localizacao)
+                "INSERT INTO produtos (nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao, estoque_minimo) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (nome_produto, codigo_produto, descricao, marca_id, quantidade_inicial, localizacao, estoque_minimo)
             )
+            produto_id = self.cursor.lastrowid
+            if quantidade_inicial:
+                # O saldo inicial entra no livro de movimentações, como qualquer entrada
+                self.add_movimentacao(produto_id, "Entrada", quantidade_inicial, "Saldo inicial")
             self.conn.commit()
-            return True
+            # Retorna o ID do novo produto: depois da movimentação, cursor.lastrowid é o dela
+            return produto_id
         except sqlite3.IntegrityError:
+            self.conn.rollback()
             print(f"Produto com código '{codigo_produto}' já existe.")
             return False
         except sqlite3.Error as e:
+            self.conn.rollback()
             print(f"Erro ao adicionar produto: {e}")
             return False
 
-    def update_produto(self, produto_id, nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao):
+    @invalidates("produtos")
+    def update_produto(self, produto_id, nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao, estoque_minimo=None):
         try:
+            # Uma quantidade alterada na edição é registrada como ajuste no livro de movimentações,
+            # na mesma transação, antes de a linha do produto ser sobrescrita
+            self.cursor.execute(
+                """
+                INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao)
+                SELECT id, CASE WHEN ? > quantidade_atual THEN 'Entrada' ELSE 'Saída' END,
+                       ABS(? - quantidade_atual), ?, 'Ajuste na edição do produto'
+                FROM produtos WHERE id = ? AND quantidade_atual <> ?
+                """,
+                (quantidade_atual, quantidade_atual, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), produto_id, quantidade_atual)
+            )
+            # estoque_minimo None mantém o mínimo atual do produto
             self.cursor.execute(
                 """
                 UPDATE produtos
-                SET nome_produto = ?, codigo_produto = ?, descricao = ?, marca_id = ?, quantidade_atual = ?, localizacao = ?
+                SET nome_produto = ?, codigo_produto = ?, descricao = ?, marca_id = ?, quantidade_atual = ?, localizacao = ?,
+                    estoque_minimo = COALESCE(?, estoque_minimo)
                 WHERE id = ?
                 """,
-                (nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao, produto_id)
+                (nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao, estoque_minimo, produto_id)
             )
             self.conn.commit()
             return True
         except sqlite3.IntegrityError:
+            self.conn.rollback()
             print(f"Produto com código '{codigo_produto}' já existe para outro produto.")
             return False
         except sqlite3.Error as e:
+            self.conn.rollback()
             print(f"Erro ao atualizar produto: {e}")
             return False
 
     def get_produtos(self, search_term=""):
+        match_expression = _fts_match_expression(search_term)
+        if not match_expression:
+            query = """
+                SELECT p.id, p.nome_produto, p.codigo_produto, m.nome, p.quantidade_atual, p.descricao, p.localizacao
+                FROM produtos p
+                LEFT JOIN marcas m ON p.marca_id = m.id
+                ORDER BY p.nome_produto
+            """
+            self.cursor.execute(query)
+            return self.cursor.fetchall()
+
+        # Busca pelo índice FTS5, com os resultados mais relevantes primeiro
+        # (pesos do bm25: nome, código, descrição, marca, localização)
         query = """
             SELECT p.id, p.nome_produto, p.codigo_produto, m.nome, p.quantidade_atual, p.descricao, p.localizacao
-            FROM produtos p
+            FROM produtos_fts
+            JOIN produtos p ON p.id = produtos_fts.rowid
             LEFT JOIN marcas m ON p.marca_id = m.id
-            WHERE p.nome_produto LIKE ? OR p.codigo_produto LIKE ?
-            ORDER BY p.nome_produto
+            WHERE produtos_fts MATCH ?
+            ORDER BY bm25(produtos_fts, 10.0, 10.0, 1.0, 3.0, 2.0), p.nome_produto
         """
-        self.cursor.execute(query, (f"%{search_term}%", f"%{search_term}%"))
+        self.cursor.execute(query, (match_expression,))
         return self.cursor.fetchall()
 
+    def get_produtos_page(self, search_term="", after=None, limit=None, sort_by="nome_produto", descending=False):
+        where, params = [], []
+        match_expression = _fts_match_expression(search_term)
+        if match_expression:
+            where.append("p.id IN (SELECT rowid FROM produtos_fts WHERE produtos_fts MATCH ?)")
+            params.append(match_expression)
+        return self._fetch_keyset_page(
+            "p.id, p.nome_produto, p.codigo_produto, m.nome, p.quantidade_atual, p.descricao, p.localizacao",
+            "produtos p LEFT JOIN marcas m ON p.marca_id = m.id",
+            where, params, self._sort_expressions(self.PRODUTOS_SORT_COLUMNS, sort_by, "p.id"),
+            descending, after, limit or self.PAGE_SIZE
+        )
+
+    def get_produtos_estoque_baixo_page(self, search_term="", after=None, limit=None, sort_by="falta", descending=False):
+        """
+        Produtos no estoque mínimo ou abaixo dele, com a maior falta primeiro. A condição
+        é a mesma do índice parcial idx_produtos_estoque_baixo, que serve filtro e ordem.
+        Linhas: (id, nome, código, marca, quantidade, estoque mínimo, falta).
+        """
+        where, params = ["p.quantidade_atual <= p.estoque_minimo"], []
+        match_expression = _fts_match_expression(search_term)
+        if match_expression:
+            where.append("p.id IN (SELECT rowid FROM produtos_fts WHERE produtos_fts MATCH ?)")
+            params.append(match_expression)
+        return self._fetch_keyset_page(
+            "p.id, p.nome_produto, p.codigo_produto, m.nome, p.quantidade_atual, p.estoque_minimo, "
+            "p.estoque_minimo - p.quantidade_atual",
+            "produtos p LEFT JOIN marcas m ON p.marca_id = m.id",
+            where, params, self._sort_expressions(self.ESTOQUE_BAIXO_SORT_COLUMNS, sort_by, "p.id"),
+            descending, after, limit or self.PAGE_SIZE
+        )
+
+    def get_alertas_estoque(self, after_id=None, limit=50):
+        """
+        Feed de alertas de estoque (produtos que cruzaram o próprio mínimo), em ordem de id.
+        Com after_id, retorna só os alertas novos desde então (leitura incremental pela
+        chave primária); sem ele, os `limit` mais recentes.
+        Linhas: (id, produto_id, nome do produto, tipo, quantidade, estoque mínimo, data/hora).
+        """
+        query = """
+            SELECT a.id, a.produto_id, p.nome_produto, a.tipo, a.quantidade, a.estoque_minimo, a.data_hora
+            FROM alertas_estoque a
+            JOIN produtos p ON p.id = a.produto_id
+        """
+        if after_id is None:
+            self.cursor.execute(query + " ORDER BY a.id DESC LIMIT ?", (limit,))
+            return list(reversed(self.cursor.fetchall()))
+        self.cursor.execute(query + " WHERE a.id > ? ORDER BY a.id LIMIT ?", (after_id, limit))
+        return self.cursor.fetchall()
+
+    def get_estoque_baixo_versao(self):
+        """
+        Versão da lista de estoque baixo (migração 14): muda a cada escrita num produto que
+        está ou estava no próprio mínimo. Uma leitura de uma linha, para consultas periódicas.
+        """
+        self.cursor.execute("SELECT versao_estoque_baixo FROM estatisticas_estoque WHERE id = 1")
+        row = self.cursor.fetchone()
+        return row[0] if row else 0
+
     def get_produto_by_id(self, produto_id):
         self.cursor.execute("SELECT * FROM produtos WHERE id = ?", (produto_id,))
         return self.cursor.fetchone()
 
+    def get_product_detail(self, product_id):
+        """
+        Produto, nome da marca, imagens, última movimentação, último preço de compra e total
+        de movimentações numa única consulta (subconsultas indexadas por produto).
+        Retorna um ProductDetail, ou None se o produto não existe.
+        """
+        self.cursor.execute(
+            """
+            SELECT p.id, p.nome_produto, p.codigo_produto, p.descricao, p.marca_id, m.nome,
+                   p.quantidade_atual, p.localizacao, p.estoque_minimo,
+                   (SELECT json_group_array(image_path) FROM
+                       (SELECT image_path FROM product_images WHERE product_id = p.id ORDER BY id)),
+                   (SELECT json_array(tipo, quantidade, data_hora) FROM movimentacoes
+                    WHERE produto_id = p.id ORDER BY data_hora DESC, id DESC LIMIT 1),
+                   (SELECT ic.preco_unitario FROM itens_compra ic JOIN compras c ON c.id = ic.compra_id
+                    WHERE ic.produto_id = p.id ORDER BY c.data_emissao DESC, c.id DESC LIMIT 1),
+                   (SELECT IFNULL(SUM(movimentacoes), 0) FROM movimentacoes_diarias WHERE produto_id = p.id)
+            FROM produtos p
+            LEFT JOIN marcas m ON m.id = p.marca_id
+            WHERE p.id = ?
+            """,
+            (product_id,)
+        )
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        ultima_movimentacao = tuple(json.loads(row[10])) if row[10] else None
+        return ProductDetail(*row[:9], json.loads(row[9]), ultima_movimentacao, row[11], row[12])
+
+    @invalidates("produtos")
     def delete_produto(self, produto_id):
         try:
             self.conn.execute("BEGIN TRANSACTION")
@@ -329,10 +617,7 @@ class DatabaseManager:
             # 1. Obter caminhos das imagens associadas ao produto
             image_paths = self.get_product_images(produto_id)
             
-            # 2. Excluir entradas relacionadas ao produto nas tabelas
-            self.cursor.execute("DELETE FROM itens_compra WHERE produto_id = ?", (produto_id,))
-            self.cursor.execute("DELETE FROM movimentacoes WHERE produto_id = ?", (produto_id,))
-            self.cursor.execute("DELETE FROM product_images WHERE product_id = ?", (produto_id,))
+            # 2. Excluir o produto; ON DELETE CASCADE remove itens de compra, movimentações e imagens
             self.cursor.execute("DELETE FROM produtos WHERE id = ?", (produto_id,))
             
             self.conn.commit()
@@ -370,32 +655,91 @@ class DatabaseManager:
         self.cursor.execute("SELECT COUNT(*) FROM itens_compra WHERE produto_id = ?", (produto_id,))
         return self.cursor.fetchone()[0] > 0
 
+    def _apply_stock_change(self, produto_id, quantidade_movimentada, tipo_movimentacao):
+        """
+        Aplica a movimentação numa única instrução condicional e retorna o novo saldo,
+        ou None se o produto não existe, o tipo é inválido ou a saída excede o estoque.
+        A conta é feita pelo SQLite sobre o valor gravado, então dois terminais
+        movimentando o mesmo produto não perdem a atualização um do outro.
+        """
+        if tipo_movimentacao == "Entrada":
+            self.cursor.execute(
+                "UPDATE produtos SET quantidade_atual = quantidade_atual + ? WHERE id = ? RETURNING quantidade_atual",
+                (quantidade_movimentada, produto_id)
+            )
+        elif tipo_movimentacao == "Saída":
+            self.cursor.execute(
+                """
+                UPDATE produtos SET quantidade_atual = quantidade_atual - ?
+                WHERE id = ? AND quantidade_atual >= ?
+                RETURNING quantidade_atual
+                """,
+                (quantidade_movimentada, produto_id, quantidade_movimentada)
+            )
+        else:
+            return None # Tipo de movimentação inválido
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
     def update_produto_quantity(self, produto_id, quantidade_movimentada, tipo_movimentacao, observacao="", foto_path=None):
         try:
-            self.cursor.execute("SELECT quantidade_atual FROM produtos WHERE id = ?", (produto_id,))
-            current_quantity = self.cursor.fetchone()[0]
-
-            if tipo_movimentacao == "Entrada":
-                new_quantity = current_quantity + quantidade_movimentada
-            elif tipo_movimentacao == "Saída":
-                if quantidade_movimentada > current_quantity:
-                    return False # Saída maior que o estoque atual
-                new_quantity = current_quantity - quantidade_movimentada
-            else:
-                return False # Tipo de movimentação inválido
+            if self._apply_stock_change(produto_id, quantidade_movimentada, tipo_movimentacao) is None:
+                self.conn.rollback()
+                return False # Saída maior que o estoque atual, produto inexistente ou tipo inválido
 
-            self.cursor.execute(
-                "UPDATE produtos SET quantidade_atual = ? WHERE id = ?",
-                (new_quantity, produto_id)
-            )
-            
             self.add_movimentacao(produto_id, tipo_movimentacao, quantidade_movimentada, observacao) # Removido foto_path
             self.conn.commit()
             return True
         except sqlite3.Error as e:
+            self.conn.rollback()
             print(f"Erro ao atualizar quantidade do produto: {e}")
             return False
 
+    def apply_movements(self, movimentos):
+        """
+        Lança várias entradas e saídas numa única transação. `movimentos` é uma lista de
+        dicionários com produto_id, tipo, quantidade e observacao (opcional).
+
+        Retorna, na mesma ordem, um dicionário por linha com "sucesso", "saldo" (novo
+        saldo do produto) e "erro" (motivo da recusa). Linhas recusadas não interrompem
+        as demais; um erro do banco desfaz o lote inteiro e retorna None.
+        """
+        data_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        resultados = []
+        registros = []
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            for movimento in movimentos:
+                produto_id = movimento['produto_id']
+                tipo = movimento['tipo']
+                quantidade = movimento['quantidade']
+                if tipo not in ("Entrada", "Saída"):
+                    resultados.append({"sucesso": False, "saldo": None, "erro": f"Tipo de movimentação inválido: {tipo}"})
+                    continue
+                if quantidade <= 0:
+                    resultados.append({"sucesso": False, "saldo": None, "erro": "A quantidade deve ser maior que zero."})
+                    continue
+                saldo = self._apply_stock_change(produto_id, quantidade, tipo)
+                if saldo is None:
+                    self.cursor.execute("SELECT 1 FROM produtos WHERE id = ?", (produto_id,))
+                    erro = "Estoque insuficiente." if self.cursor.fetchone() else f"Produto {produto_id} não encontrado."
+                    resultados.append({"sucesso": False, "saldo": None, "erro": erro})
+                    continue
+                registros.append((produto_id, tipo, quantidade, data_hora, movimento.get('observacao', "")))
+                resultados.append({"sucesso": True, "saldo": saldo, "erro": None})
+            self.cursor.executemany(
+                "INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao) VALUES (?, ?, ?, ?, ?)",
+                registros
+            )
+            self.conn.commit()
+            self.logger.info(f"Lote de movimentações aplicado: {len(registros)} de {len(resultados)} linhas.")
+            return resultados
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            self.logger.error(f"Erro ao aplicar lote de movimentações: {e}", exc_info=True)
+            print(f"Erro ao aplicar lote de movimentações: {e}")
+            return None
+
     # Métodos para Compras
     def add_compra(self, fornecedor_id, data_emissao, data_entrega, prazo_entrega, subtotal, desconto, frete, total_final, observacao, status_pagamento='Pendente'):
         try:
@@ -424,17 +768,82 @@ class DatabaseManager:
             print(f"Erro ao adicionar item de compra: {e}")
             return False
 
+    def add_compra_completa(self, fornecedor_id, data_emissao, data_entrega, prazo_entrega, subtotal, desconto, frete,
+                            total_final, observacao, itens_compra_data, data_vencimento, status_pagamento='Pendente'):
+        """
+        Grava a compra, todos os itens (executemany) e a conta a pagar gerada numa única
+        transação: um só commit, e nada é gravado se qualquer parte falhar.
+        Retorna o ID da compra inserida ou None.
+        """
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            self.cursor.execute(
+                """
+                INSERT INTO compras (fornecedor_id, data_emissao, data_entrega, prazo_entrega, subtotal, desconto, frete, total_final, observacao, status_pagamento)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (fornecedor_id, data_emissao, data_entrega, prazo_entrega, subtotal, desconto, frete, total_final, observacao, status_pagamento)
+            )
+            compra_id = self.cursor.lastrowid
+            self.cursor.executemany(
+                "INSERT INTO itens_compra (compra_id, produto_id, quantidade, preco_unitario) VALUES (?, ?, ?, ?)",
+                [(compra_id, item['produto_id'], item['quantidade'], item['preco_unitario']) for item in itens_compra_data]
+            )
+            self.cursor.execute(
+                """
+                INSERT INTO contas_a_pagar (compra_id, data_vencimento, valor, valor_pago, status)
+                VALUES (?, ?, ?, 0.0, 'Pendente')
+                """,
+                (compra_id, data_vencimento, total_final)
+            )
+            self.conn.commit()
+            self.logger.info(f"Compra {compra_id} adicionada com {len(itens_compra_data)} itens.")
+            return compra_id
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            self.logger.error(f"Erro ao adicionar compra completa: {e}", exc_info=True)
+            print(f"Erro ao adicionar compra: {e}")
+            return None
+
+    def _fornecedor_search_filter(self, search_term, columns):
+        """
+        Filtro das listagens por fornecedor: nome do fornecedor (somente pelo índice FTS5, como
+        em get_fornecedores) ou trecho de uma das `columns` (datas e status). Retorna (cláusula, parâmetros).
+        """
+        clauses = [f"{column} LIKE ?" for column in columns]
+        params = [f"%{search_term}%"] * len(columns)
+        match_expression = _fts_match_expression(search_term)
+        if match_expression:
+            clauses.insert(0, "f.id IN (SELECT rowid FROM fornecedores_fts WHERE fornecedores_fts MATCH ?)")
+            params.insert(0, match_expression)
+        return " OR ".join(clauses), params
+
     def get_compras(self, search_term=""):
         query = """
             SELECT c.id, f.nome, c.data_emissao, c.total_final, c.status_pagamento
             FROM compras c
             JOIN fornecedores f ON c.fornecedor_id = f.id
-            WHERE f.nome LIKE ? OR c.data_emissao LIKE ? OR c.status_pagamento LIKE ?
-            ORDER BY c.data_emissao DESC
         """
-        self.cursor.execute(query, (f"%{search_term}%", f"%{search_term}%", f"%{search_term}%"))
+        params = []
+        if search_term:
+            where, params = self._fornecedor_search_filter(search_term, ["c.data_emissao", "c.status_pagamento"])
+            query += f" WHERE {where}"
+        query += " ORDER BY c.data_emissao DESC"
+        self.cursor.execute(query, params)
         return self.cursor.fetchall()
 
+    def get_compras_page(self, search_term="", after=None, limit=None, sort_by="data_emissao", descending=True):
+        where, params = [], []
+        if search_term:
+            clause, params = self._fornecedor_search_filter(search_term, ["c.data_emissao", "c.status_pagamento"])
+            where.append(clause)
+        return self._fetch_keyset_page(
+            "c.id, f.nome, c.data_emissao, c.total_final, c.status_pagamento",
+            "compras c JOIN fornecedores f ON c.fornecedor_id = f.id",
+            where, params, self._sort_expressions(self.COMPRAS_SORT_COLUMNS, sort_by, "c.id"),
+            descending, after, limit or self.PAGE_SIZE
+        )
+
     def get_compra_details(self, compra_id):
         self.cursor.execute(
             """
@@ -461,46 +870,90 @@ class DatabaseManager:
         return compra, itens
 
     def update_compra(self, compra_id, fornecedor_id, data_emissao, data_entrega, prazo_entrega, subtotal, desconto, frete, total_final, observacao, status_pagamento, itens_compra_data):
+        """
+        Aplica a edição como diferença: só os itens inseridos, alterados e removidos são
+        gravados (em lote), e a compra e a conta a pagar só são atualizadas se algum de
+        seus campos mudou.
+        """
         try:
             self.conn.execute("BEGIN TRANSACTION")
 
-            # 1. Atualizar a compra principal
+            # 1. Atualizar a compra principal, se algum campo mudou
+            header = (fornecedor_id, data_emissao, data_entrega, prazo_entrega,
+                      subtotal, desconto, frete, total_final, observacao, status_pagamento)
             self.cursor.execute(
                 """
-                UPDATE compras
-                SET fornecedor_id = ?, data_emissao = ?, data_entrega = ?, prazo_entrega = ?,
-                    subtotal = ?, desconto = ?, frete = ?, total_final = ?, observacao = ?, status_pagamento = ?
-                WHERE id = ?
+                SELECT fornecedor_id, data_emissao, data_entrega, prazo_entrega,
+                       subtotal, desconto, frete, total_final, observacao, status_pagamento
+                FROM compras WHERE id = ?
                 """,
-                (fornecedor_id, data_emissao, data_entrega, prazo_entrega,
-                 subtotal, desconto, frete, total_final, observacao, status_pagamento, compra_id)
+                (compra_id,)
             )
+            if self.cursor.fetchone() != header:
+                self.cursor.execute(
+                    """
+                    UPDATE compras
+                    SET fornecedor_id = ?, data_emissao = ?, data_entrega = ?, prazo_entrega = ?,
+                        subtotal = ?, desconto = ?, frete = ?, total_final = ?, observacao = ?, status_pagamento = ?
+                    WHERE id = ?
+                    """,
+                    header + (compra_id,)
+                )
 
-            # 2. Excluir todos os itens de compra existentes para esta compra
-            self.cursor.execute("DELETE FROM itens_compra WHERE compra_id = ?", (compra_id,))
+            # 2. Calcular a diferença dos itens, casando as linhas existentes pelo produto
+            self.cursor.execute(
+                "SELECT id, produto_id, quantidade, preco_unitario FROM itens_compra WHERE compra_id = ? ORDER BY id",
+                (compra_id,)
+            )
+            existing = {}
+            removed = []
+            for item_id, produto_id, quantidade, preco_unitario in self.cursor.fetchall():
+                if produto_id in existing:
+                    removed.append((item_id,)) # Linha duplicada do mesmo produto
+                else:
+                    existing[produto_id] = (item_id, quantidade, preco_unitario)
 
-            # 3. Inserir os novos itens de compra
+            inserted, updated = [], []
             for item_data in itens_compra_data:
                 produto_id = item_data['produto_id']
                 quantidade = item_data['quantidade']
                 preco_unitario = item_data['preco_unitario']
-                self.cursor.execute(
+                current = existing.pop(produto_id, None)
+                if current is None:
+                    inserted.append((compra_id, produto_id, quantidade, preco_unitario))
+                elif (current[1], current[2]) != (quantidade, preco_unitario):
+                    updated.append((quantidade, preco_unitario, current[0]))
+            removed.extend((item_id,) for item_id, _, _ in existing.values())
+
+            # 3. Aplicar a diferença em lote
+            if removed:
+                self.cursor.executemany("DELETE FROM itens_compra WHERE id = ?", removed)
+            if updated:
+                self.cursor.executemany(
+                    "UPDATE itens_compra SET quantidade = ?, preco_unitario = ? WHERE id = ?", updated
+                )
+            if inserted:
+                self.cursor.executemany(
                     "INSERT INTO itens_compra (compra_id, produto_id, quantidade, preco_unitario) VALUES (?, ?, ?, ?)",
-                    (compra_id, produto_id, quantidade, preco_unitario)
+                    inserted
                 )
-            
-            # 4. Atualizar a conta a pagar associada (se houver)
+
+            # 4. Atualizar a conta a pagar associada (se houver) apenas se vencimento ou valor mudaram
             # Simplificado: assume que há uma conta a pagar por compra e a atualiza
             self.cursor.execute(
                 """
                 UPDATE contas_a_pagar
                 SET data_vencimento = ?, valor = ?
-                WHERE compra_id = ?
+                WHERE compra_id = ? AND (data_vencimento IS NOT ? OR valor IS NOT ?)
                 """,
-                (data_entrega, total_final, compra_id) # Usando data_entrega como nova data de vencimento e total_final como novo valor
+                (data_entrega, total_final, compra_id, data_entrega, total_final) # Usando data_entrega como nova data de vencimento e total_final como novo valor
             )
 
             self.conn.commit()
+            self.logger.info(
+                f"Compra {compra_id} atualizada: {len(inserted)} itens inseridos, "
+                f"{len(updated)} alterados, {len(removed)} removidos."
+            )
             return True
         except sqlite3.Error as e:
             self.conn.rollback()
@@ -547,12 +1000,27 @@ class DatabaseManager:
             FROM contas_a_pagar cap
             JOIN compras c ON cap.compra_id = c.id
             JOIN fornecedores f ON c.fornecedor_id = f.id
-            WHERE f.nome LIKE ? OR cap.data_vencimento LIKE ? OR cap.status LIKE ?
-            ORDER BY cap.data_vencimento ASC
         """
-        self.cursor.execute(query, (f"%{search_term}%", f"%{search_term}%", f"%{search_term}%"))
+        params = []
+        if search_term:
+            where, params = self._fornecedor_search_filter(search_term, ["cap.data_vencimento", "cap.status"])
+            query += f" WHERE {where}"
+        query += " ORDER BY cap.data_vencimento ASC"
+        self.cursor.execute(query, params)
         return self.cursor.fetchall()
 
+    def get_contas_a_pagar_page(self, search_term="", after=None, limit=None, sort_by="data_vencimento", descending=False):
+        where, params = [], []
+        if search_term:
+            clause, params = self._fornecedor_search_filter(search_term, ["cap.data_vencimento", "cap.status"])
+            where.append(clause)
+        return self._fetch_keyset_page(
+            "cap.id, f.nome, c.data_emissao, cap.data_vencimento, cap.valor, cap.valor_pago, cap.status",
+            "contas_a_pagar cap JOIN compras c ON cap.compra_id = c.id JOIN fornecedores f ON c.fornecedor_id = f.id",
+            where, params, self._sort_expressions(self.CONTAS_A_PAGAR_SORT_COLUMNS, sort_by, "cap.id"),
+            descending, after, limit or self.PAGE_SIZE
+        )
+
     def update_conta_a_pagar_status(self, conta_id, valor_pago, status):
         try:
             self.cursor.execute(
@@ -580,12 +1048,202 @@ class DatabaseManager:
             return False
 
     def get_movimentacoes_by_product(self, produto_id):
+        # Histórico completo; para listagens use get_movimentacoes_page
         self.cursor.execute(
-            "SELECT tipo, quantidade, data_hora, observacao FROM movimentacoes WHERE produto_id = ? ORDER BY data_hora DESC",
+            "SELECT tipo, quantidade, data_hora, observacao FROM movimentacoes WHERE produto_id = ? ORDER BY data_hora DESC, id DESC",
             (produto_id,)
         )
         return self.cursor.fetchall()
 
+    def get_movimentacoes_page(self, produto_id, after=None, limit=None, sort_by="data_hora", descending=True):
+        """
+        Histórico de um produto em páginas, do mais recente para o mais antigo por padrão.
+        A ordem (data_hora, id) é a do índice idx_movimentacoes_produto_saldo, então cada
+        página é uma leitura do índice a partir da chave anterior.
+        Linhas: (id, tipo, quantidade, data/hora, observação).
+        """
+        return self._fetch_keyset_page(
+            "id, tipo, quantidade, data_hora, observacao",
+            "movimentacoes",
+            ["produto_id = ?"], [produto_id], self._sort_expressions(self.MOVIMENTACOES_SORT_COLUMNS, sort_by, "id"),
+            descending, after, limit or self.PAGE_SIZE
+        )
+
+    def get_movimentacoes_resumo(self, produto_id, periodo="dia", limit=None):
+        """
+        Totais do produto por dia ('dia') ou por mês ('mes'), do período mais recente para o
+        mais antigo, lidos do resumo movimentacoes_diarias (uma linha por dia com movimento).
+        Linhas: (período, entradas, saídas, número de movimentações).
+        """
+        tamanho = {"dia": 10, "mes": 7}.get(periodo)
+        if tamanho is None:
+            raise ValueError(f"Período de agrupamento inválido: {periodo}")
+        self.cursor.execute(
+            f"""
+            SELECT substr(dia, 1, {tamanho}) AS periodo, SUM(entradas), SUM(saidas), SUM(movimentacoes)
+            FROM movimentacoes_diarias
+            WHERE produto_id = ?
+            GROUP BY periodo
+            ORDER BY periodo DESC
+            LIMIT ?
+            """,
+            (produto_id, limit or self.PAGE_SIZE)
+        )
+        return self.cursor.fetchall()
+
+    def get_totais_movimentacoes(self, data_inicio, data_fim, agrupamento="dia"):
+        """
+        Entradas e saídas de todos os produtos entre data_inicio e data_fim (inclusive,
+        'AAAA-MM-DD'), agrupadas por 'dia', 'semana' (AAAA-SS, semana começando na segunda)
+        ou 'mes', em ordem cronológica. Lê o resumo diário, não o livro bruto.
+        Linhas: (período, entradas, saídas, número de movimentações).
+        """
+        expressao = {"dia": "dia", "semana": "strftime('%Y-%W', dia)", "mes": "substr(dia, 1, 7)"}.get(agrupamento)
+        if expressao is None:
+            raise ValueError(f"Agrupamento inválido: {agrupamento}")
+        self.cursor.execute(
+            f"""
+            SELECT {expressao} AS periodo, SUM(entradas), SUM(saidas), SUM(movimentacoes)
+            FROM movimentacoes_diarias
+            WHERE dia BETWEEN ? AND ?
+            GROUP BY periodo
+            ORDER BY periodo
+            """,
+            (data_inicio, data_fim)
+        )
+        return self.cursor.fetchall()
+
+    def get_produtos_mais_movimentados(self, data_inicio, data_fim, limit=10):
+        """
+        Produtos com mais unidades de saída entre data_inicio e data_fim (inclusive).
+        Linhas: (id, nome, entradas, saídas, número de movimentações).
+        """
+        self.cursor.execute(
+            """
+            SELECT p.id, p.nome_produto, r.entradas, r.saidas, r.movimentacoes
+            FROM (
+                SELECT produto_id, SUM(entradas) AS entradas, SUM(saidas) AS saidas, SUM(movimentacoes) AS movimentacoes
+                FROM movimentacoes_diarias
+                WHERE dia BETWEEN ? AND ?
+                GROUP BY produto_id
+            ) r
+            JOIN produtos p ON p.id = r.produto_id
+            ORDER BY r.saidas DESC, p.id
+            LIMIT ?
+            """,
+            (data_inicio, data_fim, limit)
+        )
+        return self.cursor.fetchall()
+
+    def rebuild_movimentacoes_diarias(self):
+        """
+        Recalcula o resumo diário inteiro a partir de movimentacoes, numa transação
+        (após cargas em massa ou para verificação). Retorna o número de linhas do resumo.
+        """
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            for statement in REBUILD_MOVIMENTACOES_DIARIAS:
+                self.cursor.execute(statement)
+            self.conn.commit()
+            self.cursor.execute("SELECT COUNT(*) FROM movimentacoes_diarias")
+            total = self.cursor.fetchone()[0]
+            self.logger.info(f"Resumo diário de movimentações recalculado ({total} linhas).")
+            return total
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            self.logger.error(f"Erro ao recalcular o resumo diário de movimentações: {e}", exc_info=True)
+            print(f"Erro ao recalcular o resumo diário de movimentações: {e}")
+            return None
+
+    # Métodos para Fechamentos de Estoque
+    def _saldos_query(self, data_fechamento, data_limite, produto_id=None):
+        """
+        Monta a consulta de saldos por produto no fim de data_limite: as linhas do fechamento
+        data_fechamento (None para partir do zero) mais as movimentações posteriores a ele.
+        Só o intervalo entre o fechamento e data_limite é lido de movimentacoes.
+        """
+        inicio = (date.fromisoformat(data_fechamento) + timedelta(days=1)).isoformat() if data_fechamento else ""
+        fim = (date.fromisoformat(data_limite) + timedelta(days=1)).isoformat()
+        filtro_produto = " AND produto_id = ?" if produto_id is not None else ""
+        extra = (produto_id,) if produto_id is not None else ()
+        query = f"""
+            SELECT produto_id, SUM(quantidade) FROM (
+                SELECT produto_id, quantidade FROM saldos_estoque
+                WHERE data_referencia = ?{filtro_produto}
+                UNION ALL
+                SELECT produto_id, CASE tipo WHEN 'Entrada' THEN quantidade ELSE -quantidade END
+                FROM movimentacoes
+                WHERE data_hora >= ? AND data_hora < ?{filtro_produto}
+                AND produto_id IN (SELECT id FROM produtos) -- Ignora movimentações de produtos excluídos
+            )
+            GROUP BY produto_id
+        """
+        return query, (data_fechamento,) + extra + (inicio, fim) + extra
+
+    def _latest_snapshot_date(self, data_limite):
+        self.cursor.execute(
+            "SELECT MAX(data_referencia) FROM fechamentos_estoque WHERE data_referencia <= ?", (data_limite,)
+        )
+        return self.cursor.fetchone()[0]
+
+    def get_stock_as_of(self, data, produto_id=None):
+        """
+        Saldo de estoque no fim do dia `data` ('AAAA-MM-DD' ou date): o fechamento mais
+        próximo anterior à data mais as movimentações seguintes, sem reler o livro inteiro.
+        Retorna {produto_id: quantidade}; produtos sem histórico até a data não aparecem.
+        """
+        data_limite = data.isoformat() if isinstance(data, date) else data
+        data_fechamento = self._latest_snapshot_date(data_limite)
+        query, params = self._saldos_query(data_fechamento, data_limite, produto_id)
+        self.cursor.execute(query, params)
+        return dict(self.cursor.fetchall())
+
+    def ensure_monthly_snapshots(self, hoje=None):
+        """
+        Grava o fechamento de cada mês encerrado que ainda não tem um (o mês corrente nunca é
+        fechado). Cada fechamento parte do anterior e lê só as movimentações do próprio mês.
+        Retorna as datas fechadas, ou None em caso de erro.
+        """
+        hoje = hoje or date.today()
+        ultimo_fim_de_mes = hoje.replace(day=1) - timedelta(days=1)
+        try:
+            self.cursor.execute("SELECT MAX(data_referencia) FROM fechamentos_estoque")
+            data_fechamento = self.cursor.fetchone()[0]
+            if data_fechamento:
+                proximo_inicio = date.fromisoformat(data_fechamento) + timedelta(days=1)
+            else:
+                self.cursor.execute("SELECT MIN(data_hora) FROM movimentacoes")
+                primeira_movimentacao = self.cursor.fetchone()[0]
+                if primeira_movimentacao is None:
+                    return []
+                proximo_inicio = date.fromisoformat(primeira_movimentacao[:10]).replace(day=1)
+
+            fechadas = []
+            while True:
+                proximo_mes = (proximo_inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+                fim_de_mes = proximo_mes - timedelta(days=1)
+                if fim_de_mes > ultimo_fim_de_mes:
+                    break
+                data_referencia = fim_de_mes.isoformat()
+                query, params = self._saldos_query(data_fechamento, data_referencia)
+                self.cursor.execute("INSERT INTO fechamentos_estoque (data_referencia) VALUES (?)", (data_referencia,))
+                self.cursor.execute(
+                    f"INSERT INTO saldos_estoque (data_referencia, produto_id, quantidade) SELECT ?, * FROM ({query})",
+                    (data_referencia,) + params
+                )
+                fechadas.append(data_referencia)
+                data_fechamento = data_referencia
+                proximo_inicio = proximo_mes
+            self.conn.commit()
+            if fechadas:
+                self.logger.info(f"Fechamentos de estoque gravados: {fechadas[0]} a {fechadas[-1]} ({len(fechadas)}).")
+            return fechadas
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            self.logger.error(f"Erro ao gravar fechamentos de estoque: {e}", exc_info=True)
+            print(f"Erro ao gravar fechamentos de estoque: {e}")
+            return None
+
     # Métodos para Imagens de Produtos
     def add_product_image(self, product_id, image_path):
         try:
@@ -596,8 +1254,31 @@ class DatabaseManager:
             print(f"Erro ao adicionar imagem do produto: {e}")
             return False
 
+    def add_product_images(self, product_id, image_paths):
+        """
+        Registra as imagens já gravadas em disco, numa única transação. Caminhos que o produto
+        já tem são ignorados (a ingestão nomeia os arquivos pelo conteúdo, então anexar a mesma
+        foto duas vezes resulta no mesmo caminho).
+        """
+        try:
+            self.cursor.executemany(
+                """
+                INSERT INTO product_images (product_id, image_path)
+                SELECT ?1, ?2
+                WHERE NOT EXISTS (SELECT 1 FROM product_images WHERE product_id = ?1 AND image_path = ?2)
+                """,
+                [(product_id, path) for path in image_paths]
+            )
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            self.logger.error(f"Erro ao registrar imagens do produto {product_id}: {e}", exc_info=True)
+            print(f"Erro ao registrar imagens do produto: {e}")
+            return False
+
     def get_product_images(self, product_id):
-        self.cursor.execute("SELECT image_path FROM product_images WHERE product_id = ?", (product_id,))
+        self.cursor.execute("SELECT image_path FROM product_images WHERE product_id = ? ORDER BY id", (product_id,))
         return [row[0] for row in self.cursor.fetchall()]
 
     def delete_product_images(self, product_id):
@@ -609,13 +1290,7 @@ class DatabaseManager:
             print(f"Erro ao deletar imagens do produto: {e}")
             return False
 
-    def get_movimentacoes_by_product(self, produto_id):
-        self.cursor.execute(
-            "SELECT tipo, quantidade, data_hora, observacao FROM movimentacoes WHERE produto_id = ? ORDER BY data_hora DESC",
-            (produto_id,)
-        )
-        return self.cursor.fetchall()
-
+    @cached_query("produtos")
     def get_all_products_for_combobox(self):
         self.cursor.execute("SELECT id, nome_produto, codigo_produto FROM produtos ORDER BY nome_produto")
         return self.cursor.fetchall()
@@ -625,14 +1300,48 @@ class DatabaseManager:
         self.cursor.execute("SELECT COUNT(*) FROM produtos")
         return self.cursor.fetchone()[0]
 
-    def get_low_stock_products_count(self, low_stock_threshold=10):
-        self.cursor.execute("SELECT COUNT(*) FROM produtos WHERE quantidade_atual <= ?", (low_stock_threshold,))
+    def get_low_stock_products_count(self):
+        # Contagem sobre o índice parcial idx_produtos_estoque_baixo (só produtos no mínimo ou abaixo)
+        self.cursor.execute("SELECT COUNT(*) FROM produtos WHERE quantidade_atual <= estoque_minimo")
         return self.cursor.fetchone()[0]
 
     def get_total_brands_count(self):
         self.cursor.execute("SELECT COUNT(*) FROM marcas")
         return self.cursor.fetchone()[0]
 
+    def get_dashboard_stats(self):
+        """
+        Contadores do painel numa única leitura: (total de produtos, produtos com estoque
+        baixo, total de marcas). A linha é mantida pelos triggers da migração 9.
+        """
+        self.cursor.execute(
+            "SELECT total_produtos, produtos_estoque_baixo, total_marcas FROM estatisticas_estoque WHERE id = 1"
+        )
+        return self.cursor.fetchone()
+
+    def rebuild_dashboard_stats(self):
+        """
+        Recalcula os contadores do painel com COUNT(*), para verificação.
+        Retorna a linha recalculada, como get_dashboard_stats.
+        """
+        try:
+            self.cursor.execute(
+                """
+                INSERT OR REPLACE INTO estatisticas_estoque (id, total_produtos, produtos_estoque_baixo, total_marcas, versao_estoque_baixo)
+                VALUES (1, ?, ?, ?, COALESCE((SELECT versao_estoque_baixo FROM estatisticas_estoque WHERE id = 1), 0) + 1)
+                """,
+                (self.get_total_products_count(), self.get_low_stock_products_count(), self.get_total_brands_count())
+            )
+            self.conn.commit()
+            self.logger.info("Contadores do painel recalculados.")
+            return self.get_dashboard_stats()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            self.logger.error(f"Erro ao recalcular os contadores do painel: {e}", exc_info=True)
+            print(f"Erro ao recalcular os contadores do painel: {e}")
+            return None
+
+    @cached_query("fornecedores")
     def get_all_fornecedores_for_combobox(self):
         self.cursor.execute("SELECT id, nome FROM fornecedores ORDER BY nome")
         return self.cursor.fetchall()
@@ -0,0 +1,178 @@
+import argparse
+from datetime import datetime
+
+from MeuEstoque.database.database_manager import DatabaseManager
+from MeuEstoque.logger import get_logger
+
+# Linhas órfãs deixadas por bancos criados antes de PRAGMA foreign_keys = ON. A ordem importa:
+# compras sem fornecedor são removidas antes de itens e contas sem compra.
+# Cada anti-junção consulta a chave primária da tabela pai (busca indexada por linha filha).
+ORPHAN_DELETES = [
+    ("compras", "DELETE FROM compras WHERE NOT EXISTS (SELECT 1 FROM fornecedores f WHERE f.id = compras.fornecedor_id)"),
+    ("itens_compra", """
+        DELETE FROM itens_compra
+        WHERE NOT EXISTS (SELECT 1 FROM compras c WHERE c.id = itens_compra.compra_id)
+           OR NOT EXISTS (SELECT 1 FROM produtos p WHERE p.id = itens_compra.produto_id)
+    """),
+    ("contas_a_pagar", "DELETE FROM contas_a_pagar WHERE NOT EXISTS (SELECT 1 FROM compras c WHERE c.id = contas_a_pagar.compra_id)"),
+    ("movimentacoes", "DELETE FROM movimentacoes WHERE NOT EXISTS (SELECT 1 FROM produtos p WHERE p.id = movimentacoes.produto_id)"),
+    # Depois de movimentacoes: o trigger de exclusão já desconta do resumo os dias das movimentações removidas
+    ("movimentacoes_diarias", "DELETE FROM movimentacoes_diarias WHERE NOT EXISTS (SELECT 1 FROM produtos p WHERE p.id = movimentacoes_diarias.produto_id)"),
+    ("product_images", "DELETE FROM product_images WHERE NOT EXISTS (SELECT 1 FROM produtos p WHERE p.id = product_images.product_id)"),
+    # marca_id é ON DELETE SET NULL: a referência é limpa, o produto é mantido
+    ("produtos", """
+        UPDATE produtos SET marca_id = NULL
+        WHERE marca_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM marcas m WHERE m.id = produtos.marca_id)
+    """),
+]
+
+
+def purge_orphans(conn, logger, dry_run=False):
+    """
+    Remove (ou, com dry_run, apenas conta) as linhas órfãs numa única transação.
+    Retorna {tabela: linhas afetadas diretamente}, mais "total": todas as linhas alteradas,
+    incluindo as removidas por ON DELETE CASCADE e as atualizadas pelos triggers. O dry_run
+    executa a mesma limpeza e a desfaz, então os números são os de uma execução real.
+    """
+    cursor = conn.cursor()
+    counts = {}
+    cursor.execute("BEGIN TRANSACTION")
+    changes_before = conn.total_changes
+    try:
+        for table, statement in ORPHAN_DELETES:
+            cursor.execute(statement)
+            counts[table] = cursor.rowcount
+            if cursor.rowcount:
+                logger.info(f"{cursor.rowcount} linhas órfãs em '{table}'.")
+        # rowcount conta só as linhas do próprio comando; total_changes inclui cascatas e triggers
+        counts["total"] = conn.total_changes - changes_before
+        logger.info(f"{counts['total']} linhas alteradas no total (com cascatas e triggers).")
+        remaining = cursor.execute("PRAGMA foreign_key_check").fetchall()
+        if remaining:
+            logger.warning(f"Ainda há {len(remaining)} violações de chave estrangeira após a limpeza.")
+    except Exception:
+        conn.rollback()
+        raise
+    if dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+    return counts
+
+
+# Produtos cujo quantidade_atual difere da soma das movimentações. O agrupamento por
+# produto_id lê só o índice idx_movimentacoes_produto_saldo (produto_id, data_hora, tipo, quantidade).
+STOCK_DISCREPANCIES = """
+    SELECT p.id, p.nome_produto, p.quantidade_atual, IFNULL(l.saldo, 0) AS saldo_livro
+    FROM produtos p
+    LEFT JOIN (
+        SELECT produto_id, SUM(CASE tipo WHEN 'Entrada' THEN quantidade ELSE -quantidade END) AS saldo
+        FROM movimentacoes
+        GROUP BY produto_id
+    ) l ON l.produto_id = p.id
+    WHERE p.quantidade_atual <> IFNULL(l.saldo, 0)
+"""
+
+# Compras cujo subtotal difere (em centavos) da soma de quantidade * preço dos itens
+SUBTOTAL_DISCREPANCIES = """
+    SELECT c.id, c.subtotal, IFNULL(i.soma, 0) AS soma_itens
+    FROM compras c
+    LEFT JOIN (
+        SELECT compra_id, SUM(quantidade * preco_unitario) AS soma
+        FROM itens_compra
+        GROUP BY compra_id
+    ) i ON i.compra_id = c.id
+    WHERE ROUND(c.subtotal - IFNULL(i.soma, 0), 2) <> 0
+"""
+
+
+def reconcile_ledger(conn, logger, apply_corrections=False):
+    """
+    Confere o estoque de cada produto contra o livro de movimentações e o subtotal de cada
+    compra contra os seus itens, com duas consultas agregadas.
+    Retorna {"estoque": [(id, nome, quantidade_atual, saldo_livro)], "compras": [(id, subtotal, soma_itens)]}.
+
+    Com apply_corrections, grava numa única transação uma movimentação de correção para cada
+    produto divergente, levando o livro ao quantidade_atual (os subtotais são só relatados).
+    """
+    cursor = conn.cursor()
+    report = {
+        "estoque": cursor.execute(STOCK_DISCREPANCIES).fetchall(),
+        "compras": cursor.execute(SUBTOTAL_DISCREPANCIES).fetchall(),
+    }
+    logger.info(
+        f"Conciliação: {len(report['estoque'])} produtos e {len(report['compras'])} compras com divergência."
+    )
+    if apply_corrections and report["estoque"]:
+        data_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            cursor.executemany(
+                "INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (produto_id, "Entrada" if quantidade > saldo else "Saída", abs(quantidade - saldo), data_hora, "Correção de conciliação")
+                    for produto_id, _, quantidade, saldo in report["estoque"]
+                ]
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        logger.info(f"{len(report['estoque'])} movimentações de correção gravadas.")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tarefas de manutenção do banco de dados do MeuEstoque.")
+    parser.add_argument("--db", default="estoque.db", help="Arquivo do banco de dados.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    purge_parser = subparsers.add_parser("purge-orphans", help="Remove linhas órfãs de bancos anteriores às chaves estrangeiras.")
+    purge_parser.add_argument("--dry-run", action="store_true", help="Apenas conta as linhas, sem removê-las.")
+    reconcile_parser = subparsers.add_parser("reconcile", help="Confere estoque x movimentações e subtotal x itens das compras.")
+    reconcile_parser.add_argument("--fix", action="store_true", help="Grava movimentações de correção para os produtos divergentes.")
+    reconcile_parser.add_argument("--limit", type=int, default=50, help="Máximo de linhas listadas por seção do relatório.")
+    subparsers.add_parser("rebuild-daily", help="Recalcula o resumo diário de movimentações a partir do livro.")
+    subparsers.add_parser("snapshot-months", help="Grava os fechamentos de estoque dos meses encerrados que ainda não têm um.")
+    stock_parser = subparsers.add_parser("stock-as-of", help="Saldo de estoque de cada produto no fim de uma data.")
+    stock_parser.add_argument("data", help="Data no formato AAAA-MM-DD.")
+    args = parser.parse_args()
+
+    logger = get_logger("maintenance")
+    db = DatabaseManager(args.db)
+    try:
+        if args.command == "purge-orphans":
+            counts = purge_orphans(db.conn, logger, dry_run=args.dry_run)
+            print("Linhas órfãs encontradas (nada foi alterado):" if args.dry_run else "Linhas órfãs corrigidas:")
+            total = counts.pop("total")
+            for table, count in counts.items():
+                print(f"  {table:<16}{count:>10}")
+            print(f"  {'total':<16}{total:>10}  (inclui cascatas e triggers)")
+        elif args.command == "reconcile":
+            report = reconcile_ledger(db.conn, logger, apply_corrections=args.fix)
+            print(f"Produtos com estoque diferente do livro de movimentações: {len(report['estoque'])}")
+            for produto_id, nome, quantidade, saldo in report["estoque"][:args.limit]:
+                print(f"  {produto_id:>8}  {nome:<40}atual {quantidade:>8}  livro {saldo:>8}")
+            print(f"Compras com subtotal diferente da soma dos itens: {len(report['compras'])}")
+            for compra_id, subtotal, soma in report["compras"][:args.limit]:
+                print(f"  {compra_id:>8}  subtotal {subtotal:>12.2f}  itens {soma:>12.2f}")
+            if args.fix and report["estoque"]:
+                print(f"{len(report['estoque'])} movimentações de correção gravadas.")
+        elif args.command == "rebuild-daily":
+            total = db.rebuild_movimentacoes_diarias()
+            print(f"Resumo diário recalculado: {total} linhas." if total is not None else "Falha ao recalcular o resumo diário.")
+        elif args.command == "snapshot-months":
+            fechadas = db.ensure_monthly_snapshots()
+            print(f"{len(fechadas)} fechamentos gravados." if fechadas is not None else "Falha ao gravar os fechamentos.")
+        elif args.command == "stock-as-of":
+            db.ensure_monthly_snapshots()
+            saldos = db.get_stock_as_of(args.data)
+            nomes = dict(db.conn.execute("SELECT id, nome_produto FROM produtos"))
+            print(f"Saldo de estoque em {args.data}:")
+            for produto_id, quantidade in sorted(saldos.items(), key=lambda item: nomes.get(item[0], "")):
+                print(f"  {nomes.get(produto_id, produto_id)!s:<40}{quantidade:>10}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
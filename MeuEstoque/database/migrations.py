@@ -0,0 +1,599 @@
+import sqlite3
+from datetime import datetime
+
+# Cada migração é uma tupla (versão, descrição, função). As versões são
+# aplicadas em ordem crescente e registradas na tabela schema_version, de
+# modo que cada passo roda exatamente uma vez por banco de dados.
+
+
+def _m001_tabelas_iniciais(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS marcas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS produtos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_produto TEXT NOT NULL,
+            codigo_produto TEXT UNIQUE,
+            descricao TEXT,
+            marca_id INTEGER,
+            quantidade_atual INTEGER NOT NULL DEFAULT 0,
+            localizacao TEXT, -- Novo campo para localização no estoque
+            FOREIGN KEY (marca_id) REFERENCES marcas(id) ON DELETE SET NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fornecedores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL UNIQUE,
+            contato TEXT,
+            telefone TEXT,
+            email TEXT,
+            endereco TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS compras (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fornecedor_id INTEGER NOT NULL,
+            data_emissao TEXT NOT NULL,
+            data_entrega TEXT,
+            prazo_entrega TEXT,
+            subtotal REAL NOT NULL DEFAULT 0.0,
+            desconto REAL NOT NULL DEFAULT 0.0,
+            frete REAL NOT NULL DEFAULT 0.0,
+            total_final REAL NOT NULL DEFAULT 0.0,
+            observacao TEXT,
+            status_pagamento TEXT NOT NULL DEFAULT 'Pendente', -- Novo campo para status de pagamento da compra
+            FOREIGN KEY (fornecedor_id) REFERENCES fornecedores(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS itens_compra (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            compra_id INTEGER NOT NULL,
+            produto_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            preco_unitario REAL NOT NULL,
+            FOREIGN KEY (compra_id) REFERENCES compras(id) ON DELETE CASCADE,
+            FOREIGN KEY (produto_id) REFERENCES produtos(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS contas_a_pagar (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            compra_id INTEGER NOT NULL,
+            data_vencimento TEXT NOT NULL,
+            valor REAL NOT NULL,
+            valor_pago REAL NOT NULL DEFAULT 0.0,
+            status TEXT NOT NULL DEFAULT 'Pendente', -- Pendente, Pago, Parcialmente Pago
+            FOREIGN KEY (compra_id) REFERENCES compras(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS movimentacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER,
+            tipo TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            data_hora TEXT NOT NULL,
+            observacao TEXT,
+            FOREIGN KEY (produto_id) REFERENCES produtos(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS product_images (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            image_path TEXT NOT NULL,
+            FOREIGN KEY (product_id) REFERENCES produtos(id) ON DELETE CASCADE
+        )
+    """)
+
+
+def _m002_status_pagamento_compras(cursor):
+    # Bancos criados antes da coluna status_pagamento existir precisam recebê-la.
+    cursor.execute("PRAGMA table_info(compras)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'status_pagamento' not in columns:
+        cursor.execute("ALTER TABLE compras ADD COLUMN status_pagamento TEXT NOT NULL DEFAULT 'Pendente'")
+
+
+def _m003_indices_chaves_e_filtros(cursor):
+    # Índices para as chaves estrangeiras (buscas por produto/compra/fornecedor/marca)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_produtos_marca ON produtos(marca_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_compras_fornecedor ON compras(fornecedor_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_itens_compra_compra ON itens_compra(compra_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_itens_compra_produto ON itens_compra(produto_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contas_a_pagar_compra ON contas_a_pagar(compra_id)")
+    # Cobre o histórico de um produto (filtro por produto + ordenação por data_hora)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_movimentacoes_produto_data ON movimentacoes(produto_id, data_hora)")
+    # Cobre get_product_images sem precisar visitar a tabela
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_images_produto ON product_images(product_id, image_path)")
+    # Colunas usadas em filtros e ordenações das listagens
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_compras_data_emissao ON compras(data_emissao)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contas_a_pagar_vencimento_status ON contas_a_pagar(data_vencimento, status)")
+    cursor.execute("ANALYZE")
+
+
+def _m004_marcas_iniciais(cursor):
+    # As marcas padrão são semeadas uma única vez; marcas removidas pelo usuário não voltam.
+    initial_brands = [
+        "Chevrolet", "Volkswagen", "Fiat", "Ford", "Hyundai",
+        "Toyota", "Honda", "Renault", "Jeep", "Mercedes-Benz",
+        "BMW", "Audi", "Nissan", "Kia", "Peugeot"
+    ]
+    cursor.executemany("INSERT OR IGNORE INTO marcas (nome) VALUES (?)", [(nome,) for nome in initial_brands])
+
+
+def _m005_busca_textual_produtos(cursor):
+    # Índice FTS5 sobre nome, código, descrição, marca e localização. O rowid do índice é o
+    # id do produto; remove_diacritics e o índice de prefixos atendem a busca por digitação.
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+            nome_produto, codigo_produto, descricao, marca, localizacao,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4'
+        )
+    """)
+    cursor.execute("DELETE FROM produtos_fts")
+    cursor.execute("""
+        INSERT INTO produtos_fts (rowid, nome_produto, codigo_produto, descricao, marca, localizacao)
+        SELECT p.id, p.nome_produto, p.codigo_produto, p.descricao, m.nome, p.localizacao
+        FROM produtos p
+        LEFT JOIN marcas m ON p.marca_id = m.id
+    """)
+    # Gatilhos que mantêm o índice sincronizado com produtos e marcas
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_ai AFTER INSERT ON produtos BEGIN
+            INSERT INTO produtos_fts (rowid, nome_produto, codigo_produto, descricao, marca, localizacao)
+            VALUES (NEW.id, NEW.nome_produto, NEW.codigo_produto, NEW.descricao,
+                    (SELECT nome FROM marcas WHERE id = NEW.marca_id), NEW.localizacao);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_ad AFTER DELETE ON produtos BEGIN
+            DELETE FROM produtos_fts WHERE rowid = OLD.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_au
+        AFTER UPDATE OF nome_produto, codigo_produto, descricao, marca_id, localizacao ON produtos BEGIN
+            UPDATE produtos_fts
+            SET nome_produto = NEW.nome_produto, codigo_produto = NEW.codigo_produto, descricao = NEW.descricao,
+                marca = (SELECT nome FROM marcas WHERE id = NEW.marca_id), localizacao = NEW.localizacao
+            WHERE rowid = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS marcas_fts_au AFTER UPDATE OF nome ON marcas BEGIN
+            UPDATE produtos_fts SET marca = NEW.nome
+            WHERE rowid IN (SELECT id FROM produtos WHERE marca_id = NEW.id);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS marcas_fts_ad AFTER DELETE ON marcas BEGIN
+            UPDATE produtos_fts SET marca = NULL
+            WHERE rowid IN (SELECT id FROM produtos WHERE marca_id = OLD.id);
+        END
+    """)
+
+
+def _m006_busca_textual_marcas_fornecedores(cursor):
+    # Busca por nome de marcas e fornecedores no FTS5, com a mesma tokenização dos produtos
+    # (sem acentos, por prefixo de palavra) e mantida por triggers.
+    for table in ("marcas", "fornecedores"):
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                nome,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3 4'
+            )
+        """)
+        cursor.execute(f"DELETE FROM {table}_fts")
+        cursor.execute(f"INSERT INTO {table}_fts (rowid, nome) SELECT id, nome FROM {table}")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_busca_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts (rowid, nome) VALUES (NEW.id, NEW.nome);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_busca_ad AFTER DELETE ON {table} BEGIN
+                DELETE FROM {table}_fts WHERE rowid = OLD.id;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_busca_au AFTER UPDATE OF nome ON {table} BEGIN
+                UPDATE {table}_fts SET nome = NEW.nome WHERE rowid = NEW.id;
+            END
+        """)
+
+
+def _m007_indices_paginacao(cursor):
+    # Ordenações das listagens paginadas: (chave de ordenação, id)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos(nome_produto)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contas_a_pagar_vencimento ON contas_a_pagar(data_vencimento)")
+
+
+def _m008_indices_ordenacao(cursor):
+    # Índices para as colunas ordenáveis das listagens (as expressões IFNULL são as mesmas
+    # usadas no ORDER BY, para que o planejador possa percorrer o índice)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_produtos_codigo_ordem ON produtos(IFNULL(codigo_produto, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_produtos_quantidade ON produtos(quantidade_atual)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_produtos_localizacao_ordem ON produtos(IFNULL(localizacao, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fornecedores_contato_ordem ON fornecedores(IFNULL(contato, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fornecedores_telefone_ordem ON fornecedores(IFNULL(telefone, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fornecedores_email_ordem ON fornecedores(IFNULL(email, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fornecedores_endereco_ordem ON fornecedores(IFNULL(endereco, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_compras_total_final ON compras(total_final)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_compras_status_pagamento ON compras(status_pagamento)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contas_a_pagar_valor ON contas_a_pagar(valor)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contas_a_pagar_valor_pago ON contas_a_pagar(valor_pago)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_contas_a_pagar_status ON contas_a_pagar(status)")
+
+
+def _m009_estatisticas_estoque(cursor):
+    # Contadores do painel "Estatísticas do Estoque" numa única linha, mantida por triggers.
+    # O estoque baixo usa o limite fixo de 10 (a migração 10 passa ao mínimo de cada produto).
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estatisticas_estoque (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_produtos INTEGER NOT NULL,
+            produtos_estoque_baixo INTEGER NOT NULL,
+            total_marcas INTEGER NOT NULL
+        )
+    """)
+    # Contadores sempre recalculados, mesmo que a linha já exista
+    cursor.execute("""
+        INSERT INTO estatisticas_estoque (id, total_produtos, produtos_estoque_baixo, total_marcas)
+        SELECT 1,
+               (SELECT COUNT(*) FROM produtos),
+               (SELECT COUNT(*) FROM produtos WHERE quantidade_atual <= 10),
+               (SELECT COUNT(*) FROM marcas)
+        WHERE true
+        ON CONFLICT (id) DO UPDATE SET
+            total_produtos = excluded.total_produtos,
+            produtos_estoque_baixo = excluded.produtos_estoque_baixo,
+            total_marcas = excluded.total_marcas
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estatisticas_produtos_ai AFTER INSERT ON produtos BEGIN
+            UPDATE estatisticas_estoque
+            SET total_produtos = total_produtos + 1,
+                produtos_estoque_baixo = produtos_estoque_baixo + (NEW.quantidade_atual <= 10)
+            WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estatisticas_produtos_ad AFTER DELETE ON produtos BEGIN
+            UPDATE estatisticas_estoque
+            SET total_produtos = total_produtos - 1,
+                produtos_estoque_baixo = produtos_estoque_baixo - (OLD.quantidade_atual <= 10)
+            WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estatisticas_produtos_au AFTER UPDATE OF quantidade_atual ON produtos
+        WHEN NEW.quantidade_atual IS NOT OLD.quantidade_atual BEGIN
+            UPDATE estatisticas_estoque
+            SET produtos_estoque_baixo = produtos_estoque_baixo
+                + (NEW.quantidade_atual <= 10) - (OLD.quantidade_atual <= 10)
+            WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estatisticas_marcas_ai AFTER INSERT ON marcas BEGIN
+            UPDATE estatisticas_estoque SET total_marcas = total_marcas + 1 WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estatisticas_marcas_ad AFTER DELETE ON marcas BEGIN
+            UPDATE estatisticas_estoque SET total_marcas = total_marcas - 1 WHERE id = 1;
+        END
+    """)
+
+
+def _m010_estoque_minimo(cursor):
+    # Estoque mínimo por produto. Os produtos existentes recebem 10, o antigo limite fixo.
+    cursor.execute("PRAGMA table_info(produtos)")
+    if 'estoque_minimo' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE produtos ADD COLUMN estoque_minimo INTEGER NOT NULL DEFAULT 10")
+
+    # Índice parcial com apenas os produtos no mínimo ou abaixo dele, ordenado pela falta:
+    # listar e contar o estoque baixo vira uma leitura desse índice, sem varrer produtos.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_produtos_estoque_baixo
+        ON produtos(quantidade_atual - estoque_minimo, id)
+        WHERE quantidade_atual <= estoque_minimo
+    """)
+
+    # Feed de alertas: uma linha cada vez que um produto cruza o próprio mínimo
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alertas_estoque (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL, -- 'Abaixo do mínimo' ou 'Reposto'
+            quantidade INTEGER NOT NULL,
+            estoque_minimo INTEGER NOT NULL,
+            data_hora TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+            FOREIGN KEY (produto_id) REFERENCES produtos(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_alertas_estoque_produto ON alertas_estoque(produto_id)")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS alertas_estoque_ai AFTER INSERT ON produtos
+        WHEN NEW.quantidade_atual <= NEW.estoque_minimo BEGIN
+            INSERT INTO alertas_estoque (produto_id, tipo, quantidade, estoque_minimo)
+            VALUES (NEW.id, 'Abaixo do mínimo', NEW.quantidade_atual, NEW.estoque_minimo);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS alertas_estoque_au AFTER UPDATE OF quantidade_atual, estoque_minimo ON produtos
+        WHEN (NEW.quantidade_atual <= NEW.estoque_minimo) <> (OLD.quantidade_atual <= OLD.estoque_minimo) BEGIN
+            INSERT INTO alertas_estoque (produto_id, tipo, quantidade, estoque_minimo)
+            VALUES (NEW.id, CASE WHEN NEW.quantidade_atual <= NEW.estoque_minimo THEN 'Abaixo do mínimo' ELSE 'Reposto' END,
+                    NEW.quantidade_atual, NEW.estoque_minimo);
+        END
+    """)
+
+    # Contadores do painel: o estoque baixo passa a comparar cada produto com o próprio mínimo
+    for trigger in ("estatisticas_produtos_ai", "estatisticas_produtos_ad", "estatisticas_produtos_au"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("""
+        UPDATE estatisticas_estoque
+        SET produtos_estoque_baixo = (SELECT COUNT(*) FROM produtos WHERE quantidade_atual <= estoque_minimo)
+        WHERE id = 1
+    """)
+    cursor.execute("""
+        CREATE TRIGGER estatisticas_produtos_ai AFTER INSERT ON produtos BEGIN
+            UPDATE estatisticas_estoque
+            SET total_produtos = total_produtos + 1,
+                produtos_estoque_baixo = produtos_estoque_baixo + (NEW.quantidade_atual <= NEW.estoque_minimo)
+            WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER estatisticas_produtos_ad AFTER DELETE ON produtos BEGIN
+            UPDATE estatisticas_estoque
+            SET total_produtos = total_produtos - 1,
+                produtos_estoque_baixo = produtos_estoque_baixo - (OLD.quantidade_atual <= OLD.estoque_minimo)
+            WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER estatisticas_produtos_au AFTER UPDATE OF quantidade_atual, estoque_minimo ON produtos
+        WHEN (NEW.quantidade_atual <= NEW.estoque_minimo) <> (OLD.quantidade_atual <= OLD.estoque_minimo) BEGIN
+            UPDATE estatisticas_estoque
+            SET produtos_estoque_baixo = produtos_estoque_baixo
+                + (NEW.quantidade_atual <= NEW.estoque_minimo) - (OLD.quantidade_atual <= OLD.estoque_minimo)
+            WHERE id = 1;
+        END
+    """)
+
+
+def _m011_fechamentos_estoque(cursor):
+    # Fechamentos de estoque: saldo de cada produto no fim de um dia de referência
+    # (normalmente o último dia do mês). O saldo numa data passada é o fechamento
+    # anterior mais próximo somado às movimentações posteriores a ele.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fechamentos_estoque (
+            data_referencia TEXT PRIMARY KEY, -- 'AAAA-MM-DD', saldo no fim do dia
+            data_hora_criacao TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS saldos_estoque (
+            data_referencia TEXT NOT NULL,
+            produto_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            PRIMARY KEY (data_referencia, produto_id),
+            FOREIGN KEY (data_referencia) REFERENCES fechamentos_estoque(data_referencia) ON DELETE CASCADE,
+            FOREIGN KEY (produto_id) REFERENCES produtos(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_saldos_estoque_produto ON saldos_estoque(produto_id)")
+    # Movimentações de um intervalo de datas, de todos os produtos (saldo entre fechamentos)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_movimentacoes_data ON movimentacoes(data_hora)")
+    # Uma movimentação lançada com data anterior a um fechamento invalida esse fechamento e os
+    # seguintes; eles são refeitos por ensure_monthly_snapshots. A busca é pela chave primária.
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS fechamentos_estoque_movimentacao_ai AFTER INSERT ON movimentacoes BEGIN
+            DELETE FROM fechamentos_estoque WHERE data_referencia >= substr(NEW.data_hora, 1, 10);
+        END
+    """)
+
+
+def _m012_indice_cobrindo_movimentacoes(cursor):
+    # Substitui idx_movimentacoes_produto_data por um índice que também cobre tipo e quantidade:
+    # o saldo por produto (conciliação, histórico de um produto) é lido só do índice, sem
+    # visitar a tabela, e o número de índices atualizados por movimentação não muda.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_movimentacoes_produto_saldo
+        ON movimentacoes(produto_id, data_hora, tipo, quantidade)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_movimentacoes_produto_data")
+
+
+# Recalcula o resumo diário inteiro a partir do livro de movimentações (uma passada agrupada)
+REBUILD_MOVIMENTACOES_DIARIAS = [
+    "DELETE FROM movimentacoes_diarias",
+    """
+    INSERT INTO movimentacoes_diarias (produto_id, dia, entradas, saidas, movimentacoes)
+    SELECT produto_id, substr(data_hora, 1, 10),
+           SUM(CASE tipo WHEN 'Entrada' THEN quantidade ELSE 0 END),
+           SUM(CASE tipo WHEN 'Entrada' THEN 0 ELSE quantidade END),
+           COUNT(*)
+    FROM movimentacoes
+    WHERE produto_id IN (SELECT id FROM produtos) -- Movimentações órfãs (produto já excluído) ficam de fora
+    GROUP BY produto_id, substr(data_hora, 1, 10)
+    """,
+]
+
+def _m013_movimentacoes_diarias(cursor):
+    # Resumo diário por produto (entradas, saídas e número de movimentações), mantido a cada
+    # movimentação por triggers. Relatórios e gráficos leem este resumo, não o livro bruto.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS movimentacoes_diarias (
+            produto_id INTEGER NOT NULL,
+            dia TEXT NOT NULL, -- 'AAAA-MM-DD'
+            entradas INTEGER NOT NULL DEFAULT 0,
+            saidas INTEGER NOT NULL DEFAULT 0,
+            movimentacoes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, produto_id),
+            FOREIGN KEY (produto_id) REFERENCES produtos(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    # A chave primária começa pelo dia: consultas por período de todos os produtos (mais
+    # movimentados do mês, saídas por semana) leem um trecho contínuo da própria tabela.
+    # O histórico de um produto usa o índice abaixo (poucas linhas por produto).
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_movimentacoes_diarias_produto ON movimentacoes_diarias(produto_id, dia)")
+    # Movimentações de produtos inexistentes (gravadas com as chaves estrangeiras desligadas)
+    # ficam fora do resumo, que tem FK para produtos
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS movimentacoes_diarias_ai AFTER INSERT ON movimentacoes
+        WHEN NEW.produto_id IN (SELECT id FROM produtos) BEGIN
+            INSERT INTO movimentacoes_diarias (produto_id, dia, entradas, saidas, movimentacoes)
+            VALUES (NEW.produto_id, substr(NEW.data_hora, 1, 10),
+                    CASE NEW.tipo WHEN 'Entrada' THEN NEW.quantidade ELSE 0 END,
+                    CASE NEW.tipo WHEN 'Entrada' THEN 0 ELSE NEW.quantidade END,
+                    1)
+            ON CONFLICT (dia, produto_id) DO UPDATE SET
+                entradas = entradas + excluded.entradas,
+                saidas = saidas + excluded.saidas,
+                movimentacoes = movimentacoes + 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS movimentacoes_diarias_ad AFTER DELETE ON movimentacoes
+        WHEN OLD.produto_id IS NOT NULL BEGIN
+            UPDATE movimentacoes_diarias SET
+                entradas = entradas - CASE OLD.tipo WHEN 'Entrada' THEN OLD.quantidade ELSE 0 END,
+                saidas = saidas - CASE OLD.tipo WHEN 'Entrada' THEN 0 ELSE OLD.quantidade END,
+                movimentacoes = movimentacoes - 1
+            WHERE dia = substr(OLD.data_hora, 1, 10) AND produto_id = OLD.produto_id;
+            DELETE FROM movimentacoes_diarias
+            WHERE dia = substr(OLD.data_hora, 1, 10) AND produto_id = OLD.produto_id AND movimentacoes <= 0;
+        END
+    """)
+    for statement in REBUILD_MOVIMENTACOES_DIARIAS:
+        cursor.execute(statement)
+
+
+def _m014_versao_estoque_baixo(cursor):
+    # Versão da lista de estoque baixo: incrementada a cada escrita num produto que está (ou
+    # estava) no mínimo ou abaixo dele. A página "Estoque Baixo" compara a versão a cada
+    # consulta periódica e recarrega quando ela muda, inclusive quando só a quantidade de um
+    # item já listado mudou ou quando um item foi reposto.
+    cursor.execute("PRAGMA table_info(estatisticas_estoque)")
+    if 'versao_estoque_baixo' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE estatisticas_estoque ADD COLUMN versao_estoque_baixo INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estoque_baixo_versao_ai AFTER INSERT ON produtos
+        WHEN NEW.quantidade_atual <= NEW.estoque_minimo BEGIN
+            UPDATE estatisticas_estoque SET versao_estoque_baixo = versao_estoque_baixo + 1 WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estoque_baixo_versao_ad AFTER DELETE ON produtos
+        WHEN OLD.quantidade_atual <= OLD.estoque_minimo BEGIN
+            UPDATE estatisticas_estoque SET versao_estoque_baixo = versao_estoque_baixo + 1 WHERE id = 1;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estoque_baixo_versao_au AFTER UPDATE ON produtos
+        WHEN NEW.quantidade_atual <= NEW.estoque_minimo OR OLD.quantidade_atual <= OLD.estoque_minimo BEGIN
+            UPDATE estatisticas_estoque SET versao_estoque_baixo = versao_estoque_baixo + 1 WHERE id = 1;
+        END
+    """)
+
+
+MIGRATIONS = [
+    (1, "Tabelas iniciais", _m001_tabelas_iniciais),
+    (2, "Coluna status_pagamento em compras", _m002_status_pagamento_compras),
+    (3, "Índices para chaves estrangeiras e colunas de filtro", _m003_indices_chaves_e_filtros),
+    (4, "Marcas iniciais", _m004_marcas_iniciais),
+    (5, "Busca textual (FTS5) de produtos", _m005_busca_textual_produtos),
+    (6, "Busca textual (FTS5) de marcas e fornecedores", _m006_busca_textual_marcas_fornecedores),
+    (7, "Índices para paginação por chave", _m007_indices_paginacao),
+    (8, "Índices para ordenação das listagens", _m008_indices_ordenacao),
+    (9, "Contadores do painel mantidos por triggers", _m009_estatisticas_estoque),
+    (10, "Estoque mínimo por produto e alertas de estoque baixo", _m010_estoque_minimo),
+    (11, "Fechamentos mensais de estoque", _m011_fechamentos_estoque),
+    (12, "Índice de movimentações que cobre o saldo por produto", _m012_indice_cobrindo_movimentacoes),
+    (13, "Resumo diário de movimentações por produto", _m013_movimentacoes_diarias),
+    (14, "Versão da lista de estoque baixo mantida por triggers", _m014_versao_estoque_baixo),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_schema_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TEXT NOT NULL
+        )
+    """)
+
+
+def is_schema_current(conn):
+    """
+    Verificação da inicialização rápida: uma única leitura do cabeçalho do banco
+    (PRAGMA user_version, espelho da última versão aplicada).
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0] == LATEST_VERSION
+
+
+def get_schema_version(conn):
+    """
+    Retorna a versão atual do esquema (0 para um banco sem migrações aplicadas).
+    """
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0 # Tabela schema_version ainda não existe
+    return row[0] or 0
+
+
+def apply_migrations(conn, logger, target_version=None):
+    """
+    Aplica, em ordem, as migrações pendentes até target_version (ou até a mais recente).
+    Cada migração roda em sua própria transação. Retorna o número de migrações aplicadas.
+    """
+    if target_version is None:
+        target_version = LATEST_VERSION
+
+    cursor = conn.cursor()
+    _ensure_schema_version_table(cursor)
+    conn.commit()
+
+    current_version = get_schema_version(conn)
+    applied = 0
+    for version, descricao, migration in MIGRATIONS:
+        if version <= current_version or version > target_version:
+            continue
+        try:
+            cursor.execute("BEGIN TRANSACTION")
+            migration(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, descricao, aplicada_em) VALUES (?, ?, ?)",
+                (version, descricao, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            logger.critical(f"Falha ao aplicar migração {version} ('{descricao}').", exc_info=True)
+            raise
+        applied += 1
+        current_version = version
+        logger.info(f"Migração {version} aplicada: {descricao}.")
+
+    # Mantém o cabeçalho sincronizado mesmo quando não havia migração pendente
+    cursor.execute(f"PRAGMA user_version = {int(current_version)}")
+    conn.commit()
+    return applied
@@ -0,0 +1,91 @@
+import functools
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    Cache LRU de resultados de consultas, com invalidação por tabela. Cada entrada guarda a
+    versão das tabelas de que depende; um método de escrita incrementa a versão da tabela
+    (bump) e as entradas gravadas antes deixam de valer sem precisar ser procuradas.
+    """
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # chave -> (versões das tabelas, resultado)
+        self._versions = {}
+        self._lock = threading.Lock() # Usado pela thread da UI e pelos trabalhadores do QueryRunner
+        self.stats = {"acertos": 0, "faltas": 0, "invalidacoes": 0}
+
+    def _table_versions(self, tables):
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def get_or_load(self, key, tables, load):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == self._table_versions(tables):
+                self._entries.move_to_end(key)
+                self.stats["acertos"] += 1
+                return entry[1]
+            self.stats["faltas"] += 1
+            versions = self._table_versions(tables)
+        # A consulta roda fora do lock; se uma escrita ocorrer no meio, as versões lidas antes
+        # já estão desatualizadas e a entrada gravada é descartada na próxima leitura.
+        result = load()
+        with self._lock:
+            self._entries[key] = (versions, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def bump(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            self.stats["invalidacoes"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stats["invalidacoes"] += 1
+
+    def log_stats(self, logger):
+        total = self.stats["acertos"] + self.stats["faltas"]
+        taxa = self.stats["acertos"] / total * 100 if total else 0.0
+        logger.info(
+            f"Cache de consultas: {self.stats['acertos']} acertos, {self.stats['faltas']} faltas "
+            f"({taxa:.0f}% de acerto), {self.stats['invalidacoes']} invalidações, {len(self._entries)} entradas."
+        )
+
+
+def cached_query(*tables):
+    """
+    Decora um método de leitura do DatabaseManager: o resultado é guardado em
+    self.query_cache, com chave (método, argumentos), e depende das tabelas informadas.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            self._check_external_writes()
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            result = self.query_cache.get_or_load(key, tables, lambda: method(self, *args, **kwargs))
+            # Cópia rasa: quem chama pode alterar a lista sem afetar a entrada do cache
+            return list(result) if isinstance(result, list) else result
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables):
+    """
+    Decora um método de escrita do DatabaseManager: ao terminar (com sucesso ou não),
+    incrementa a versão das tabelas informadas, descartando as consultas que dependem delas.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.query_cache.bump(*tables)
+        return wrapper
+    return decorator
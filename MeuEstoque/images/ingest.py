@@ -0,0 +1,172 @@
+import functools
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt6.QtCore import QBuffer, QCoreApplication, QIODevice, QObject, Qt, pyqtSignal
+from PyQt6.QtGui import QImageReader
+
+from MeuEstoque.config import IMAGE_INGEST_MAX_SIDE, IMAGE_INGEST_JPEG_QUALITY, IMAGE_INGEST_WORKERS
+from MeuEstoque.images.thumbnail_cache import flatten_alpha
+from MeuEstoque.logger import get_logger
+
+
+def ingest_image(source_path, destination_dir, max_side=IMAGE_INGEST_MAX_SIDE, quality=IMAGE_INGEST_JPEG_QUALITY):
+    """
+    Grava em `destination_dir` uma cópia de `source_path` pronta para o catálogo: orientação
+    EXIF aplicada, lado maior limitado a `max_side` e recodificada em JPEG. O nome do arquivo
+    é o hash do conteúdo gravado, então nomes iguais de origens diferentes não se sobrescrevem.
+    Roda nos processos do ImageIngestPool. Retorna (caminho gravado, bytes da origem, bytes gravados).
+    """
+    reader = QImageReader(source_path)
+    reader.setAutoTransform(True) # Fotos de celular vêm "deitadas" com a rotação só no EXIF
+    original_size = reader.size()
+    if original_size.isValid() and max(original_size.width(), original_size.height()) > max_side:
+        # Reduz já na decodificação, sem carregar a foto inteira na memória
+        reader.setScaledSize(original_size.scaled(max_side, max_side, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(f"imagem ilegível ({reader.errorString()})")
+    image = flatten_alpha(image)
+
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    if not image.save(buffer, "JPEG", quality):
+        raise ValueError("falha ao codificar JPEG")
+    data = bytes(buffer.data())
+
+    os.makedirs(destination_dir, exist_ok=True)
+    destination = os.path.abspath(os.path.join(destination_dir, f"{hashlib.sha1(data).hexdigest()[:20]}.jpg"))
+    if not os.path.exists(destination):
+        temp_path = f"{destination}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as target:
+            target.write(data)
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temp_path, destination) # O arquivo só aparece no destino completo
+    return destination, os.path.getsize(source_path), len(data)
+
+
+class ImageIngestPool(QObject):
+    """
+    ProcessPoolExecutor compartilhado pelas ingestões, criado na primeira imagem e encerrado
+    por shutdown() no fechamento da aplicação. Pertence à aplicação, não aos diálogos: o
+    retorno de cada imagem (emitido da thread do executor) sempre encontra este objeto vivo,
+    e `item_done` chega aos diálogos por conexão enfileirada, na thread da interface.
+    """
+    item_done = pyqtSignal(int, int, object, object) # lote, índice, resultado, erro
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.logger = get_logger(self.__class__.__name__)
+        self._executor = None
+        self._last_batch = 0
+
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(QCoreApplication.instance())
+        return cls._instance
+
+    def new_batch(self):
+        self._last_batch += 1
+        return self._last_batch
+
+    def submit(self, batch, index, source_path, destination_dir):
+        if self._executor is None:
+            workers = IMAGE_INGEST_WORKERS or os.cpu_count() or 1
+            # "spawn": um fork herdaria as threads do Qt do processo da interface. Os processos
+            # são iniciados sob demanda e reaproveitados pelas ingestões seguintes.
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            self.logger.info(f"Pool de ingestão de imagens criado ({workers} processos no máximo).")
+        future = self._executor.submit(ingest_image, source_path, destination_dir)
+        future.add_done_callback(functools.partial(self._emit_item_done, batch, index))
+
+    def _emit_item_done(self, batch, index, future):
+        try:
+            result, error = future.result(), None
+        except Exception as e:
+            result, error = None, str(e)
+        try:
+            self.item_done.emit(batch, index, result, error)
+        except RuntimeError:
+            pass # Aplicação já encerrada (objeto Qt destruído); não há quem receba o resultado
+
+    @classmethod
+    def shutdown(cls):
+        # Descarta as imagens ainda na fila e aguarda as que estão sendo gravadas
+        pool = cls._instance
+        if pool is not None and pool._executor is not None:
+            pool._executor.shutdown(wait=True, cancel_futures=True)
+            pool._executor = None
+
+
+class ImageIngestor(QObject):
+    """
+    Processa imagens anexadas em paralelo no ImageIngestPool (ingest_image), sem travar
+    a interface. `progress` é emitido a cada imagem concluída; `finished` entrega, na ordem
+    de envio, os caminhos gravados e a lista de (origem, erro) das que falharam. detach()
+    deve ser chamado quando o dono (diálogo) fecha.
+    """
+    progress = pyqtSignal(int, int) # concluídas, total
+    finished = pyqtSignal(list, list) # caminhos gravados, [(origem, mensagem de erro)]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.logger = get_logger(self.__class__.__name__)
+        self.pool = ImageIngestPool.instance()
+        self._batch = None
+        self._sources = []
+        self._results = []
+        self._errors = []
+        self._done = 0
+
+    def start(self, source_paths, destination_dir):
+        self._sources = list(source_paths)
+        self._results = [None] * len(self._sources)
+        self._errors = []
+        self._done = 0
+        if not self._sources:
+            self.finished.emit([], [])
+            return
+
+        self._batch = self.pool.new_batch()
+        # Enfileirada: o sinal é emitido da thread do executor
+        self.pool.item_done.connect(self._on_item_done, Qt.ConnectionType.QueuedConnection)
+        for index, path in enumerate(self._sources):
+            self.pool.submit(self._batch, index, path, destination_dir)
+        self.logger.info(f"Processando {len(self._sources)} imagens (lote {self._batch}).")
+
+    def detach(self):
+        # Resultados que ainda chegarem não são mais entregues a este objeto
+        if self._batch is not None:
+            self.pool.item_done.disconnect(self._on_item_done)
+            self._batch = None
+
+    def _on_item_done(self, batch, index, result, error):
+        if batch != self._batch:
+            return # Lote de outro diálogo
+        if error is not None:
+            self._errors.append((self._sources[index], error))
+            self.logger.error(f"Erro ao processar imagem '{self._sources[index]}': {error}")
+        else:
+            self._results[index] = result
+        self._done += 1
+        self.progress.emit(self._done, len(self._sources))
+        if self._done < len(self._sources):
+            return
+
+        self.detach()
+        written = [result for result in self._results if result is not None]
+        bytes_in = sum(result[1] for result in written)
+        bytes_out = sum(result[2] for result in written)
+        self.logger.info(
+            f"Imagens processadas: {len(written)} gravadas, {len(self._errors)} com erro; "
+            f"{bytes_in / 1024:.0f} KB nas originais, {bytes_out / 1024:.0f} KB gravados."
+        )
+        self.finished.emit([result[0] for result in written], self._errors)
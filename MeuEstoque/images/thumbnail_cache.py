@@ -0,0 +1,187 @@
+import hashlib
+import os
+import threading
+
+from PyQt6.QtCore import QCoreApplication, QSize, QThread, Qt
+from PyQt6.QtGui import QColor, QImage, QImageReader, QPainter, QPixmap, QPixmapCache
+
+from MeuEstoque.config import THUMBNAIL_TIERS, THUMBNAIL_JPEG_QUALITY, PIXMAP_CACHE_LIMIT_KB
+from MeuEstoque.logger import get_logger
+
+PRODUCT_IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "product_images")
+THUMBNAILS_DIR = os.path.join(PRODUCT_IMAGES_DIR, ".miniaturas")
+
+
+def tier_for(size):
+    """
+    Menor tamanho de miniatura (THUMBNAIL_TIERS) cujo lado cobre `size` (QSize ou int);
+    acima do maior tamanho, usa o maior.
+    """
+    side = max(size.width(), size.height()) if isinstance(size, QSize) else int(size)
+    for tier in THUMBNAIL_TIERS:
+        if tier >= side:
+            return tier
+    return THUMBNAIL_TIERS[-1]
+
+
+def flatten_alpha(image):
+    """
+    Imagem pronta para JPEG, que não tem transparência: compõe a imagem sobre fundo branco
+    (e não preto). Sem canal alfa, devolve a própria imagem.
+    """
+    if not image.hasAlphaChannel():
+        return image
+    background = QImage(image.size(), QImage.Format.Format_RGB32)
+    background.fill(QColor("white"))
+    painter = QPainter(background)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return background
+
+
+class ThumbnailCache:
+    """
+    Miniaturas das imagens de produtos, em disco (product_images/.miniaturas) e em memória
+    (QPixmapCache). As miniaturas são identificadas pelo hash do conteúdo do original, lido
+    de novo só quando o arquivo muda (caminho, mtime e tamanho). Na primeira vez, o original
+    é decodificado uma única vez, já reduzido, e todos os tamanhos são gravados.
+    """
+    # Contadores de onde vieram as miniaturas, para a instrumentação
+    stats = {"memoria": 0, "disco": 0, "originais_decodificados": 0}
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, base_dir=THUMBNAILS_DIR):
+        self.base_dir = base_dir
+        self.logger = get_logger(self.__class__.__name__)
+        self._hashes = {} # (caminho, mtime_ns, tamanho) -> hash do conteúdo
+        self._generating = {} # hash -> Lock: um original não é decodificado por duas threads ao mesmo tempo
+        self._lock = threading.Lock()
+
+    @classmethod
+    def initialize(cls):
+        """
+        Cria a instância compartilhada e define o limite do QPixmapCache. Chamado uma vez na
+        inicialização (app.py), na thread da interface; instance() nunca cria a instância.
+        """
+        app = QCoreApplication.instance()
+        if app is None or QThread.currentThread() is not app.thread():
+            raise RuntimeError("ThumbnailCache.initialize() deve ser chamado na thread da interface.")
+        with cls._instance_lock:
+            if cls._instance is None:
+                QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT_KB)
+                cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            raise RuntimeError("ThumbnailCache não inicializado; chame ThumbnailCache.initialize() na inicialização.")
+        return cls._instance
+
+    def content_key(self, path):
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._hashes.get(memo_key)
+        if digest is None:
+            sha1 = hashlib.sha1()
+            with open(path, "rb") as source:
+                for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                    sha1.update(chunk)
+            digest = sha1.hexdigest()
+            with self._lock:
+                self._hashes[memo_key] = digest
+        return digest
+
+    def _count(self, key):
+        # Os contadores são incrementados também pelas threads que geram miniaturas
+        with self._lock:
+            ThumbnailCache.stats[key] += 1
+
+    def _tier_path(self, digest, tier):
+        return os.path.join(self.base_dir, digest[:2], f"{digest}_{tier}.jpg")
+
+    def thumbnail_path(self, path, size):
+        """
+        Caminho da miniatura de `path` no tamanho que cobre `size`, gerando as miniaturas
+        que faltarem. Pode ser chamado de qualquer thread. Retorna None se a imagem não pode
+        ser lida.
+        """
+        try:
+            digest = self.content_key(path)
+        except OSError as e:
+            self.logger.warning(f"Imagem não encontrada para miniatura '{path}': {e}")
+            return None
+        tier_path = self._tier_path(digest, tier_for(size))
+        if not os.path.exists(tier_path):
+            self._generate(path, digest)
+        return tier_path if os.path.exists(tier_path) else None
+
+    def _generate(self, path, digest):
+        with self._lock:
+            lock = self._generating.setdefault(digest, threading.Lock())
+        with lock:
+            missing = [tier for tier in THUMBNAIL_TIERS if not os.path.exists(self._tier_path(digest, tier))]
+            if not missing:
+                return # Outra thread gerou enquanto esta esperava
+
+            reader = QImageReader(path)
+            reader.setAutoTransform(True) # Aplica a orientação EXIF das fotos de celular
+            largest = max(missing)
+            original_size = reader.size()
+            if original_size.isValid() and max(original_size.width(), original_size.height()) > largest:
+                # Decodifica já no maior tamanho necessário (JPEG reduz na própria decodificação)
+                reader.setScaledSize(original_size.scaled(largest, largest, Qt.AspectRatioMode.KeepAspectRatio))
+            image = reader.read()
+            self._count("originais_decodificados")
+            if image.isNull():
+                self.logger.error(f"Erro ao decodificar imagem '{path}': {reader.errorString()}")
+                return
+            image = flatten_alpha(image)
+
+            os.makedirs(os.path.dirname(self._tier_path(digest, largest)), exist_ok=True)
+            for tier in sorted(missing, reverse=True):
+                if max(image.width(), image.height()) > tier:
+                    image = image.scaled(tier, tier, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                target = self._tier_path(digest, tier)
+                temp_path = f"{target}.{os.getpid()}.tmp"
+                if image.save(temp_path, "JPEG", THUMBNAIL_JPEG_QUALITY):
+                    os.replace(temp_path, target) # Leitores nunca veem um arquivo pela metade
+                else:
+                    self.logger.error(f"Erro ao gravar miniatura '{target}'.")
+            self.logger.debug(f"Miniaturas geradas para '{path}': {sorted(missing)}.")
+
+    def pixmap(self, path, size):
+        """
+        QPixmap da miniatura que cobre `size` (da memória, do disco ou gerada agora).
+        Somente na thread da interface. Retorna None se a imagem não pode ser lida.
+        """
+        try:
+            digest = self.content_key(path)
+        except OSError as e:
+            self.logger.warning(f"Imagem não encontrada '{path}': {e}")
+            return None
+        cache_key = f"{digest}_{tier_for(size)}"
+        pixmap = QPixmapCache.find(cache_key)
+        if pixmap is not None and not pixmap.isNull():
+            self._count("memoria")
+            return pixmap
+
+        tier_path = self.thumbnail_path(path, size)
+        if tier_path is None:
+            return None
+        pixmap = QPixmap(tier_path)
+        if pixmap.isNull():
+            self.logger.error(f"Erro ao carregar miniatura '{tier_path}'.")
+            return None
+        self._count("disco")
+        QPixmapCache.insert(cache_key, pixmap)
+        return pixmap
+
+    @classmethod
+    def log_stats(cls, logger):
+        logger.info(
+            f"Miniaturas: {cls.stats['memoria']} da memória, {cls.stats['disco']} do disco, "
+            f"{cls.stats['originais_decodificados']} originais decodificados."
+        )
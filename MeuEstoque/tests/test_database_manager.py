@@ -1,7 +1,11 @@
 import unittest
 import os
 import sqlite3
+import threading
+from datetime import date
 from MeuEstoque.database.database_manager import DatabaseManager
+from MeuEstoque.database.migrations import LATEST_VERSION, apply_migrations, get_schema_version
+from MeuEstoque.database.maintenance import purge_orphans, reconcile_ledger
 
 class TestDatabaseManager(unittest.TestCase):
     def setUp(self):
@@ -55,6 +59,14 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertEqual(len(produtos), 1)
         self.assertEqual(produtos[0][1], "Produto Teste")
 
+    def test_add_produto_returns_product_id(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Sem Saldo", "COD010", "", marca_id, 0, "")
+        # Com saldo inicial a movimentação é gravada depois do produto; o ID retornado ainda é o dele
+        produto_id = self.db_manager.add_produto("Com Saldo", "COD011", "", marca_id, 8, "")
+        self.assertEqual(self.db_manager.get_produto_by_id(produto_id)[1], "Com Saldo")
+        self.assertEqual(self.db_manager.get_produto_by_id(produto_id)[5], 8)
+
     def test_update_produto_quantity_entrada(self):
         self.db_manager.add_marca("Marca Qty")
         marcas = self.db_manager.get_marcas()
@@ -124,5 +136,731 @@ class TestDatabaseManager(unittest.TestCase):
         # 6. Verify the parent directory is also removed if it's empty
         self.assertFalse(os.path.exists(image_dir))
 
+    def test_add_product_images_after_ingestion(self):
+        self.db_manager.add_marca("Marca Imagem")
+        marca_id = self.db_manager.get_marcas()[0][0]
+        produto_id = self.db_manager.add_produto("Produto", "IMG002", "", marca_id, 5, "")
+        self.assertTrue(self.db_manager.add_product_images(produto_id, ["/img/a.jpg", "/img/b.jpg"]))
+        # A mesma foto anexada de novo (mesmo nome por conteúdo) não duplica o registro
+        self.assertTrue(self.db_manager.add_product_images(produto_id, ["/img/b.jpg", "/img/c.jpg", "/img/c.jpg"]))
+        self.assertEqual(sorted(self.db_manager.get_product_images(produto_id)), ["/img/a.jpg", "/img/b.jpg", "/img/c.jpg"])
+
+        # Produto inexistente: a transação inteira é desfeita
+        self.assertFalse(self.db_manager.add_product_images(produto_id + 99, ["/img/d.jpg"]))
+        self.assertEqual(len(self.db_manager.get_product_images(produto_id)), 3)
+
+    def test_migrations_register_schema_version(self):
+        self.assertEqual(get_schema_version(self.db_manager.conn), LATEST_VERSION)
+        # Reabrir o banco não deve reaplicar migrações
+        self.db_manager.close()
+        self.db_manager = DatabaseManager(self.db_name)
+        self.db_manager.cursor.execute("SELECT COUNT(*) FROM schema_version")
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], LATEST_VERSION)
+
+    def test_migrations_create_foreign_key_indexes(self):
+        self.db_manager.cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT tipo, quantidade, data_hora, observacao FROM movimentacoes WHERE produto_id = ? ORDER BY data_hora DESC",
+            (1,)
+        )
+        plan = " ".join(row[3] for row in self.db_manager.cursor.fetchall())
+        self.assertIn("idx_movimentacoes_produto_saldo", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_migrations_upgrade_legacy_database(self):
+        self.db_manager.close()
+        os.remove(self.db_name)
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("CREATE TABLE fornecedores (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL UNIQUE, contato TEXT, telefone TEXT, email TEXT, endereco TEXT)")
+        conn.execute("CREATE TABLE compras (id INTEGER PRIMARY KEY AUTOINCREMENT, fornecedor_id INTEGER NOT NULL, data_emissao TEXT NOT NULL, data_entrega TEXT, prazo_entrega TEXT, subtotal REAL NOT NULL DEFAULT 0.0, desconto REAL NOT NULL DEFAULT 0.0, frete REAL NOT NULL DEFAULT 0.0, total_final REAL NOT NULL DEFAULT 0.0, observacao TEXT)")
+        conn.commit()
+        conn.close()
+
+        self.db_manager = DatabaseManager(self.db_name)
+        self.db_manager.cursor.execute("PRAGMA table_info(compras)")
+        columns = [col[1] for col in self.db_manager.cursor.fetchall()]
+        self.assertIn("status_pagamento", columns)
+        self.assertEqual(get_schema_version(self.db_manager.conn), LATEST_VERSION)
+
+    def test_warm_start_skips_ddl_and_seed_writes(self):
+        self.db_manager.close()
+        self.db_manager = DatabaseManager(self.db_name)
+        self.assertEqual(self.db_manager.conn.total_changes, 0)
+
+    def test_deleted_initial_brand_is_not_reseeded(self):
+        marca_id = next(m[0] for m in self.db_manager.get_marcas() if m[1] == "Fiat")
+        self.assertTrue(self.db_manager.delete_marca(marca_id))
+        self.db_manager.close()
+        self.db_manager = DatabaseManager(self.db_name)
+        self.assertFalse(any(m[1] == "Fiat" for m in self.db_manager.get_marcas()))
+
+    def test_storage_profile_applied_on_connect(self):
+        self.db_manager.close()
+        self.db_manager = DatabaseManager(self.db_name, storage_profile="fast-desktop")
+        self.db_manager.cursor.execute("PRAGMA journal_mode")
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], "wal")
+        self.db_manager.cursor.execute("PRAGMA synchronous")
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], 1) # NORMAL
+        self.db_manager.cursor.execute("PRAGMA temp_store")
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], 2) # MEMORY
+
+    def test_read_only_terminal_profile_rejects_writes(self):
+        self.db_manager.close()
+        self.db_manager = DatabaseManager(self.db_name, storage_profile="read-only-terminal")
+        self.assertTrue(len(self.db_manager.get_marcas()) > 0)
+        self.assertFalse(self.db_manager.add_marca("Marca Terminal"))
+
+    def test_get_produtos_full_text_search(self):
+        marca_id = next(m[0] for m in self.db_manager.get_marcas() if m[1] == "Fiat")
+        self.db_manager.add_produto("Pastilha de Freio Dianteira", "PF-1020", "Jogo com 4 peças", marca_id, 8, "Corredor 3")
+        self.db_manager.add_produto("Filtro de Óleo", "FO-330", "Filtro para motor 1.0", marca_id, 20, "Prateleira A1")
+
+        self.assertEqual([p[1] for p in self.db_manager.get_produtos("past")], ["Pastilha de Freio Dianteira"])
+        self.assertEqual([p[1] for p in self.db_manager.get_produtos("pf-10")], ["Pastilha de Freio Dianteira"])
+        self.assertEqual([p[1] for p in self.db_manager.get_produtos("oleo")], ["Filtro de Óleo"])
+        self.assertEqual(len(self.db_manager.get_produtos("fiat")), 2)
+        # O produto com o termo no nome aparece antes daquele que só o tem na descrição
+        self.assertEqual(self.db_manager.get_produtos("filtro")[0][1], "Filtro de Óleo")
+        self.assertEqual(self.db_manager.get_produtos("inexistente"), [])
+
+    def test_full_text_index_follows_product_and_brand_changes(self):
+        marca_id = next(m[0] for m in self.db_manager.get_marcas() if m[1] == "Kia")
+        self.db_manager.add_produto("Vela de Ignição", "VL-01", "", marca_id, 5, "")
+        produto_id = self.db_manager.get_produtos()[0][0]
+
+        self.db_manager.update_produto(produto_id, "Bobina de Ignição", "BB-01", "", marca_id, 5, "")
+        self.assertEqual(self.db_manager.get_produtos("vela"), [])
+        self.assertEqual(len(self.db_manager.get_produtos("bobina")), 1)
+
+        self.db_manager.update_marca(marca_id, "Kia Motors")
+        self.assertEqual(len(self.db_manager.get_produtos("motors")), 1)
+
+        self.db_manager.delete_produto(produto_id)
+        self.assertEqual(self.db_manager.get_produtos("bobina"), [])
+
+    def test_searches_ignore_accents_and_case(self):
+        self.db_manager.add_fornecedor("Peças São João", "Ana", "", "", "")
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        compra_id = self.db_manager.add_compra(fornecedor_id, "2025-01-10", "2025-01-20", "", 100.0, 0.0, 0.0, 100.0, "")
+        self.db_manager.add_conta_a_pagar(compra_id, "2025-01-20", 100.0)
+        self.db_manager.add_marca("Citroën")
+
+        for termo in ("pecas", "PEÇAS", "são joão", "SAO JOAO"):
+            self.assertEqual(len(self.db_manager.get_fornecedores(termo)), 1, termo)
+            self.assertEqual(len(self.db_manager.get_compras(termo)), 1, termo)
+            self.assertEqual(len(self.db_manager.get_contas_a_pagar(termo)), 1, termo)
+        self.assertEqual([m[1] for m in self.db_manager.get_marcas("citroen")], ["Citroën"])
+        self.assertEqual(len(self.db_manager.get_produtos("PEÇAS")), 0)
+
+    def test_name_search_index_rebuilt_by_migration(self):
+        self.db_manager.cursor.execute("INSERT INTO fornecedores (nome) VALUES ('Distribuidora Ávila')")
+        self.db_manager.cursor.execute("DELETE FROM fornecedores_fts")
+        self.db_manager.cursor.execute("DELETE FROM schema_version WHERE version >= 6")
+        self.db_manager.cursor.execute("PRAGMA user_version = 5")
+        self.db_manager.conn.commit()
+        self.db_manager.close()
+
+        self.db_manager = DatabaseManager(self.db_name)
+        self.assertEqual(len(self.db_manager.get_fornecedores("avila")), 1)
+        # Compras e contas encontram o fornecedor pelo mesmo índice; datas e status por trecho
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        self.db_manager.add_compra_completa(fornecedor_id, "2025-01-10", "", "", 10.0, 0.0, 0.0, 10.0, "", [], "2025-02-10")
+        self.assertEqual(len(self.db_manager.get_compras("ÁVILA")), 1)
+        self.assertEqual(len(self.db_manager.get_compras("2025-01")), 1)
+        self.assertEqual(len(self.db_manager.get_contas_a_pagar("pend")), 1)
+        self.assertEqual(self.db_manager.get_compras("vila"), [])
+
+    def test_name_search_follows_writes_from_any_code_path(self):
+        # Triggers mantêm o índice, inclusive para escritas feitas fora do DatabaseManager
+        self.db_manager.conn.execute("INSERT INTO fornecedores (nome) VALUES ('Auto Peças Lúcio')")
+        self.db_manager.conn.commit()
+        self.assertEqual(len(self.db_manager.get_fornecedores("lucio")), 1)
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        self.db_manager.update_fornecedor(fornecedor_id, "Autopeças Mércia", "", "", "", "")
+        self.assertEqual(self.db_manager.get_fornecedores("lucio"), [])
+        self.assertEqual(len(self.db_manager.get_fornecedores("MERC")), 1)
+        self.db_manager.delete_fornecedor(fornecedor_id)
+        self.assertEqual(self.db_manager.get_fornecedores("merc"), [])
+        # A busca por nome usa o índice FTS5, não uma varredura com LIKE '%...%'
+        self.db_manager.cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM marcas WHERE id IN (SELECT rowid FROM marcas_fts WHERE marcas_fts MATCH 'a*')"
+        )
+        self.assertIn("VIRTUAL TABLE INDEX", " ".join(row[3] for row in self.db_manager.cursor.fetchall()))
+
+    def _collect_pages(self, fetch_page, **kwargs):
+        rows, after = [], None
+        while True:
+            page, after = fetch_page(after=after, limit=3, **kwargs)
+            rows.extend(page)
+            if after is None:
+                return rows
+
+    def test_keyset_pages_match_full_listings(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        for i in range(10):
+            # Nomes repetidos exercitam o desempate pelo id
+            self.db_manager.add_produto(f"Produto {i % 4}", f"PG{i:03d}", "", marca_id, i, "")
+            self.db_manager.add_fornecedor(f"Fornecedor {i}", "", "", "", "")
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        for i in range(8):
+            compra_id = self.db_manager.add_compra(fornecedor_id, f"2025-01-{1 + i % 3:02d}", "2025-02-01", "", 10.0, 0.0, 0.0, 10.0, "")
+            self.db_manager.add_conta_a_pagar(compra_id, f"2025-02-{1 + i % 2:02d}", 10.0)
+
+        produtos = self._collect_pages(self.db_manager.get_produtos_page)
+        self.assertEqual([p[1] for p in produtos], [p[1] for p in self.db_manager.get_produtos()])
+        self.assertEqual(len({p[0] for p in produtos}), 10)
+        self.assertEqual(
+            self._collect_pages(self.db_manager.get_fornecedores_page), self.db_manager.get_fornecedores()
+        )
+        compras = self._collect_pages(self.db_manager.get_compras_page)
+        self.assertEqual(sorted(compras, key=lambda c: (c[2], c[0]), reverse=True), compras)
+        self.assertEqual(len(compras), 8)
+        contas = self._collect_pages(self.db_manager.get_contas_a_pagar_page)
+        self.assertEqual(sorted(contas, key=lambda c: (c[3], c[0])), contas)
+        self.assertEqual(len(contas), 8)
+        self.assertEqual(len(self._collect_pages(self.db_manager.get_produtos_page, search_term="produto 2")), 2)
+
+    def test_sorted_pages(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        for i, quantidade in enumerate([5, 100, 20, 5, 3, 42, 0]):
+            codigo = None if i % 3 == 0 else f"C{i}"
+            self.db_manager.add_produto(f"Produto {i}", codigo, "", marca_id, quantidade, "")
+
+        por_quantidade = self._collect_pages(self.db_manager.get_produtos_page, sort_by="quantidade_atual", descending=True)
+        self.assertEqual([p[4] for p in por_quantidade], [100, 42, 20, 5, 5, 3, 0])
+        por_codigo = self._collect_pages(self.db_manager.get_produtos_page, sort_by="codigo_produto")
+        self.assertEqual([p[2] for p in por_codigo], [None, None, None, "C1", "C2", "C4", "C5"])
+        with self.assertRaises(ValueError):
+            self.db_manager.get_produtos_page(sort_by="descricao; DROP TABLE produtos")
+
+        self.assertEqual(self.db_manager.get_marcas(descending=True), list(reversed(self.db_manager.get_marcas())))
+
+    def test_cancel_when_aborts_running_query(self):
+        long_query = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000) SELECT COUNT(*) FROM n"
+        with self.db_manager.cancel_when(lambda: True):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.db_manager.cursor.execute(long_query)
+        # Fora do bloco o progress handler é removido e a conexão segue utilizável
+        self.db_manager.cursor.execute(long_query)
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], 1000000)
+
+    def test_each_thread_gets_its_own_connection(self):
+        self.db_manager.add_marca("Marca da Thread Principal")
+        results = {}
+
+        def worker():
+            results["conn"] = self.db_manager.conn
+            results["marcas"] = [nome for _, nome in self.db_manager.get_marcas("thread principal")]
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertIsNot(results["conn"], self.db_manager.conn)
+        self.assertEqual(results["marcas"], ["Marca da Thread Principal"])
+
+        # Consultas seguidas na mesma thread reutilizam a conexão dela (o ident de uma thread
+        # encerrada pode ser reaproveitado, então a contagem de estados não é comparada)
+        def repeated_queries():
+            results["conexoes"] = set()
+            for _ in range(3):
+                self.db_manager.get_produtos()
+                results["conexoes"].add(id(self.db_manager.conn))
+
+        thread = threading.Thread(target=repeated_queries)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(results["conexoes"]), 1)
+
+        # close() fecha também as conexões abertas pelas outras threads
+        self.db_manager.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            results["conn"].execute("SELECT 1")
+
+    def test_add_compra_completa_is_atomic(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Filtro", "F1", "", marca_id, 0, "")
+        self.db_manager.add_fornecedor("Fornecedor", "", "", "", "")
+        produto_id = self.db_manager.get_produtos()[0][0]
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        itens = [{'produto_id': produto_id, 'quantidade': 2, 'preco_unitario': 5.0}] * 3
+
+        compra_id = self.db_manager.add_compra_completa(
+            fornecedor_id, "2025-01-10", "2025-02-10", "", 30.0, 0.0, 0.0, 30.0, "", itens, "2025-02-10"
+        )
+        self.assertIsNotNone(compra_id)
+        _, itens_gravados = self.db_manager.get_compra_details(compra_id)
+        self.assertEqual(len(itens_gravados), 3)
+        self.assertEqual([c[4] for c in self.db_manager.get_contas_a_pagar()], [30.0])
+
+        # Um item inválido desfaz a compra inteira
+        itens_invalidos = itens + [{'produto_id': None, 'quantidade': 1, 'preco_unitario': 1.0}]
+        self.assertIsNone(self.db_manager.add_compra_completa(
+            fornecedor_id, "2025-01-11", "2025-02-11", "", 31.0, 0.0, 0.0, 31.0, "", itens_invalidos, "2025-02-11"
+        ))
+        self.assertEqual(len(self.db_manager.get_compras()), 1)
+        self.assertEqual(len(self.db_manager.get_contas_a_pagar()), 1)
+        self.db_manager.cursor.execute("SELECT COUNT(*) FROM itens_compra")
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], 3)
+
+    def test_update_compra_applies_item_diff(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        for i in range(4):
+            self.db_manager.add_produto(f"Produto {i}", f"P{i}", "", marca_id, 0, "")
+        self.db_manager.add_fornecedor("Fornecedor", "", "", "", "")
+        p = [produto[0] for produto in self.db_manager.get_produtos()]
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        itens = [{'produto_id': produto_id, 'quantidade': 1, 'preco_unitario': 10.0} for produto_id in p[:3]]
+        compra_id = self.db_manager.add_compra_completa(
+            fornecedor_id, "2025-01-10", "2025-02-10", "", 30.0, 0.0, 0.0, 30.0, "", itens, "2025-02-10"
+        )
+
+        def item_ids():
+            self.db_manager.cursor.execute("SELECT produto_id, id FROM itens_compra WHERE compra_id = ?", (compra_id,))
+            return dict(self.db_manager.cursor.fetchall())
+
+        antes = item_ids()
+        novos_itens = [
+            {'produto_id': p[0], 'quantidade': 1, 'preco_unitario': 10.0}, # inalterado
+            {'produto_id': p[1], 'quantidade': 5, 'preco_unitario': 10.0}, # alterado
+            {'produto_id': p[3], 'quantidade': 2, 'preco_unitario': 7.5},  # inserido (p[2] removido)
+        ]
+        changes = self.db_manager.conn.total_changes
+        self.assertTrue(self.db_manager.update_compra(
+            compra_id, fornecedor_id, "2025-01-10", "2025-02-10", "", 75.0, 0.0, 0.0, 75.0, "", "Pendente", novos_itens
+        ))
+        # compra + 1 update + 1 insert + 1 delete + conta a pagar
+        self.assertEqual(self.db_manager.conn.total_changes - changes, 5)
+        depois = item_ids()
+        self.assertEqual(depois[p[0]], antes[p[0]])
+        self.assertEqual(depois[p[1]], antes[p[1]])
+        self.assertNotIn(p[2], depois)
+        _, detalhes = self.db_manager.get_compra_details(compra_id)
+        self.assertEqual(sorted((d[0], d[2]) for d in detalhes), sorted([(p[0], 1), (p[1], 5), (p[3], 2)]))
+
+        # Sem mudanças, nada é gravado
+        changes = self.db_manager.conn.total_changes
+        self.assertTrue(self.db_manager.update_compra(
+            compra_id, fornecedor_id, "2025-01-10", "2025-02-10", "", 75.0, 0.0, 0.0, 75.0, "", "Pendente", novos_itens
+        ))
+        self.assertEqual(self.db_manager.conn.total_changes, changes)
+
+    def test_apply_movements_reports_each_line(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Vela", "V1", "", marca_id, 5, "")
+        produto_id = self.db_manager.get_produtos()[0][0]
+
+        resultados = self.db_manager.apply_movements([
+            {'produto_id': produto_id, 'tipo': "Entrada", 'quantidade': 10},
+            {'produto_id': produto_id, 'tipo': "Saída", 'quantidade': 12, 'observacao': "Venda"},
+            {'produto_id': produto_id, 'tipo': "Saída", 'quantidade': 4},
+            {'produto_id': 9999, 'tipo': "Entrada", 'quantidade': 1},
+            {'produto_id': produto_id, 'tipo': "Ajuste", 'quantidade': 1},
+        ])
+        self.assertEqual([r["sucesso"] for r in resultados], [True, True, False, False, False])
+        self.assertEqual([r["saldo"] for r in resultados[:2]], [15, 3])
+        self.assertEqual(resultados[2]["erro"], "Estoque insuficiente.")
+        self.assertEqual(self.db_manager.get_produto_by_id(produto_id)[5], 3)
+        # Saldo inicial do cadastro mais as duas linhas aceitas do lote
+        self.assertEqual(len(self.db_manager.get_movimentacoes_by_product(produto_id)), 3)
+
+    def test_delete_compra_cascades_to_items_and_payables(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Correia", "C1", "", marca_id, 0, "")
+        self.db_manager.add_fornecedor("Fornecedor", "", "", "", "")
+        produto_id = self.db_manager.get_produtos()[0][0]
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        itens = [{'produto_id': produto_id, 'quantidade': 1, 'preco_unitario': 1.0}]
+        compra_id = self.db_manager.add_compra_completa(
+            fornecedor_id, "2025-01-10", "2025-02-10", "", 1.0, 0.0, 0.0, 1.0, "", itens, "2025-02-10"
+        )
+        self.db_manager.add_compra_completa(
+            fornecedor_id, "2025-01-11", "2025-02-11", "", 1.0, 0.0, 0.0, 1.0, "", itens, "2025-02-11"
+        )
+        self.assertTrue(self.db_manager.delete_compra(compra_id))
+        self.db_manager.cursor.execute("SELECT COUNT(*) FROM itens_compra WHERE compra_id = ?", (compra_id,))
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], 0)
+        self.assertEqual(len(self.db_manager.get_contas_a_pagar()), 1)
+
+        self.assertTrue(self.db_manager.delete_fornecedor(fornecedor_id))
+        for table in ("compras", "itens_compra", "contas_a_pagar"):
+            self.db_manager.cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            self.assertEqual(self.db_manager.cursor.fetchone()[0], 0, table)
+
+    def test_purge_orphans(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Filtro", "F1", "", marca_id, 0, "")
+        produto_id = self.db_manager.get_produtos()[0][0]
+        conn = self.db_manager.conn
+        # Simula um banco gravado antes de as chaves estrangeiras serem aplicadas
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute("INSERT INTO compras (fornecedor_id, data_emissao, total_final) VALUES (999, '2025-01-01', 1.0)")
+        compra_id = conn.execute("SELECT MAX(id) FROM compras").fetchone()[0]
+        conn.execute("INSERT INTO itens_compra (compra_id, produto_id, quantidade, preco_unitario) VALUES (?, ?, 1, 1.0)", (compra_id, produto_id))
+        conn.execute("INSERT INTO contas_a_pagar (compra_id, data_vencimento, valor) VALUES (888, '2025-02-01', 1.0)")
+        conn.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora) VALUES (777, 'Entrada', 1, '2025-01-01')")
+        conn.execute("UPDATE produtos SET marca_id = 555 WHERE id = ?", (produto_id,))
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = ON")
+
+        counts = purge_orphans(conn, self.db_manager.logger, dry_run=True)
+        self.assertEqual(counts["compras"], 1)
+        dry_run_total = counts["total"]
+        # A movimentação órfã não entra no resumo diário (o trigger ignora produto inexistente)
+        self.assertEqual(len(conn.execute("PRAGMA foreign_key_check").fetchall()), 4)
+
+        counts = purge_orphans(conn, self.db_manager.logger)
+        self.assertEqual(counts["compras"], 1)
+        # O total do dry-run é o da execução real, incluindo o item removido em cascata
+        self.assertEqual(counts["total"], dry_run_total)
+        self.assertGreater(counts["total"], sum(count for table, count in counts.items() if table != "total"))
+        self.assertEqual(counts["contas_a_pagar"], 1)
+        self.assertEqual(counts["movimentacoes"], 1)
+        self.assertEqual(counts["produtos"], 1)
+        self.assertEqual(conn.execute("PRAGMA foreign_key_check").fetchall(), [])
+        # O item da compra órfã sai junto com ela, pelo ON DELETE CASCADE
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM itens_compra").fetchone()[0], 0)
+        self.assertEqual(len(self.db_manager.get_produtos()), 1)
+
+    def test_dashboard_stats_follow_triggers(self):
+        self.assertEqual(self.db_manager.get_dashboard_stats(), self.db_manager.rebuild_dashboard_stats())
+        marcas_iniciais = self.db_manager.get_total_brands_count()
+        self.db_manager.add_marca("Marca Extra")
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Baixo", "B1", "", marca_id, 3, "")
+        self.db_manager.add_produto("Alto", "A1", "", marca_id, 50, "")
+        alto_id = [p[0] for p in self.db_manager.get_produtos() if p[1] == "Alto"][0]
+        self.assertEqual(self.db_manager.get_dashboard_stats(), (2, 1, marcas_iniciais + 1))
+
+        self.db_manager.update_produto_quantity(alto_id, 45, "Saída")
+        self.assertEqual(self.db_manager.get_dashboard_stats(), (2, 2, marcas_iniciais + 1))
+        self.db_manager.delete_produto(alto_id)
+        self.assertEqual(self.db_manager.get_dashboard_stats(), (1, 1, marcas_iniciais + 1))
+        self.assertEqual(self.db_manager.get_dashboard_stats(), self.db_manager.rebuild_dashboard_stats())
+
+    def test_dashboard_stats_migration_with_preexisting_table(self):
+        self.db_manager.close()
+        os.remove(self.db_name)
+        conn = sqlite3.connect(self.db_name)
+        apply_migrations(conn, self.db_manager.logger, target_version=8)
+        conn.execute("INSERT INTO produtos (nome_produto, quantidade_atual) VALUES ('Filtro', 2)")
+        # Tabela criada por fora das migrações, sem triggers e com contadores desatualizados
+        conn.execute("""
+            CREATE TABLE estatisticas_estoque (
+                id INTEGER PRIMARY KEY CHECK (id = 1), total_produtos INTEGER NOT NULL,
+                produtos_estoque_baixo INTEGER NOT NULL, total_marcas INTEGER NOT NULL
+            )
+        """)
+        conn.execute("INSERT INTO estatisticas_estoque VALUES (1, 0, 0, 0)")
+        conn.commit()
+        conn.close()
+
+        self.db_manager = DatabaseManager(self.db_name)
+        self.assertEqual(self.db_manager.get_dashboard_stats()[:2], (1, 1))
+        self.db_manager.add_marca("Marca Nova")
+        self.db_manager.add_produto("Vela", "V1", "", self.db_manager.get_marcas()[0][0], 50, "")
+        self.assertEqual(self.db_manager.get_dashboard_stats(), self.db_manager.rebuild_dashboard_stats())
+        self.assertEqual(self.db_manager.get_dashboard_stats()[0], 2)
+
+    def test_low_stock_uses_per_product_minimum(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Pastilha", "P1", "", marca_id, 8, "", estoque_minimo=5)
+        self.db_manager.add_produto("Filtro", "F1", "", marca_id, 3, "", estoque_minimo=10)
+        self.db_manager.add_produto("Vela", "V1", "", marca_id, 4, "", estoque_minimo=5)
+        ids = {p[1]: p[0] for p in self.db_manager.get_produtos()}
+
+        rows, _ = self.db_manager.get_produtos_estoque_baixo_page()
+        self.assertEqual([(r[1], r[6]) for r in rows], [("Filtro", 7), ("Vela", 1)])
+        self.assertEqual(self.db_manager.get_dashboard_stats()[1], 2)
+
+        self.db_manager.cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM produtos p WHERE p.quantidade_atual <= p.estoque_minimo "
+            "ORDER BY p.quantidade_atual - p.estoque_minimo, p.id"
+        )
+        self.assertIn("idx_produtos_estoque_baixo", " ".join(row[3] for row in self.db_manager.cursor.fetchall()))
+
+        # O feed recebe só os cruzamentos do mínimo, lidos de forma incremental
+        ultimo_id = self.db_manager.get_alertas_estoque()[-1][0]
+        self.db_manager.update_produto_quantity(ids["Pastilha"], 3, "Saída")  # 8 -> 5: cruza o mínimo
+        self.db_manager.update_produto_quantity(ids["Pastilha"], 1, "Saída")  # 5 -> 4: continua abaixo
+        self.db_manager.update_produto_quantity(ids["Vela"], 6, "Entrada")    # 4 -> 10: reposto
+        novos = self.db_manager.get_alertas_estoque(after_id=ultimo_id)
+        self.assertEqual([(a[2], a[3], a[4]) for a in novos],
+                         [("Pastilha", "Abaixo do mínimo", 5), ("Vela", "Reposto", 10)])
+        self.assertEqual(self.db_manager.get_dashboard_stats()[1], 2)
+        self.assertEqual(self.db_manager.get_dashboard_stats(), self.db_manager.rebuild_dashboard_stats())
+
+    def test_low_stock_version_follows_listed_products(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        baixo = self.db_manager.add_produto("Baixo", "B1", "", marca_id, 3, "", estoque_minimo=5)
+        alto = self.db_manager.add_produto("Alto", "A1", "", marca_id, 50, "", estoque_minimo=5)
+
+        versao = self.db_manager.get_estoque_baixo_versao()
+        self.db_manager.update_produto_quantity(alto, 1, "Saída")  # Fora da lista: nada muda
+        self.assertEqual(self.db_manager.get_estoque_baixo_versao(), versao)
+
+        # Item já listado muda de quantidade sem cruzar o mínimo (nenhum alerta novo)
+        self.db_manager.update_produto_quantity(baixo, 1, "Saída")
+        self.assertGreater(self.db_manager.get_estoque_baixo_versao(), versao)
+        versao = self.db_manager.get_estoque_baixo_versao()
+
+        # Reposto: sai da lista
+        self.db_manager.update_produto_quantity(baixo, 20, "Entrada")
+        self.assertGreater(self.db_manager.get_estoque_baixo_versao(), versao)
+
+    def test_stock_as_of_uses_monthly_snapshots(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Correia", "C1", "", marca_id, 0, "")
+        produto_id = self.db_manager.get_produtos()[0][0]
+        self.db_manager.cursor.executemany(
+            "INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao) VALUES (?, ?, ?, ?, '')",
+            [(produto_id, "Entrada", 10, "2025-01-10 09:00:00"),
+             (produto_id, "Saída", 3, "2025-02-05 10:00:00"),
+             (produto_id, "Entrada", 5, "2025-03-20 11:00:00")]
+        )
+        self.db_manager.conn.commit()
+
+        fechadas = self.db_manager.ensure_monthly_snapshots(hoje=date(2025, 4, 15))
+        self.assertEqual(fechadas, ["2025-01-31", "2025-02-28", "2025-03-31"])
+        self.assertEqual(self.db_manager.ensure_monthly_snapshots(hoje=date(2025, 4, 15)), [])
+        self.assertEqual(self.db_manager.get_stock_as_of("2025-01-05"), {})
+        self.assertEqual(self.db_manager.get_stock_as_of("2025-02-28"), {produto_id: 7})
+        self.assertEqual(self.db_manager.get_stock_as_of(date(2025, 3, 25)), {produto_id: 12})
+
+        # Movimentação retroativa invalida os fechamentos a partir da sua data
+        self.db_manager.cursor.execute(
+            "INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao) VALUES (?, 'Saída', 2, '2025-02-10 08:00:00', '')",
+            (produto_id,)
+        )
+        self.db_manager.conn.commit()
+        self.assertEqual(self.db_manager.get_stock_as_of("2025-03-31", produto_id), {produto_id: 10})
+        self.assertEqual(self.db_manager.ensure_monthly_snapshots(hoje=date(2025, 4, 15)), ["2025-02-28", "2025-03-31"])
+        self.db_manager.cursor.execute("SELECT quantidade FROM saldos_estoque WHERE data_referencia = '2025-03-31'")
+        self.assertEqual(self.db_manager.cursor.fetchone()[0], 10)
+
+    def test_stock_snapshots_skip_orphan_movements(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        produto_id = self.db_manager.add_produto("Correia", "C1", "", marca_id, 0, "")
+        conn = self.db_manager.conn
+        conn.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora) VALUES (?, 'Entrada', 4, '2025-01-10 09:00:00')", (produto_id,))
+        conn.commit()
+        # Movimentação de um produto já excluído, gravada antes das chaves estrangeiras
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora) VALUES (777, 'Entrada', 2, '2025-01-12 09:00:00')")
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = ON")
+
+        self.assertEqual(self.db_manager.ensure_monthly_snapshots(hoje=date(2025, 3, 1)), ["2025-01-31", "2025-02-28"])
+        self.assertEqual(self.db_manager.get_stock_as_of("2025-01-20"), {produto_id: 4})
+        self.assertEqual(self.db_manager.get_stock_as_of("2025-02-28"), {produto_id: 4})
+
+    def test_product_quantity_edits_are_recorded_as_movements(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Junta", "J1", "", marca_id, 10, "")
+        produto_id = self.db_manager.get_produtos()[0][0]
+        self.db_manager.update_produto(produto_id, "Junta", "J1", "", marca_id, 6, "")
+        self.db_manager.update_produto(produto_id, "Junta 2", "J1", "", marca_id, 6, "")
+        self.db_manager.update_produto_quantity(produto_id, 1, "Entrada")
+
+        movimentacoes = self.db_manager.get_movimentacoes_by_product(produto_id)
+        self.assertEqual(sorted((m[0], m[1], m[3]) for m in movimentacoes), [
+            ("Entrada", 1, ""), ("Entrada", 10, "Saldo inicial"), ("Saída", 4, "Ajuste na edição do produto")
+        ])
+        self.assertEqual(self.db_manager.get_stock_as_of(date.today()), {produto_id: 7})
+        self.assertEqual(self.db_manager.get_produto_by_id(produto_id)[5], 7)
+
+    def test_movement_history_pages_and_aggregates(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Rolamento", "R1", "", marca_id, 0, "")
+        produto_id = self.db_manager.get_produtos()[0][0]
+        movimentos = [
+            (produto_id, "Entrada", 10, "2025-01-10 09:00:00"),
+            (produto_id, "Saída", 2, "2025-01-10 09:00:00"),
+            (produto_id, "Saída", 3, "2025-01-11 14:00:00"),
+            (produto_id, "Entrada", 7, "2025-02-01 08:00:00"),
+            (produto_id, "Saída", 1, "2025-02-03 16:00:00"),
+        ]
+        self.db_manager.cursor.executemany(
+            "INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao) VALUES (?, ?, ?, ?, '')",
+            movimentos
+        )
+        self.db_manager.conn.commit()
+
+        linhas, after = [], None
+        while True:
+            rows, after = self.db_manager.get_movimentacoes_page(produto_id, after=after, limit=2)
+            linhas.extend(rows)
+            if after is None:
+                break
+        self.assertEqual([(r[1], r[2], r[3]) for r in linhas], [(m[1], m[2], m[3]) for m in reversed(movimentos)])
+        self.assertEqual(len(self.db_manager.get_movimentacoes_by_product(produto_id)), len(movimentos))
+
+        self.assertEqual(self.db_manager.get_movimentacoes_resumo(produto_id, "dia"), [
+            ("2025-02-03", 0, 1, 1), ("2025-02-01", 7, 0, 1), ("2025-01-11", 0, 3, 1), ("2025-01-10", 10, 2, 2)
+        ])
+        self.assertEqual(self.db_manager.get_movimentacoes_resumo(produto_id, "mes", limit=1), [("2025-02", 7, 1, 2)])
+        with self.assertRaises(ValueError):
+            self.db_manager.get_movimentacoes_resumo(produto_id, "semana")
+
+    def test_daily_rollup_follows_ledger(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_produto("Filtro", "F1", "", marca_id, 0, "")
+        self.db_manager.add_produto("Vela", "V1", "", marca_id, 0, "")
+        ids = {p[1]: p[0] for p in self.db_manager.get_produtos()}
+        self.db_manager.cursor.executemany(
+            "INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora, observacao) VALUES (?, ?, ?, ?, '')",
+            [(ids["Filtro"], "Entrada", 20, "2025-03-03 08:00:00"),
+             (ids["Filtro"], "Saída", 4, "2025-03-03 17:00:00"),
+             (ids["Filtro"], "Saída", 6, "2025-03-12 10:00:00"),
+             (ids["Vela"], "Entrada", 30, "2025-03-04 09:00:00"),
+             (ids["Vela"], "Saída", 12, "2025-03-11 11:00:00"),
+             (ids["Vela"], "Saída", 1, "2025-04-01 11:00:00")]
+        )
+        self.db_manager.cursor.execute(
+            "DELETE FROM movimentacoes WHERE produto_id = ? AND data_hora = '2025-04-01 11:00:00'", (ids["Vela"],)
+        )
+        self.db_manager.conn.commit()
+
+        self.db_manager.cursor.execute("SELECT * FROM movimentacoes_diarias ORDER BY produto_id, dia")
+        incremental = self.db_manager.cursor.fetchall()
+        self.assertIn((ids["Filtro"], "2025-03-03", 20, 4, 2), incremental)
+        self.assertEqual(self.db_manager.rebuild_movimentacoes_diarias(), 4)
+        self.db_manager.cursor.execute("SELECT * FROM movimentacoes_diarias ORDER BY produto_id, dia")
+        self.assertEqual(self.db_manager.cursor.fetchall(), incremental)
+
+        self.assertEqual(self.db_manager.get_produtos_mais_movimentados("2025-03-01", "2025-03-31"), [
+            (ids["Vela"], "Vela", 30, 12, 2), (ids["Filtro"], "Filtro", 20, 10, 3)
+        ])
+        self.assertEqual(self.db_manager.get_totais_movimentacoes("2025-03-01", "2025-03-31", "semana"), [
+            ("2025-09", 50, 4, 3), ("2025-10", 0, 18, 2)
+        ])
+        self.assertEqual(self.db_manager.get_totais_movimentacoes("2025-03-01", "2025-04-30", "mes"), [
+            ("2025-03", 50, 22, 5)
+        ])
+
+    def test_daily_rollup_migration_skips_orphan_movements(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        produto_id = self.db_manager.add_produto("Filtro", "F1", "", marca_id, 0, "")
+        conn = self.db_manager.conn
+        conn.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora) VALUES (?, 'Entrada', 3, '2025-01-02 10:00:00')", (produto_id,))
+        conn.commit()
+        # Banco na versão 12 com movimentações de produtos já excluídos
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora) VALUES (777, 'Entrada', 1, '2025-01-01 10:00:00')")
+        conn.execute("DROP TABLE movimentacoes_diarias")
+        conn.execute("DROP TRIGGER movimentacoes_diarias_ai")
+        conn.execute("DROP TRIGGER movimentacoes_diarias_ad")
+        conn.execute("DELETE FROM schema_version WHERE version >= 13")
+        conn.execute("PRAGMA user_version = 12")
+        conn.commit()
+        self.db_manager.close()
+
+        self.db_manager = DatabaseManager(self.db_name)
+        conn = self.db_manager.conn
+        self.assertEqual(get_schema_version(conn), LATEST_VERSION)
+        self.assertEqual(conn.execute("SELECT produto_id, dia, entradas FROM movimentacoes_diarias").fetchall(),
+                         [(produto_id, "2025-01-02", 3)])
+        # Nova movimentação órfã também não interrompe a gravação
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, data_hora) VALUES (777, 'Saída', 1, '2025-01-03 10:00:00')")
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = ON")
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM movimentacoes_diarias").fetchone()[0], 1)
+        self.assertEqual(self.db_manager.get_product_detail(produto_id).total_movimentacoes, 1)
+
+    def test_reconcile_ledger_reports_and_corrects(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        self.db_manager.add_fornecedor("Fornecedor", "", "", "", "")
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        self.db_manager.add_produto("Certo", "C1", "", marca_id, 5, "")
+        self.db_manager.add_produto("Sobra", "S1", "", marca_id, 5, "")
+        self.db_manager.add_produto("Falta", "F1", "", marca_id, 5, "")
+        ids = {p[1]: p[0] for p in self.db_manager.get_produtos()}
+        # Bancos antigos: quantidade sobrescrita sem passar pelo livro
+        self.db_manager.cursor.execute("UPDATE produtos SET quantidade_atual = 9 WHERE id = ?", (ids["Sobra"],))
+        self.db_manager.cursor.execute("UPDATE produtos SET quantidade_atual = 2 WHERE id = ?", (ids["Falta"],))
+        self.db_manager.conn.commit()
+        itens = [{'produto_id': ids["Certo"], 'quantidade': 3, 'preco_unitario': 2.5}]
+        compra_ok = self.db_manager.add_compra_completa(fornecedor_id, "2025-01-10", "", "", 7.5, 0, 0, 7.5, "", itens, "2025-02-10")
+        compra_errada = self.db_manager.add_compra_completa(fornecedor_id, "2025-01-10", "", "", 9.0, 0, 0, 9.0, "", itens, "2025-02-10")
+
+        report = reconcile_ledger(self.db_manager.conn, self.db_manager.logger)
+        self.assertEqual(sorted(report["estoque"]), sorted([
+            (ids["Sobra"], "Sobra", 9, 5), (ids["Falta"], "Falta", 2, 5)
+        ]))
+        self.assertEqual(report["compras"], [(compra_errada, 9.0, 7.5)])
+        self.assertNotIn(compra_ok, [c[0] for c in report["compras"]])
+
+        reconcile_ledger(self.db_manager.conn, self.db_manager.logger, apply_corrections=True)
+        self.assertEqual(reconcile_ledger(self.db_manager.conn, self.db_manager.logger)["estoque"], [])
+        self.assertEqual(self.db_manager.get_produto_by_id(ids["Sobra"])[5], 9)
+        self.assertEqual(self.db_manager.get_stock_as_of(date.today(), ids["Falta"]), {ids["Falta"]: 2})
+
+    def test_get_product_detail_in_one_query(self):
+        self.db_manager.add_marca("Marca Detalhe")
+        marca_id = [m[0] for m in self.db_manager.get_marcas() if m[1] == "Marca Detalhe"][0]
+        self.db_manager.add_fornecedor("Fornecedor", "", "", "", "")
+        fornecedor_id = self.db_manager.get_fornecedores()[0][0]
+        self.db_manager.add_produto("Disco", "D1", "Freio", marca_id, 4, "A1", estoque_minimo=2)
+        produto_id = self.db_manager.get_produtos()[0][0]
+        # Imagens na ordem em que foram anexadas, não na do índice (produto, caminho)
+        self.db_manager.add_product_images(produto_id, ["/tmp/disco_1.jpg", "/tmp/disco_0.jpg"])
+        for data, preco in (("2025-01-10", 30.0), ("2025-03-02", 32.5)):
+            itens = [{'produto_id': produto_id, 'quantidade': 1, 'preco_unitario': preco}]
+            self.db_manager.add_compra_completa(fornecedor_id, data, "", "", preco, 0, 0, preco, "", itens, data)
+        self.db_manager.update_produto_quantity(produto_id, 1, "Saída", "Venda")
+
+        detail = self.db_manager.get_product_detail(produto_id)
+        self.assertEqual(detail.marca_nome, "Marca Detalhe")
+        self.assertEqual((detail.quantidade_atual, detail.estoque_minimo, detail.localizacao), (3, 2, "A1"))
+        self.assertEqual(detail.imagens, ["/tmp/disco_1.jpg", "/tmp/disco_0.jpg"])
+        self.assertEqual(self.db_manager.get_product_images(produto_id), detail.imagens)
+        self.assertEqual(detail.ultima_movimentacao[:2], ("Saída", 1))
+        self.assertEqual(detail.ultimo_preco_compra, 32.5)
+        self.assertEqual(detail.total_movimentacoes, 2)
+        self.assertIsNone(self.db_manager.get_product_detail(9999))
+
+    def test_reference_queries_are_cached_until_a_write(self):
+        cache = self.db_manager.query_cache
+        marcas = self.db_manager.get_marcas()
+        self.assertEqual(self.db_manager.get_marcas(), marcas)
+        self.assertEqual((cache.stats["acertos"], cache.stats["faltas"]), (1, 1))
+
+        self.db_manager.add_marca("Marca Nova")
+        self.assertIn("Marca Nova", [m[1] for m in self.db_manager.get_marcas()])
+        self.assertEqual(cache.stats["faltas"], 2)
+        # Escrita em outra tabela não invalida as marcas
+        self.db_manager.add_fornecedor("Fornecedor", "", "", "", "")
+        self.db_manager.get_marcas()
+        self.assertEqual(cache.stats["acertos"], 2)
+        self.assertEqual(len(self.db_manager.get_all_fornecedores_for_combobox()), 1)
+
+        # Escrita de outro terminal (outra conexão) é detectada por PRAGMA data_version
+        other = sqlite3.connect(self.db_name)
+        other.execute("INSERT INTO marcas (nome) VALUES ('Externa')")
+        other.commit()
+        other.close()
+        self.assertIn("Externa", [m[1] for m in self.db_manager.get_marcas()])
+
+        cache.max_entries = 2
+        for termo in ("a", "b", "c"):
+            self.db_manager.get_marcas(termo)
+        self.assertEqual(len(cache._entries), 2)
+
+    def test_estimate_row_count(self):
+        marca_id = self.db_manager.get_marcas()[0][0]
+        for i in range(5):
+            self.db_manager.add_produto(f"Produto {i}", None, "", marca_id, 0, "")
+        self.assertEqual(self.db_manager.estimate_row_count("produtos"), 5)
+        self.db_manager.cursor.execute("ANALYZE")
+        self.assertEqual(self.db_manager.estimate_row_count("produtos"), 5)
+        # O índice parcial de estoque baixo tem a sua própria linha em sqlite_stat1, com menos entradas
+        for i in range(45):
+            self.db_manager.add_produto(f"Produto Cheio {i}", None, "", marca_id, 100, "")
+        self.db_manager.cursor.execute("ANALYZE")
+        self.db_manager.cursor.execute("SELECT stat FROM sqlite_stat1 WHERE idx = 'idx_produtos_estoque_baixo'")
+        self.assertEqual(int(self.db_manager.cursor.fetchone()[0].split()[0]), 5)
+        self.assertEqual(self.db_manager.estimate_row_count("produtos"), 50)
+        with self.assertRaises(ValueError):
+            self.db_manager.estimate_row_count("sqlite_master")
+
 if __name__ == '__main__':
     unittest.main()
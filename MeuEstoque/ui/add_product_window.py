@@ -1,16 +1,18 @@
 import sys
 import os
-import shutil
 import logging
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QComboBox, QPushButton, QMessageBox, QSpinBox, QFormLayout, QGroupBox,
-    QFileDialog, QScrollArea, QWidget, QGridLayout
+    QFileDialog, QScrollArea, QWidget, QGridLayout, QProgressDialog
 )
 from PyQt6.QtCore import pyqtSignal, Qt
 from PyQt6.QtGui import QPixmap, QImage
 
 from MeuEstoque.database.database_manager import DatabaseManager
+from MeuEstoque.config import LOW_STOCK_THRESHOLD
+from MeuEstoque.images.ingest import ImageIngestor
+from MeuEstoque.images.thumbnail_cache import ThumbnailCache, PRODUCT_IMAGES_DIR
 
 # Configurar logging para arquivo
 logging.basicConfig(filename='debug.log', level=logging.DEBUG, 
@@ -25,6 +27,8 @@ class AddProductWindow(QDialog):
         self.product_id = product_id # Armazena o ID do produto se estiver em modo de edição
         self.setStyleSheet(open("MeuEstoque/ui/styles.qss").read())
         self.selected_image_paths = []
+        self.stored_image_paths = set() # Imagens já gravadas em product_images (modo de edição)
+        self.image_ingestor = None
         
         if self.product_id:
             self.setWindowTitle("Editar Produto Existente")
@@ -67,6 +71,13 @@ class AddProductWindow(QDialog):
         self.qty_spinbox.setMaximum(999999)
         stock_info_layout.addRow("Quantidade Inicial:", self.qty_spinbox)
 
+        self.min_stock_spinbox = QSpinBox()
+        self.min_stock_spinbox.setMinimum(0)
+        self.min_stock_spinbox.setMaximum(999999)
+        self.min_stock_spinbox.setValue(LOW_STOCK_THRESHOLD)
+        self.min_stock_spinbox.setToolTip("O produto aparece em Estoque Baixo quando a quantidade chega a este valor.")
+        stock_info_layout.addRow("Estoque Mínimo:", self.min_stock_spinbox)
+
         self.location_input = QLineEdit()
         self.location_input.setPlaceholderText("Ex: Prateleira A1, Corredor 3")
         stock_info_layout.addRow("Localização no Estoque (opcional):", self.location_input)
@@ -135,8 +146,9 @@ class AddProductWindow(QDialog):
         for i, path in enumerate(self.selected_image_paths):
             logging.debug(f"Tentando carregar miniatura para preview: {path}")
             if os.path.exists(path):
-                pixmap = QPixmap(path)
-                if not pixmap.isNull():
+                # Miniatura em cache: anexar mais imagens não decodifica de novo as já exibidas
+                pixmap = ThumbnailCache.instance().pixmap(path, thumbnail_size)
+                if pixmap is not None:
                     thumbnail = pixmap.scaled(thumbnail_size, thumbnail_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
                     label = QLabel()
                     label.setPixmap(thumbnail)
@@ -145,7 +157,7 @@ class AddProductWindow(QDialog):
                     self.image_preview_layout.addWidget(label, i // 4, i % 4)
                     logging.debug(f"Miniatura carregada com sucesso: {path}")
                 else:
-                    logging.error(f"Erro ao carregar miniatura (QPixmap is null): {path}")
+                    logging.error(f"Erro ao carregar miniatura (imagem ilegível): {path}")
             else:
                 logging.error(f"Arquivo de imagem para miniatura não encontrado: {path}")
 
@@ -155,6 +167,7 @@ class AddProductWindow(QDialog):
         descricao = self.desc_input.text().strip()
         marca_id = self.brand_combobox.currentData()
         quantidade_inicial = self.qty_spinbox.value()
+        estoque_minimo = self.min_stock_spinbox.value()
 
         if not nome_produto:
             QMessageBox.warning(self, "Erro de Validação", "O nome do produto é obrigatório.")
@@ -171,95 +184,109 @@ class AddProductWindow(QDialog):
         if self.product_id: # Modo de edição
             success = self.db.update_produto(
                 self.product_id, nome_produto, codigo_produto if codigo_produto else None,
-                descricao, marca_id, quantidade_inicial, localizacao if localizacao else None
+                descricao, marca_id, quantidade_inicial, localizacao if localizacao else None, estoque_minimo
             )
-            action_message = "atualizado"
+            self.action_message = "atualizado"
         else: # Modo de adição
-            success = self.db.add_produto(
+            new_product_id = self.db.add_produto(
                 nome_produto, codigo_produto if codigo_produto else None, descricao,
-                marca_id, quantidade_inicial, localizacao if localizacao else None
+                marca_id, quantidade_inicial, localizacao if localizacao else None, estoque_minimo
             )
-            action_message = "salvo"
+            success = bool(new_product_id)
+            self.action_message = "salvo"
             if success:
-                self.product_id = self.db.cursor.lastrowid # Obter o ID do novo produto
+                self.product_id = new_product_id
 
-        if success:
-            logging.debug(f"Produto {action_message} com ID: {self.product_id}")
-            
-            if self.product_id and self.selected_image_paths:
-                app_dir = os.path.dirname(os.path.abspath(__file__))
-                project_root = os.path.abspath(os.path.join(app_dir, '..'))
-                images_base_dir = os.path.join(project_root, "product_images")
-                
-                os.makedirs(images_base_dir, exist_ok=True)
-                logging.debug(f"Diretório base de imagens garantido: {images_base_dir}")
-
-                product_images_dir = os.path.join(images_base_dir, str(self.product_id))
-                os.makedirs(product_images_dir, exist_ok=True)
-                logging.debug(f"Diretório de imagens do produto garantido: {product_images_dir}")
-
-                # Limpar imagens antigas (DB e arquivos físicos) antes de adicionar as novas em modo de edição
-                if self.product_id and self.save_btn.text() == "Atualizar":
-                    existing_image_paths = self.db.get_product_images(self.product_id)
-                    if self.db.delete_product_images(self.product_id):
-                        for img_path in existing_image_paths:
-                            try:
-                                if os.path.exists(img_path):
-                                    os.remove(img_path)
-                                    logging.debug(f"Arquivo de imagem antigo removido: {img_path}")
-                            except OSError as e:
-                                logging.error(f"Erro ao remover arquivo de imagem antigo {img_path}: {e}")
-                    else:
-                        logging.error(f"Erro ao deletar registros de imagens antigas do produto {self.product_id} no DB.")
-
-                for original_path in self.selected_image_paths:
-                    try:
-                        if os.path.exists(original_path):
-                            file_name = os.path.basename(original_path)
-                            destination_path = os.path.join(product_images_dir, file_name)
-                            shutil.copy(original_path, destination_path)
-                            
-                            absolute_destination_path = os.path.abspath(destination_path)
-                            self.db.add_product_image(self.product_id, absolute_destination_path)
-                            logging.debug(f"Imagem copiada e caminho salvo no DB: {absolute_destination_path}")
-                        else:
-                            logging.error(f"Erro: Arquivo de imagem original não encontrado: {original_path}")
-                    except Exception as e:
-                        logging.error(f"Erro ao copiar ou salvar imagem {original_path}: {e}")
-            
-            QMessageBox.information(self, "Sucesso", f"Produto {action_message} com sucesso!")
-            self.product_changed.emit() # Emitir o novo sinal
-            self.accept()
-        else:
-            QMessageBox.critical(self, "Erro", f"Não foi possível {action_message} o produto. Verifique se o código do produto já existe.")
-            logging.error(f"Erro ao {action_message} produto no DB.")
+        if not success:
+            QMessageBox.critical(self, "Erro", f"Não foi possível {self.action_message} o produto. Verifique se o código do produto já existe.")
+            logging.error(f"Erro ao {self.action_message} produto no DB.")
+            return
+
+        logging.debug(f"Produto {self.action_message} com ID: {self.product_id}")
+
+        # Só as imagens anexadas agora são processadas; as já gravadas do produto ficam como estão
+        new_image_paths = [path for path in self.selected_image_paths if path not in self.stored_image_paths]
+        missing = [path for path in new_image_paths if not os.path.exists(path)]
+        for path in missing:
+            logging.error(f"Erro: Arquivo de imagem original não encontrado: {path}")
+        new_image_paths = [path for path in new_image_paths if path not in missing]
+        if not new_image_paths:
+            self._finish_save()
+            return
+
+        # As imagens são reduzidas e recodificadas em outros processos; os registros no banco
+        # só são gravados quando os arquivos já estão no disco (_on_images_ingested)
+        self.save_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(False)
+        self.add_images_btn.setEnabled(False)
+        self.ingest_progress = QProgressDialog("Processando imagens...", None, 0, len(new_image_paths), self)
+        self.ingest_progress.setWindowTitle("Imagens do Produto")
+        self.ingest_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.ingest_progress.setMinimumDuration(0)
+        self.ingest_progress.setValue(0)
+
+        self.image_ingestor = ImageIngestor(self)
+        self.image_ingestor.progress.connect(self._on_ingest_progress)
+        self.image_ingestor.finished.connect(self._on_images_ingested)
+        self.image_ingestor.start(new_image_paths, os.path.join(PRODUCT_IMAGES_DIR, str(self.product_id)))
+
+    def _on_ingest_progress(self, done, total):
+        self.ingest_progress.setLabelText(f"Processando imagens... ({done} de {total})")
+        self.ingest_progress.setValue(done)
+
+    def _on_images_ingested(self, written_paths, errors):
+        self.ingest_progress.close()
+        if written_paths and not self.db.add_product_images(self.product_id, written_paths):
+            QMessageBox.warning(self, "Atenção", "O produto foi salvo, mas não foi possível registrar as imagens.")
+            logging.error(f"Erro ao registrar imagens do produto {self.product_id} no DB.")
+        elif errors:
+            failed = "\n".join(os.path.basename(source) for source, _ in errors)
+            QMessageBox.warning(self, "Atenção", f"Algumas imagens não puderam ser processadas:\n{failed}")
+        self._finish_save()
+
+    def done(self, result):
+        # O pool de ingestão é da aplicação: o diálogo deixa de receber os resultados ao fechar
+        if self.image_ingestor is not None:
+            self.image_ingestor.detach()
+        super().done(result)
+
+    def reject(self):
+        if self.image_ingestor is not None and not self.cancel_btn.isEnabled():
+            return # Imagens ainda em processamento; o diálogo fecha sozinho ao terminar
+        super().reject()
+
+    def _finish_save(self):
+        QMessageBox.information(self, "Sucesso", f"Produto {self.action_message} com sucesso!")
+        self.product_changed.emit() # Emitir o novo sinal
+        self.accept()
 
     def _load_product_data_for_edit(self):
         if self.product_id:
-            product_data = self.db.get_produto_by_id(self.product_id)
+            product_data = self.db.get_product_detail(self.product_id)
             if product_data:
-                # product_data: id, nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao
-                self.name_input.setText(product_data[1])
-                self.code_input.setText(product_data[2] if product_data[2] else "")
-                self.desc_input.setText(product_data[3] if product_data[3] else "")
+                self.name_input.setText(product_data.nome_produto)
+                self.code_input.setText(product_data.codigo_produto if product_data.codigo_produto else "")
+                self.desc_input.setText(product_data.descricao if product_data.descricao else "")
                 
                 # Selecionar a marca correta no combobox
-                brand_id_to_select = product_data[4]
+                brand_id_to_select = product_data.marca_id
                 for i in range(self.brand_combobox.count()):
                     if self.brand_combobox.itemData(i) == brand_id_to_select:
                         self.brand_combobox.setCurrentIndex(i)
                         break
                 
-                self.qty_spinbox.setValue(product_data[5])
-                self.location_input.setText(product_data[6] if product_data[6] else "")
+                self.qty_spinbox.setValue(product_data.quantidade_atual)
+                self.location_input.setText(product_data.localizacao if product_data.localizacao else "")
+                self.min_stock_spinbox.setValue(product_data.estoque_minimo)
 
-                # Carregar imagens existentes
-                self.selected_image_paths = self.db.get_product_images(self.product_id)
+                # Imagens existentes (já vêm na mesma consulta)
+                self.selected_image_paths = product_data.imagens
+                self.stored_image_paths = set(product_data.imagens)
                 self._update_image_previews()
                 
                 # Mudar o texto do botão salvar para "Atualizar"
                 self.save_btn.setText("Atualizar")
-                self.setWindowTitle(f"Editar Produto: {product_data[1]}")
+                self.setWindowTitle(f"Editar Produto: {product_data.nome_produto}")
                 logging.debug(f"Dados do produto ID {self.product_id} carregados para edição.")
             else:
                 QMessageBox.critical(self, "Erro", "Não foi possível carregar os dados do produto para edição.")
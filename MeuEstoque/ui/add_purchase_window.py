@@ -280,22 +280,18 @@ class AddPurchaseWindow(QDialog):
             return
 
         if self.purchase_id is None: # Nova compra
-            new_purchase_id = self.db.add_compra(
+            itens_compra = [
+                {'produto_id': product_id, 'quantidade': data['quantidade'], 'preco_unitario': data['preco_unitario']}
+                for product_id, data in self.products_in_purchase.items()
+            ]
+            # Compra, itens e conta a pagar (uma única conta com o total final, vencendo na
+            # data de entrega) são gravados numa só transação
+            new_purchase_id = self.db.add_compra_completa(
                 supplier_id, issue_date, delivery_date, due_date,
-                subtotal, discount, freight, total_final, observation, status_pagamento_final
+                subtotal, discount, freight, total_final, observation, itens_compra,
+                delivery_date, status_pagamento_final
             )
             if new_purchase_id:
-                for product_id, data in self.products_in_purchase.items():
-                    if not self.db.add_item_compra(new_purchase_id, product_id, data['quantidade'], data['preco_unitario']):
-                        QMessageBox.critical(self, "Erro", f"Não foi possível adicionar o item {data['nome']} à compra.")
-                        # Considerar rollback da compra se um item falhar
-                        return
-                
-                # Adicionar conta a pagar (simplificado para uma única conta com o total final)
-                if not self.db.add_conta_a_pagar(new_purchase_id, delivery_date, total_final): # Usando data de entrega como vencimento
-                    QMessageBox.critical(self, "Erro", "Não foi possível gerar a conta a pagar para esta compra.")
-                    return
-
                 QMessageBox.information(self, "Sucesso", "Compra adicionada com sucesso!")
                 self.purchase_changed.emit()
                 self.accept()
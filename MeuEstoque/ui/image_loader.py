@@ -0,0 +1,108 @@
+import os
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImageReader, QPixmap, QPixmapCache
+
+from MeuEstoque.images.thumbnail_cache import ThumbnailCache
+from MeuEstoque.logger import get_logger
+
+
+class _DecodeSignals(QObject):
+    finished = pyqtSignal(str, object) # chave, QImage (None se a imagem não pôde ser lida)
+
+
+class _DecodeTask(QRunnable):
+    # Decodifica numa thread do QThreadPool, já no tamanho de exibição. Só trabalha com QImage
+    # e arquivos; QPixmap e QPixmapCache ficam com o ImageLoader, na thread da interface.
+    def __init__(self, thumbnails, key, path, size):
+        super().__init__()
+        self.thumbnails = thumbnails
+        self.key = key
+        self.path = path
+        self.size = size
+        self.signals = _DecodeSignals()
+        self.setAutoDelete(False) # O ImageLoader descarta a tarefa após entregar o resultado
+
+    def run(self):
+        image = None
+        # Miniatura do tamanho que cobre a área (gerada a partir do original se ainda não existe)
+        tier_path = self.thumbnails.thumbnail_path(self.path, self.size)
+        if tier_path is not None:
+            reader = QImageReader(tier_path)
+            source_size = reader.size()
+            if source_size.isValid() and (source_size.width() > self.size.width() or source_size.height() > self.size.height()):
+                # Só a resolução necessária é decodificada
+                reader.setScaledSize(source_size.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio))
+            decoded = reader.read()
+            if not decoded.isNull():
+                image = decoded
+        self.signals.finished.emit(self.key, image)
+
+
+class ImageLoader(QObject):
+    """
+    Carrega imagens de produtos em segundo plano, no tamanho em que serão exibidas. As
+    prontas ficam no QPixmapCache; request() devolve a imagem se já está pronta e, se não,
+    agenda a decodificação e emite `loaded` quando ela termina.
+    """
+    loaded = pyqtSignal(str, bool) # caminho, sucesso
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+        self.thumbnails = ThumbnailCache.instance() # Obtido aqui, na thread da interface
+        self.logger = get_logger(self.__class__.__name__)
+        self._pending = {} # chave -> (caminho, tarefa), mantém a tarefa viva até a entrega
+        self._failed = {} # caminho -> (mtime_ns, tamanho) do arquivo quando a leitura falhou
+
+    @staticmethod
+    def _key(path, size):
+        return f"exibicao:{path}:{size.width()}x{size.height()}"
+
+    def request(self, path, size):
+        key = self._key(path, size)
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        if key not in self._pending and not self.has_failed(path):
+            task = _DecodeTask(self.thumbnails, key, path, size)
+            task.signals.finished.connect(self._on_decoded)
+            self._pending[key] = (path, task)
+            self.pool.start(task)
+        return None
+
+    @staticmethod
+    def _file_signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def has_failed(self, path):
+        # Uma falha só vale para o arquivo como estava: se ele foi regravado, tenta de novo
+        if path not in self._failed:
+            return False
+        if self._failed[path] != self._file_signature(path):
+            del self._failed[path]
+            return False
+        return True
+
+    def invalidate(self, path=None):
+        """Esquece as falhas de leitura de `path` (ou de todas as imagens, sem argumento)."""
+        if path is None:
+            self._failed.clear()
+        else:
+            self._failed.pop(path, None)
+
+    def _on_decoded(self, key, image):
+        path, _ = self._pending.pop(key, (None, None))
+        if path is None:
+            return
+        if image is None:
+            self._failed[path] = self._file_signature(path)
+            self.logger.error(f"Erro ao decodificar imagem: {path}")
+            self.loaded.emit(path, False)
+            return
+        QPixmapCache.insert(key, QPixmap.fromImage(image))
+        self.loaded.emit(path, True)
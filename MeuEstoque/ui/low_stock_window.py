@@ -0,0 +1,140 @@
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QLineEdit, QLabel, QHeaderView, QListWidget, QListWidgetItem, QGroupBox
+)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QColor
+from MeuEstoque.config import LOW_STOCK_ALERT_POLL_MS
+from MeuEstoque.logger import get_logger
+from MeuEstoque.ui.paged_table_loader import PagedTableLoader
+from MeuEstoque.ui.query_runner import QueryRunner
+from MeuEstoque.ui.search_controller import SearchController
+
+class LowStockWindow(QWidget):
+    """
+    Página "Estoque Baixo": produtos no próprio estoque mínimo ou abaixo dele, com a maior
+    falta primeiro, e os alertas recentes. O feed de alertas é lido de forma incremental
+    (só os alertas novos); a lista é recarregada quando a versão do estoque baixo muda
+    (qualquer escrita num produto listado ou que passa a ser listado).
+    """
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db = db_manager
+        self.logger = get_logger(self.__class__.__name__)
+        self.last_alert_id = None
+        self.stock_version = None
+
+        self.setStyleSheet(open("MeuEstoque/ui/styles.qss").read())
+
+        self._setup_ui()
+        self._load_low_stock()
+        self._poll_alerts()
+        self._poll_stock_version()
+
+        self.alert_timer = QTimer(self)
+        self.alert_timer.setInterval(LOW_STOCK_ALERT_POLL_MS)
+        self.alert_timer.timeout.connect(self._poll_alerts)
+        self.alert_timer.timeout.connect(self._poll_stock_version)
+        self.alert_timer.start()
+
+    def _setup_ui(self):
+        main_layout = QVBoxLayout(self)
+        main_layout.setContentsMargins(0, 0, 0, 0)
+
+        # Título do Módulo
+        title_label = QLabel("<h2>Estoque Baixo</h2>")
+        title_label.setObjectName("moduleTitle")
+        main_layout.addWidget(title_label)
+
+        # Layout de busca
+        search_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Buscar produto por nome ou código...")
+        self.search_controller = SearchController(self.search_input, self._load_low_stock)
+        self.search_input.returnPressed.connect(self.search_controller.flush)
+        search_layout.addWidget(QLabel("Buscar:"))
+        search_layout.addWidget(self.search_input)
+        main_layout.addLayout(search_layout)
+
+        content_layout = QHBoxLayout()
+
+        # Tabela de produtos abaixo do mínimo
+        self.low_stock_table = QTableWidget()
+        self.low_stock_table.setColumnCount(7)
+        self.low_stock_table.setHorizontalHeaderLabels(["Nome do Produto", "Código", "Marca", "Quantidade Atual", "Estoque Mínimo", "Falta", "ID"])
+        self.low_stock_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.low_stock_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.low_stock_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.low_stock_table.setColumnHidden(6, True)
+        content_layout.addWidget(self.low_stock_table, 3)
+
+        # Ordem fixa pela falta (índice parcial); o cabeçalho "Falta" alterna maior/menor falta primeiro
+        self.low_stock_loader = PagedTableLoader(
+            self.low_stock_table,
+            self.db,
+            self.db.get_produtos_estoque_baixo_page,
+            self._fill_low_stock_row,
+            [None, None, None, None, None, "falta", None],
+            "falta"
+        )
+        self.low_stock_table.horizontalHeader().setSortIndicatorShown(False)
+
+        # Alertas recentes (produtos que cruzaram o mínimo)
+        alerts_group = QGroupBox("Alertas Recentes")
+        alerts_layout = QVBoxLayout(alerts_group)
+        self.alerts_list = QListWidget()
+        alerts_layout.addWidget(self.alerts_list)
+        content_layout.addWidget(alerts_group, 1)
+
+        main_layout.addLayout(content_layout)
+
+    def _load_low_stock(self):
+        self.low_stock_loader.reload(self.search_input.text())
+
+    def _fill_low_stock_row(self, row_idx, product):
+        p_id, p_name, p_code, p_brand, p_qty, p_min, p_shortfall = product
+        self.low_stock_table.setItem(row_idx, 0, QTableWidgetItem(p_name))
+        self.low_stock_table.setItem(row_idx, 1, QTableWidgetItem(p_code if p_code else 'N/A'))
+        self.low_stock_table.setItem(row_idx, 2, QTableWidgetItem(p_brand if p_brand else 'N/A'))
+        for column, value in ((3, p_qty), (4, p_min), (5, p_shortfall)):
+            item = QTableWidgetItem(str(value))
+            item.setTextAlignment(int(Qt.AlignmentFlag.AlignRight) | int(Qt.AlignmentFlag.AlignVCenter))
+            self.low_stock_table.setItem(row_idx, column, item)
+
+        id_item = QTableWidgetItem(str(p_id))
+        id_item.setData(Qt.ItemDataRole.UserRole, p_id)
+        self.low_stock_table.setItem(row_idx, 6, id_item)
+
+    def _poll_alerts(self):
+        QueryRunner.instance().submit(
+            self.db, self.db.get_alertas_estoque, self.last_alert_id,
+            on_result=self._show_new_alerts, key=(self, "alertas")
+        )
+
+    def _poll_stock_version(self):
+        QueryRunner.instance().submit(
+            self.db, self.db.get_estoque_baixo_versao,
+            on_result=self._on_stock_version, key=(self, "versao")
+        )
+
+    def _on_stock_version(self, version):
+        changed = self.stock_version is not None and version != self.stock_version
+        self.stock_version = version
+        if changed:
+            self.logger.info("Estoque baixo alterado; atualizando a lista.")
+            self._load_low_stock()
+
+    def _show_new_alerts(self, alerts):
+        is_first_load = self.last_alert_id is None
+        if is_first_load:
+            self.last_alert_id = 0
+        if not alerts:
+            return
+        self.last_alert_id = alerts[-1][0]
+        for alert_id, produto_id, nome, tipo, quantidade, estoque_minimo, data_hora in alerts:
+            item = QListWidgetItem(f"{data_hora} - {nome}: {tipo} ({quantidade}/{estoque_minimo})")
+            if tipo != "Reposto":
+                item.setForeground(QColor("#c0392b"))
+            self.alerts_list.insertItem(0, item) # Mais recentes no topo
+        if not is_first_load:
+            self.logger.info(f"{len(alerts)} novos alertas de estoque.")
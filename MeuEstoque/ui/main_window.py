@@ -1,8 +1,9 @@
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QPushButton, QLineEdit, QLabel,
-    QMessageBox, QHeaderView, QGroupBox, QListWidget, QListWidgetItem, QStackedWidget
+    QPushButton, QLineEdit, QLabel,
+    QMessageBox, QHeaderView, QGroupBox, QListWidget, QListWidgetItem, QStackedWidget,
+    QTableView, QAbstractItemView
 )
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QPixmap, QIcon, QColor
@@ -16,6 +17,12 @@ from MeuEstoque.ui.product_details_window import ProductDetailsWindow
 from MeuEstoque.ui.manage_suppliers_window import ManageSuppliersWindow
 from MeuEstoque.ui.view_purchases_window import ViewPurchasesWindow
 from MeuEstoque.ui.manage_accounts_payable_window import ManageAccountsPayableWindow
+from MeuEstoque.ui.low_stock_window import LowStockWindow
+from MeuEstoque.ui.products_table_model import ProductsTableModel
+from MeuEstoque.ui.search_controller import SearchController
+from MeuEstoque.ui.query_runner import QueryRunner
+from MeuEstoque.images.ingest import ImageIngestPool
+from MeuEstoque.images.thumbnail_cache import ThumbnailCache
 from MeuEstoque.config import HELP_TEXTS
 from MeuEstoque.logger import get_logger
 
@@ -31,6 +38,7 @@ class ProductsWidget(QWidget):
         super().__init__(parent)
         self.db = db_manager
         self.logger = get_logger(self.__class__.__name__) # Logger para ProductsWidget
+        self._pending_loads = 0
         self._setup_ui()
         self._load_all_data()
 
@@ -48,18 +56,21 @@ class ProductsWidget(QWidget):
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Buscar produto por nome ou código...")
-        self.search_input.textChanged.connect(self._load_products_data) # Conectar ao método correto
+        self.search_controller = SearchController(self.search_input, self._load_products_data)
+        self.search_input.returnPressed.connect(self.search_controller.flush)
         search_layout.addWidget(QLabel("Buscar:"))
         search_layout.addWidget(self.search_input)
         main_layout.addLayout(search_layout)
 
-        # Tabela de produtos
-        self.product_table = QTableWidget()
-        self.product_table.setColumnCount(5)
-        self.product_table.setHorizontalHeaderLabels(["Nome do Produto", "Código", "Marca", "Quantidade Atual", "Localização"])
+        # Tabela de produtos (modelo paginado: as linhas são buscadas conforme a rolagem)
+        self.products_model = ProductsTableModel(self.db, self)
+        self.product_table = QTableView()
+        self.product_table.setModel(self.products_model)
         self.product_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.product_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.product_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.product_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.product_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.product_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.product_table.verticalHeader().setDefaultSectionSize(24) # Altura fixa evita medir cada linha
         self.product_table.doubleClicked.connect(self._show_product_details)
         self.product_table.horizontalHeader().sectionClicked.connect(self._sort_products_table)
         main_layout.addWidget(self.product_table)
@@ -93,7 +104,9 @@ class ProductsWidget(QWidget):
         self.delete_product_btn.setEnabled(False)
         button_layout.addWidget(self.delete_product_btn)
         
-        self.product_table.itemSelectionChanged.connect(self._toggle_action_buttons)
+        self.product_table.selectionModel().selectionChanged.connect(lambda *args: self._toggle_action_buttons())
+        self.products_model.modelReset.connect(self._toggle_action_buttons)
+        self.products_model.loaded.connect(self._on_partial_load_finished)
         
         main_layout.addLayout(button_layout)
 
@@ -111,32 +124,29 @@ class ProductsWidget(QWidget):
         main_layout.addWidget(dashboard_group)
 
     def _load_all_data(self):
+        # As consultas rodam em segundo plano: o indicador é pintado pelo laço de eventos
+        # normalmente e escondido quando a tabela e os indicadores chegam.
         self.logger.info("Carregando todos os dados para ProductsWidget...")
         self.loading_label.show() # Show loading indicator
-        QApplication.processEvents() # Process events to update UI
+        self._pending_loads = 2
         self._load_products_data()
         self._load_dashboard_stats()
-        self.loading_label.hide() # Hide loading indicator
-        self.logger.info("Dados de ProductsWidget carregados com sucesso.")
+
+    def _on_partial_load_finished(self, *args):
+        if self._pending_loads <= 0:
+            return # Recarga da tabela disparada pela busca, fora de _load_all_data
+        self._pending_loads -= 1
+        if self._pending_loads == 0:
+            self.loading_label.hide() # Hide loading indicator
+            self.logger.info("Dados de ProductsWidget carregados com sucesso.")
 
     def _load_products_data(self):
-        search_term = self.search_input.text()
-        products = self.db.get_produtos(search_term)
-        self.product_table.setRowCount(len(products))
-        self.product_table.clearSelection()
-
-        for row_idx, product in enumerate(products):
-            p_id, p_name, p_code, p_brand, p_qty, p_desc, p_location = product
-            
-            item_name = QTableWidgetItem(p_name)
-            item_name.setData(Qt.ItemDataRole.UserRole, p_id) # Armazenar o ID do produto
-            self.product_table.setItem(row_idx, 0, item_name)
-            self.product_table.setItem(row_idx, 1, QTableWidgetItem(p_code if p_code else 'N/A'))
-            self.product_table.setItem(row_idx, 2, QTableWidgetItem(p_brand if p_brand else 'N/A'))
-            self.product_table.setItem(row_idx, 3, QTableWidgetItem(str(p_qty)))
-            self.product_table.setItem(row_idx, 4, QTableWidgetItem(p_location if p_location else 'N/A'))
-
-        self._toggle_action_buttons() # Atualizar estado dos botões após carregar os dados
+        # Recarrega apenas a primeira página; as demais são buscadas pelo modelo durante a rolagem
+        self.products_model.set_search_term(self.search_input.text())
+
+    def _selected_product_row(self):
+        selected_rows = self.product_table.selectionModel().selectedRows()
+        return selected_rows[0].row() if selected_rows else None
 
     def _sort_products_table(self, logical_index):
         # Inicializar current_sort_column e current_sort_order se não existirem
@@ -154,21 +164,27 @@ class ProductsWidget(QWidget):
             self.current_sort_column = logical_index
             self.current_sort_order = Qt.SortOrder.AscendingOrder
 
-        self.product_table.sortItems(self.current_sort_column, self.current_sort_order)
+        self.product_table.horizontalHeader().setSortIndicatorShown(True)
+        self.product_table.horizontalHeader().setSortIndicator(self.current_sort_column, self.current_sort_order)
+        self.products_model.sort(self.current_sort_column, self.current_sort_order)
 
     def _show_product_details(self, index):
-        row = index.row()
-        product_id = self.product_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        product_id = self.products_model.product_id_at(index.row())
         
         if product_id is not None:
             details_window = ProductDetailsWindow(self.db, product_id, self)
             details_window.exec()
 
     def _load_dashboard_stats(self):
-        total_products = self.db.get_total_products_count()
-        low_stock_products = self.db.get_low_stock_products_count()
-        total_brands = self.db.get_total_brands_count()
+        # Leitura de uma única linha, mantida pelos triggers de produtos e marcas
+        QueryRunner.instance().submit(
+            self.db, self.db.get_dashboard_stats, on_result=self._show_dashboard_stats,
+            on_error=self._on_partial_load_finished, key=(self, "dashboard")
+        )
 
+    def _show_dashboard_stats(self, stats):
+        total_products, low_stock_products, total_brands = stats
+        self._on_partial_load_finished()
         self.total_products_label.setText(f"Total de Produtos: {total_products}")
         self.low_stock_label.setText(f"Estoque Baixo: {low_stock_products}")
         self.total_brands_label.setText(f"Total de Marcas: {total_brands}")
@@ -179,12 +195,11 @@ class ProductsWidget(QWidget):
         self.add_product_win.exec()
 
     def _open_edit_product_window(self):
-        selected_items = self.product_table.selectedItems()
-        if not selected_items:
+        row = self._selected_product_row()
+        if row is None:
             QMessageBox.warning(self, "Atenção", "Por favor, selecione um produto para editar.")
             return
-        row = selected_items[0].row()
-        product_id = self.product_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        product_id = self.products_model.product_id_at(row)
         
         if product_id is not None:
             self.edit_product_win = AddProductWindow(self.db, product_id=product_id, parent=self)
@@ -197,19 +212,18 @@ class ProductsWidget(QWidget):
         self.move_stock_win.exec()
 
     def _toggle_action_buttons(self):
-        is_product_selected = self.product_table.currentItem() is not None
+        is_product_selected = self._selected_product_row() is not None
         self.delete_product_btn.setEnabled(is_product_selected)
         self.edit_product_btn.setEnabled(is_product_selected)
 
     def _delete_selected_product(self):
-        selected_items = self.product_table.selectedItems()
-        if not selected_items:
+        row = self._selected_product_row()
+        if row is None:
             QMessageBox.warning(self, "Atenção", "Por favor, selecione um produto para excluir.")
             return
 
-        row = selected_items[0].row()
-        product_id = self.product_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-        product_name = self.product_table.item(row, 0).text()
+        product_id = self.products_model.product_id_at(row)
+        product_name = self.products_model.product_name_at(row)
 
         reply = QMessageBox.question(
             self, "Confirmar Exclusão",
@@ -232,13 +246,14 @@ class ProductsWidget(QWidget):
                 self.logger.error(f"Erro ao excluir produto '{product_name}' (ID: {product_id}): {e}", exc_info=True)
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, db_manager=None):
         super().__init__()
         self.logger = get_logger(self.__class__.__name__) # Logger para MainWindow
         self.setWindowTitle("MeuEstoque - Sistema de Gestão de Estoque")
         self.setGeometry(100, 100, 1200, 700) # Aumentar o tamanho da janela principal
 
-        self.db = DatabaseManager()
+        # Reutiliza o DatabaseManager criado em app.py, evitando uma segunda inicialização do banco
+        self.db = db_manager if db_manager is not None else DatabaseManager()
 
         self.setStyleSheet(open("MeuEstoque/ui/styles.qss").read())
 
@@ -246,6 +261,9 @@ class MainWindow(QMainWindow):
         # self._load_all_data() # Não é mais necessário aqui, cada widget carregará seus próprios dados
         self._setup_help_texts() # Setup help texts
 
+        # Fecha em segundo plano os meses encerrados desde a última execução (saldos para consultas por data)
+        QueryRunner.instance().submit(self.db, self.db.ensure_monthly_snapshots, key=(self, "fechamentos"))
+
     def _setup_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -284,6 +302,7 @@ class MainWindow(QMainWindow):
         self.sidebar.addItem(QListWidgetItem(QIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DirIcon)), "Fornecedores"))
         self.sidebar.addItem(QListWidgetItem(QIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxInformation)), "Compras"))
         self.sidebar.addItem(QListWidgetItem(QIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogYesButton)), "Contas a Pagar"))
+        self.sidebar.addItem(QListWidgetItem(QIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxWarning)), "Estoque Baixo"))
         
         self.sidebar.currentRowChanged.connect(self._change_page)
         content_layout.addWidget(self.sidebar)
@@ -319,6 +338,10 @@ class MainWindow(QMainWindow):
         self.accounts_payable_widget = ManageAccountsPayableWindow(self.db, self) # Temporariamente usando a janela como widget
         self.content_area.addWidget(self.accounts_payable_widget)
 
+        # Estoque Baixo (produtos no mínimo ou abaixo, com o feed de alertas)
+        self.low_stock_widget = LowStockWindow(self.db, self)
+        self.content_area.addWidget(self.low_stock_widget)
+
         # Conectar sinais para recarregar dados quando houver mudanças
         self.products_widget.product_changed.connect(self.products_widget._load_all_data) # Recarregar produtos
         self.brands_widget.brands_changed.connect(self.brands_widget._load_brands) # Recarregar marcas
@@ -342,6 +365,10 @@ class MainWindow(QMainWindow):
         self.content_area.setCurrentIndex(index)
 
     def closeEvent(self, event):
+        SearchController.log_stats(self.logger)
+        ThumbnailCache.log_stats(self.logger)
+        QueryRunner.instance().shutdown()
+        ImageIngestPool.shutdown()
         self.db.close()
         event.accept()
 
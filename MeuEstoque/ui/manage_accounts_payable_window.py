@@ -6,6 +6,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from MeuEstoque.database.database_manager import DatabaseManager
 from MeuEstoque.logger import get_logger
+from MeuEstoque.ui.paged_table_loader import PagedTableLoader
+from MeuEstoque.ui.search_controller import SearchController
 
 class ManageAccountsPayableWindow(QWidget): # Alterado para QWidget
     accounts_changed = pyqtSignal()
@@ -34,7 +36,8 @@ class ManageAccountsPayableWindow(QWidget): # Alterado para QWidget
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Buscar por fornecedor, vencimento ou status...")
-        self.search_input.textChanged.connect(self._load_accounts)
+        self.search_controller = SearchController(self.search_input, self._load_accounts)
+        self.search_input.returnPressed.connect(self.search_controller.flush)
         search_layout.addWidget(QLabel("Buscar:"))
         search_layout.addWidget(self.search_input)
         main_layout.addLayout(search_layout)
@@ -50,6 +53,17 @@ class ManageAccountsPayableWindow(QWidget): # Alterado para QWidget
         self.accounts_table.itemSelectionChanged.connect(self._toggle_action_buttons)
         main_layout.addWidget(self.accounts_table)
 
+        # Carregamento paginado; o clique no cabeçalho ordena pelo banco
+        self.accounts_loader = PagedTableLoader(
+            self.accounts_table,
+            self.db,
+            self.db.get_contas_a_pagar_page,
+            self._fill_account_row,
+            ["fornecedor", "data_emissao", "data_vencimento", "valor", "valor_pago", "status", None],
+            "data_vencimento"
+        )
+        self.accounts_loader.loaded.connect(self._toggle_action_buttons)
+
         # Diálogo de Pagamento (integrado na janela para simplicidade)
         self.payment_dialog_group = QGroupBox("Registrar Pagamento")
         payment_layout = QFormLayout(self.payment_dialog_group)
@@ -97,38 +111,35 @@ class ManageAccountsPayableWindow(QWidget): # Alterado para QWidget
         main_layout.addLayout(action_buttons_layout)
 
     def _load_accounts(self):
-        search_term = self.search_input.text()
-        accounts = self.db.get_contas_a_pagar(search_term)
-        self.accounts_table.setRowCount(len(accounts))
-
-        for row_idx, account in enumerate(accounts):
-            account_id = account[0]
-            supplier_name = account[1]
-            purchase_issue_date = account[2]
-            due_date = account[3]
-            value = account[4]
-            paid_value = account[5]
-            status = account[6]
-
-            self.accounts_table.setItem(row_idx, 0, QTableWidgetItem(supplier_name))
-            self.accounts_table.setItem(row_idx, 1, QTableWidgetItem(purchase_issue_date))
-            self.accounts_table.setItem(row_idx, 2, QTableWidgetItem(due_date))
-            
-            value_item = QTableWidgetItem(f"R$ {value:.2f}")
-            value_item.setTextAlignment(0x0004 | 0x0080) # Usando valores inteiros diretos para AlignRight | AlignVCenter
-            self.accounts_table.setItem(row_idx, 3, value_item)
-
-            paid_value_item = QTableWidgetItem(f"R$ {paid_value:.2f}")
-            paid_value_item.setTextAlignment(0x0004 | 0x0080) # Usando valores inteiros diretos para AlignRight | AlignVCenter
-            self.accounts_table.setItem(row_idx, 4, paid_value_item)
-            
-            self.accounts_table.setItem(row_idx, 5, QTableWidgetItem(status))
-            
-            id_item = QTableWidgetItem(str(account_id))
-            id_item.setData(Qt.ItemDataRole.UserRole, account_id)
-            self.accounts_table.setItem(row_idx, 6, id_item)
+        # accounts_changed não é emitido aqui: ele está ligado a _load_accounts e recarregaria em laço
+        self.accounts_loader.reload(self.search_input.text())
+
+    def _fill_account_row(self, row_idx, account):
+        account_id = account[0]
+        supplier_name = account[1]
+        purchase_issue_date = account[2]
+        due_date = account[3]
+        value = account[4]
+        paid_value = account[5]
+        status = account[6]
+
+        self.accounts_table.setItem(row_idx, 0, QTableWidgetItem(supplier_name))
+        self.accounts_table.setItem(row_idx, 1, QTableWidgetItem(purchase_issue_date))
+        self.accounts_table.setItem(row_idx, 2, QTableWidgetItem(due_date))
+        
+        value_item = QTableWidgetItem(f"R$ {value:.2f}")
+        value_item.setTextAlignment(0x0004 | 0x0080) # Usando valores inteiros diretos para AlignRight | AlignVCenter
+        self.accounts_table.setItem(row_idx, 3, value_item)
+
+        paid_value_item = QTableWidgetItem(f"R$ {paid_value:.2f}")
+        paid_value_item.setTextAlignment(0x0004 | 0x0080) # Usando valores inteiros diretos para AlignRight | AlignVCenter
+        self.accounts_table.setItem(row_idx, 4, paid_value_item)
+        
+        self.accounts_table.setItem(row_idx, 5, QTableWidgetItem(status))
         
-        self.accounts_changed.emit()
+        id_item = QTableWidgetItem(str(account_id))
+        id_item.setData(Qt.ItemDataRole.UserRole, account_id)
+        self.accounts_table.setItem(row_idx, 6, id_item)
 
     def _toggle_action_buttons(self):
         is_account_selected = self.accounts_table.currentItem() is not None
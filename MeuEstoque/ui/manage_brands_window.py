@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from MeuEstoque.database.database_manager import DatabaseManager
 from MeuEstoque.logger import get_logger
+from MeuEstoque.ui.query_runner import QueryRunner
 
 class ManageBrandsWindow(QWidget):
     brands_changed = pyqtSignal()
@@ -14,6 +15,7 @@ class ManageBrandsWindow(QWidget):
         self.db = db_manager
         self.logger = get_logger(self.__class__.__name__)
         self.current_brand_id = None
+        self.sort_descending = False
 
         self.setStyleSheet(open("MeuEstoque/ui/styles.qss").read())
 
@@ -36,6 +38,10 @@ class ManageBrandsWindow(QWidget):
         self.search_input.textChanged.connect(self._load_brands)
         search_layout.addWidget(QLabel("Buscar:"))
         search_layout.addWidget(self.search_input)
+        self.sort_btn = QPushButton("A-Z")
+        self.sort_btn.setToolTip("Alternar a ordem alfabética da lista")
+        self.sort_btn.clicked.connect(self._toggle_sort_order)
+        search_layout.addWidget(self.sort_btn)
         main_layout.addLayout(search_layout)
 
         # Layout principal (lista de marcas e formulário)
@@ -91,8 +97,13 @@ class ManageBrandsWindow(QWidget):
         main_layout.addLayout(action_buttons)
 
     def _load_brands(self):
-        search_term = self.search_input.text()
-        
+        # Carregar marcas do banco de dados em segundo plano (filtro sem acentos e sem diferenciar maiúsculas)
+        QueryRunner.instance().submit(
+            self.db, self.db.get_marcas, self.search_input.text(), descending=self.sort_descending,
+            on_result=self._fill_brands, key=(self, "marcas")
+        )
+
+    def _fill_brands(self, filtered_brands):
         # Salvar o item selecionado atualmente
         currently_selected_id = None
         selected_items = self.brands_list.selectedItems()
@@ -103,10 +114,6 @@ class ManageBrandsWindow(QWidget):
         # Limpar a lista
         self.brands_list.clear()
         
-        # Carregar marcas do banco de dados
-        brands = self.db.get_marcas()
-        filtered_brands = [brand for brand in brands if search_term.lower() in brand[1].lower()]
-        
         for brand in filtered_brands:
             brand_id, brand_name = brand
             item = QListWidgetItem(brand_name)
@@ -122,6 +129,11 @@ class ManageBrandsWindow(QWidget):
         self.edit_brand_btn.setEnabled(is_item_selected)
         self.delete_brand_btn.setEnabled(is_item_selected)
 
+    def _toggle_sort_order(self):
+        self.sort_descending = not self.sort_descending
+        self.sort_btn.setText("Z-A" if self.sort_descending else "A-Z")
+        self._load_brands()
+
     def _brand_selected(self, item):
         brand_id = item.data(Qt.ItemDataRole.UserRole)
         brand_name = item.text()
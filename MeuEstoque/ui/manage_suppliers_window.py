@@ -5,6 +5,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from MeuEstoque.database.database_manager import DatabaseManager
 from MeuEstoque.logger import get_logger
+from MeuEstoque.ui.paged_table_loader import PagedTableLoader
+from MeuEstoque.ui.search_controller import SearchController
 
 class ManageSuppliersWindow(QWidget): # Alterado para QWidget
     suppliers_changed = pyqtSignal()
@@ -33,7 +35,8 @@ class ManageSuppliersWindow(QWidget): # Alterado para QWidget
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Buscar fornecedor por nome...")
-        self.search_input.textChanged.connect(self._load_suppliers)
+        self.search_controller = SearchController(self.search_input, self._load_suppliers)
+        self.search_input.returnPressed.connect(self.search_controller.flush)
         search_layout.addWidget(QLabel("Buscar:"))
         search_layout.addWidget(self.search_input)
         main_layout.addLayout(search_layout)
@@ -50,6 +53,16 @@ class ManageSuppliersWindow(QWidget): # Alterado para QWidget
         self.suppliers_table.setColumnHidden(5, True)
         main_layout.addWidget(self.suppliers_table)
 
+        # Carregamento paginado; o clique no cabeçalho ordena pelo banco
+        self.suppliers_loader = PagedTableLoader(
+            self.suppliers_table,
+            self.db,
+            self.db.get_fornecedores_page,
+            self._fill_supplier_row,
+            ["nome", "contato", "telefone", "email", "endereco", None],
+            "nome"
+        )
+
         # Formulário de Fornecedor (para adicionar/editar)
         self.form_group = QGroupBox("Detalhes do Fornecedor")
         self.form_layout = QFormLayout(self.form_group)
@@ -104,34 +117,20 @@ class ManageSuppliersWindow(QWidget): # Alterado para QWidget
         main_layout.addLayout(action_buttons_layout)
 
     def _load_suppliers(self):
-        search_term = self.search_input.text()
-        suppliers = self.db.get_fornecedores(search_term)
+        # O carregador preenche a tabela com os sinais bloqueados, então recarregar não
+        # aciona _toggle_action_buttons (nem esconde o formulário aberto)
+        self.suppliers_loader.reload(self.search_input.text())
+
+    def _fill_supplier_row(self, row_idx, supplier):
+        self.suppliers_table.setItem(row_idx, 0, QTableWidgetItem(supplier[1]))
+        self.suppliers_table.setItem(row_idx, 1, QTableWidgetItem(supplier[2] if supplier[2] else 'N/A'))
+        self.suppliers_table.setItem(row_idx, 2, QTableWidgetItem(supplier[3] if supplier[3] else 'N/A'))
+        self.suppliers_table.setItem(row_idx, 3, QTableWidgetItem(supplier[4] if supplier[4] else 'N/A'))
+        self.suppliers_table.setItem(row_idx, 4, QTableWidgetItem(supplier[5] if supplier[5] else 'N/A'))
         
-        # Desconectar o sinal antes de limpar e preencher a tabela
-        try:
-            self.suppliers_table.itemSelectionChanged.disconnect(self._toggle_action_buttons)
-        except TypeError:
-            pass # O sinal pode não estar conectado na primeira execução
-
-        self.suppliers_table.setRowCount(len(suppliers))
-        self.suppliers_table.clearSelection() # Limpar seleção para evitar acionar _toggle_action_buttons
-
-        for row_idx, supplier in enumerate(suppliers):
-            self.suppliers_table.setItem(row_idx, 0, QTableWidgetItem(supplier[1]))
-            self.suppliers_table.setItem(row_idx, 1, QTableWidgetItem(supplier[2] if supplier[2] else 'N/A'))
-            self.suppliers_table.setItem(row_idx, 2, QTableWidgetItem(supplier[3] if supplier[3] else 'N/A'))
-            self.suppliers_table.setItem(row_idx, 3, QTableWidgetItem(supplier[4] if supplier[4] else 'N/A'))
-            self.suppliers_table.setItem(row_idx, 4, QTableWidgetItem(supplier[5] if supplier[5] else 'N/A'))
-            
-            id_item = QTableWidgetItem(str(supplier[0]))
-            id_item.setData(Qt.ItemDataRole.UserRole, supplier[0])
-            self.suppliers_table.setItem(row_idx, 5, id_item)
-
-        # Reconectar o sinal após preencher a tabela
-        self.suppliers_table.itemSelectionChanged.connect(self._toggle_action_buttons)
-        # A chamada a _toggle_action_buttons() aqui estava causando a recursão.
-        # A visibilidade inicial dos botões será definida no _setup_ui ou no __init__.
-        # self._toggle_action_buttons() 
+        id_item = QTableWidgetItem(str(supplier[0]))
+        id_item.setData(Qt.ItemDataRole.UserRole, supplier[0])
+        self.suppliers_table.setItem(row_idx, 5, id_item)
 
     def _toggle_action_buttons(self):
         is_supplier_selected = self.suppliers_table.currentItem() is not None
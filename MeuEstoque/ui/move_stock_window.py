@@ -10,6 +10,8 @@ from PyQt6.QtCore import pyqtSignal, QStringListModel, Qt
 from PyQt6.QtGui import QPixmap
 
 from MeuEstoque.database.database_manager import DatabaseManager
+from MeuEstoque.ui.search_controller import SearchController
+from MeuEstoque.ui.query_runner import QueryRunner
 
 class MoveStockWindow(QDialog):
     stock_changed = pyqtSignal() # Sinal renomeado para indicar movimentação de estoque
@@ -38,7 +40,8 @@ class MoveStockWindow(QDialog):
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Buscar produto por nome ou código...")
-        self.search_input.textChanged.connect(self._load_products_table)
+        self.search_controller = SearchController(self.search_input, self._load_products_table)
+        self.search_input.returnPressed.connect(self.search_controller.flush)
         search_layout.addWidget(QLabel("Buscar:"))
         search_layout.addWidget(self.search_input)
         product_selection_layout.addLayout(search_layout)
@@ -116,8 +119,13 @@ class MoveStockWindow(QDialog):
         main_layout.addWidget(movement_group)
 
     def _load_products_table(self):
-        search_term = self.search_input.text()
-        products = self.db.get_produtos(search_term)
+        # Busca em segundo plano; uma busca mais nova cancela a anterior (mesma chave)
+        QueryRunner.instance().submit(
+            self.db, self.db.get_produtos, self.search_input.text(),
+            on_result=self._fill_products_table, key=(self, "produtos")
+        )
+
+    def _fill_products_table(self, products):
         self.product_table.setRowCount(len(products))
 
         self.products_data = {} # Resetar para a nova busca
@@ -0,0 +1,100 @@
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+from MeuEstoque.logger import get_logger
+from MeuEstoque.ui.query_runner import QueryRunner
+
+
+class PagedTableLoader(QObject):
+    """
+    Carrega um QTableWidget em páginas (paginação por chave do DatabaseManager) e
+    transforma o clique no cabeçalho em ORDER BY no banco. As páginas são buscadas em
+    segundo plano pelo QueryRunner; uma recarga mais nova cancela a anterior.
+
+    fetch_page(search_term, after=, sort_by=, descending=) -> (linhas, próxima_chave)
+    fill_row(índice_da_linha, linha) preenche os itens de uma linha da tabela.
+    sort_keys lista a chave de ordenação de cada coluna (None para colunas não ordenáveis).
+    """
+    loaded = pyqtSignal() # Emitido quando a primeira página de uma recarga é exibida
+
+    def __init__(self, table, db_manager, fetch_page, fill_row, sort_keys, sort_by, descending=False, parent=None):
+        super().__init__(parent or table)
+        self.table = table
+        self.db = db_manager
+        self.fetch_page = fetch_page
+        self.fill_row = fill_row
+        self.sort_keys = sort_keys
+        self.sort_by = sort_by
+        self.descending = descending
+        self.search_term = ""
+        self.next_key = None
+        self._loading = False
+        self.runner = QueryRunner.instance()
+        self.logger = get_logger(self.__class__.__name__)
+
+        header = self.table.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(self.sort_keys.index(sort_by), self._qt_order())
+        header.sectionClicked.connect(self._on_header_clicked)
+        self.table.verticalScrollBar().valueChanged.connect(self._on_scroll)
+
+    def _qt_order(self):
+        return Qt.SortOrder.DescendingOrder if self.descending else Qt.SortOrder.AscendingOrder
+
+    def _submit(self, after, on_result):
+        self._loading = True
+        self.runner.submit(
+            self.db, self.fetch_page, self.search_term, after=after, sort_by=self.sort_by,
+            descending=self.descending, on_result=on_result, on_error=self._on_error, key=self
+        )
+
+    def reload(self, search_term=None):
+        if search_term is not None:
+            self.search_term = search_term
+        # A tabela só é limpa quando o resultado chega; até lá mantém o resultado anterior
+        self._submit(None, self._on_first_page)
+
+    def load_more(self):
+        if self.next_key is None or self._loading:
+            return
+        self._submit(self.next_key, self._append)
+
+    def _on_first_page(self, page):
+        # Sinais bloqueados: limpar e preencher não dispara itemSelectionChanged linha a linha
+        self.table.blockSignals(True)
+        self.table.setRowCount(0)
+        self._append(page)
+        self.table.blockSignals(False)
+        self.loaded.emit()
+
+    def _append(self, page):
+        rows, next_key = page
+        self._loading = False
+        self.next_key = next_key
+        first = self.table.rowCount()
+        self.table.setRowCount(first + len(rows))
+        for offset, row in enumerate(rows):
+            self.fill_row(first + offset, row)
+        self.logger.debug(f"{len(rows)} linhas adicionadas (total {self.table.rowCount()}).")
+
+    def _on_error(self, error):
+        self._loading = False
+
+    def _on_scroll(self, value):
+        # Busca a próxima página quando a rolagem chega ao fim da tabela
+        if self.next_key is not None and value >= self.table.verticalScrollBar().maximum():
+            self.load_more()
+
+    def _on_header_clicked(self, logical_index):
+        sort_key = self.sort_keys[logical_index] if logical_index < len(self.sort_keys) else None
+        if sort_key is None:
+            # Coluna não ordenável: mantém o indicador na ordenação atual
+            self.table.horizontalHeader().setSortIndicator(self.sort_keys.index(self.sort_by), self._qt_order())
+            return
+        if sort_key == self.sort_by:
+            self.descending = not self.descending
+        else:
+            self.sort_by = sort_key
+            self.descending = False
+        self.table.horizontalHeader().setSortIndicator(logical_index, self._qt_order())
+        self.reload()
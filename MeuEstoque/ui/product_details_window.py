@@ -2,13 +2,17 @@ import sys
 import os
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QMessageBox,
-    QGridLayout, QGroupBox, QSizePolicy, QApplication, QStyle
+    QGridLayout, QGroupBox, QSizePolicy, QApplication, QStyle, QTabWidget,
+    QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPixmap, QImage, QIcon
 
 from MeuEstoque.database.database_manager import DatabaseManager
 from MeuEstoque.logger import get_logger
+from MeuEstoque.ui.image_loader import ImageLoader
+from MeuEstoque.ui.paged_table_loader import PagedTableLoader
+from MeuEstoque.ui.query_runner import QueryRunner
 
 logger = get_logger(__name__)
 
@@ -20,11 +24,18 @@ class ProductDetailsWindow(QDialog):
         self.product_id = product_id
         self.image_paths = []
         self.current_image_index = 0
+        self.shown_image_path = None
+        self.image_loader = ImageLoader(self)
+        self.image_loader.loaded.connect(self._on_image_loaded)
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(150)
+        self.resize_timer.timeout.connect(self._display_current_image)
         self.setStyleSheet(open("MeuEstoque/ui/styles.qss").read())
         
         self._setup_ui()
-        self._load_product_details()
-        self._load_product_images() # This will now also call _display_current_image
+        self._load_product_details() # Também carrega as imagens e chama _display_current_image
+        self._load_history()
 
         # Centralizar e redimensionar a janela dinamicamente
         screen_geometry = QApplication.primaryScreen().availableGeometry()
@@ -51,8 +62,9 @@ class ProductDetailsWindow(QDialog):
         self.setMaximumSize(screen_geometry.width(), screen_geometry.height())
 
     def resizeEvent(self, event):
-        # Redimensionar a imagem quando a janela for redimensionada
-        self._display_current_image()
+        # Redimensionar a imagem quando a janela para de ser redimensionada; até lá a imagem
+        # atual continua na tela, sem uma decodificação por evento
+        self.resize_timer.start()
         super().resizeEvent(event)
 
     def _setup_ui(self):
@@ -67,6 +79,10 @@ class ProductDetailsWindow(QDialog):
         self.product_brand_label = QLabel("Marca: ")
         self.product_qty_label = QLabel("Quantidade Atual: ")
         self.product_location_label = QLabel("Localização: ")
+        self.product_min_stock_label = QLabel("Estoque Mínimo: ")
+        self.last_movement_label = QLabel("Última Movimentação: ")
+        self.last_purchase_price_label = QLabel("Último Preço de Compra: ")
+        self.movement_count_label = QLabel("Total de Movimentações: ")
 
         details_layout.addWidget(self.product_name_label)
         details_layout.addWidget(self.product_code_label)
@@ -74,6 +90,10 @@ class ProductDetailsWindow(QDialog):
         details_layout.addWidget(self.product_brand_label)
         details_layout.addWidget(self.product_qty_label)
         details_layout.addWidget(self.product_location_label)
+        details_layout.addWidget(self.product_min_stock_label)
+        details_layout.addWidget(self.last_movement_label)
+        details_layout.addWidget(self.last_purchase_price_label)
+        details_layout.addWidget(self.movement_count_label)
         main_layout.addWidget(details_group)
 
         # Seção de Imagens do Produto
@@ -103,37 +123,108 @@ class ProductDetailsWindow(QDialog):
         images_layout.addLayout(image_display_layout)
         main_layout.addWidget(images_group)
 
+        # Seção de Histórico de Movimentações
+        history_group = QGroupBox("Histórico de Movimentações")
+        history_layout = QVBoxLayout(history_group)
+        self.history_tabs = QTabWidget()
+
+        self.movements_table = self._create_history_table(["Data/Hora", "Tipo", "Quantidade", "Observação"])
+        self.history_tabs.addTab(self.movements_table, "Movimentações")
+        # Página mais recente primeiro; as mais antigas são buscadas ao rolar até o fim
+        self.movements_loader = PagedTableLoader(
+            self.movements_table,
+            self.db,
+            lambda search_term, **kwargs: self.db.get_movimentacoes_page(self.product_id, **kwargs),
+            self._fill_movement_row,
+            ["data_hora", None, None, None],
+            "data_hora",
+            descending=True
+        )
+
+        self.daily_table = self._create_history_table(["Dia", "Entradas", "Saídas", "Movimentações"])
+        self.history_tabs.addTab(self.daily_table, "Por Dia")
+        self.monthly_table = self._create_history_table(["Mês", "Entradas", "Saídas", "Movimentações"])
+        self.history_tabs.addTab(self.monthly_table, "Por Mês")
+
+        history_layout.addWidget(self.history_tabs)
+        main_layout.addWidget(history_group)
+
         # Botão Fechar
         close_btn = QPushButton("Fechar")
         close_btn.clicked.connect(self.accept)
         main_layout.addWidget(close_btn)
 
     def _load_product_details(self):
-        product = self.db.get_produto_by_id(self.product_id)
+        # Produto, marca, imagens e resumo das movimentações e compras numa única consulta
+        product = self.db.get_product_detail(self.product_id)
         if product:
-            # product: id, nome_produto, codigo_produto, descricao, marca_id, quantidade_atual, localizacao
-            marca_id = product[4]
-            marca_nome = "N/A"
-            if marca_id:
-                marcas = self.db.get_marcas()
-                for mid, mname in marcas:
-                    if mid == marca_id:
-                        marca_nome = mname
-                        break
-
-            self.product_name_label.setText(f"Nome do Produto: {product[1]}")
-            self.product_code_label.setText(f"Código: {product[2] if product[2] else 'N/A'}")
-            self.product_desc_label.setText(f"Descrição: {product[3] if product[3] else 'N/A'}")
-            self.product_brand_label.setText(f"Marca: {marca_nome}")
-            self.product_qty_label.setText(f"Quantidade Atual: {product[5]}")
-            self.product_location_label.setText(f"Localização: {product[6] if product[6] else 'N/A'}")
+            self.product_name_label.setText(f"Nome do Produto: {product.nome_produto}")
+            self.product_code_label.setText(f"Código: {product.codigo_produto if product.codigo_produto else 'N/A'}")
+            self.product_desc_label.setText(f"Descrição: {product.descricao if product.descricao else 'N/A'}")
+            self.product_brand_label.setText(f"Marca: {product.marca_nome if product.marca_nome else 'N/A'}")
+            self.product_qty_label.setText(f"Quantidade Atual: {product.quantidade_atual}")
+            self.product_location_label.setText(f"Localização: {product.localizacao if product.localizacao else 'N/A'}")
+            self.product_min_stock_label.setText(f"Estoque Mínimo: {product.estoque_minimo}")
+            if product.ultima_movimentacao:
+                tipo, quantidade, data_hora = product.ultima_movimentacao
+                self.last_movement_label.setText(f"Última Movimentação: {tipo} de {quantidade} em {data_hora}")
+            else:
+                self.last_movement_label.setText("Última Movimentação: N/A")
+            if product.ultimo_preco_compra is not None:
+                self.last_purchase_price_label.setText(f"Último Preço de Compra: R$ {product.ultimo_preco_compra:.2f}")
+            else:
+                self.last_purchase_price_label.setText("Último Preço de Compra: N/A")
+            self.movement_count_label.setText(f"Total de Movimentações: {product.total_movimentacoes}")
+            self._load_product_images(product.imagens)
         else:
             logger.warning(f"Produto com ID {self.product_id} não encontrado.")
             QMessageBox.warning(self, "Erro", "Produto não encontrado.")
             self.accept()
 
-    def _load_product_images(self):
-        self.image_paths = self.db.get_product_images(self.product_id)
+    def _create_history_table(self, headers):
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        return table
+
+    def _load_history(self):
+        self.movements_loader.reload()
+        runner = QueryRunner.instance()
+        runner.submit(
+            self.db, self.db.get_movimentacoes_resumo, self.product_id, "dia",
+            on_result=lambda rows: self._fill_summary_table(self.daily_table, rows), key=(self, "dia")
+        )
+        runner.submit(
+            self.db, self.db.get_movimentacoes_resumo, self.product_id, "mes",
+            on_result=lambda rows: self._fill_summary_table(self.monthly_table, rows), key=(self, "mes")
+        )
+
+    def _fill_movement_row(self, row_idx, movement):
+        movement_id, tipo, quantidade, data_hora, observacao = movement
+        self.movements_table.setItem(row_idx, 0, QTableWidgetItem(data_hora))
+        self.movements_table.setItem(row_idx, 1, QTableWidgetItem(tipo))
+        qty_item = QTableWidgetItem(str(quantidade))
+        qty_item.setTextAlignment(int(Qt.AlignmentFlag.AlignRight) | int(Qt.AlignmentFlag.AlignVCenter))
+        self.movements_table.setItem(row_idx, 2, qty_item)
+        self.movements_table.setItem(row_idx, 3, QTableWidgetItem(observacao if observacao else ""))
+
+    def _fill_summary_table(self, table, rows):
+        # rows: (período, entradas, saídas, número de movimentações), mais recente primeiro
+        table.setRowCount(len(rows))
+        for row_idx, row in enumerate(rows):
+            table.setItem(row_idx, 0, QTableWidgetItem(row[0]))
+            for column in (1, 2, 3):
+                item = QTableWidgetItem(str(row[column]))
+                item.setTextAlignment(int(Qt.AlignmentFlag.AlignRight) | int(Qt.AlignmentFlag.AlignVCenter))
+                table.setItem(row_idx, column, item)
+
+    def _load_product_images(self, image_paths):
+        # Imagens recarregadas (ex. após uma edição): falhas de leitura anteriores não valem mais
+        self.image_loader.invalidate()
+        self.image_paths = image_paths
         self.current_image_index = 0
         self._display_current_image()
 
@@ -145,29 +236,39 @@ class ProductDetailsWindow(QDialog):
             return
 
         current_path = self.image_paths[self.current_image_index]
+        target_size = self.image_label.size()
         logger.info(f"Tentando carregar imagem: {current_path}")
 
-        if os.path.exists(current_path):
-            pixmap = QPixmap(current_path)
-            if not pixmap.isNull():
-                # Escalar a imagem para caber no QLabel, mantendo a proporção
-                scaled_pixmap = pixmap.scaled(
-                    self.image_label.size(),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                self.image_label.setPixmap(scaled_pixmap)
-                self.image_label.setText("") # Limpa o texto se a imagem for carregada
-                logger.info(f"Imagem carregada com sucesso: {current_path}")
-            else:
-                self.image_label.setText(f"Erro ao carregar imagem: {os.path.basename(current_path)}")
-                logger.error(f"Erro ao carregar imagem (QPixmap is null): {current_path}")
-        else:
+        if not os.path.exists(current_path):
             self.image_label.setText(f"Arquivo não encontrado: {os.path.basename(current_path)}")
             logger.warning(f"Erro: Arquivo de imagem não encontrado no caminho: {current_path}")
-        
+        elif self.image_loader.has_failed(current_path):
+            self.image_label.setText(f"Erro ao carregar imagem: {os.path.basename(current_path)}")
+        else:
+            # Decodificada em segundo plano, já no tamanho do QLabel; enquanto não fica pronta,
+            # a imagem anterior (num redimensionamento) ou um aviso de carregamento é exibido
+            pixmap = self.image_loader.request(current_path, target_size)
+            if pixmap is not None:
+                self.image_label.setPixmap(pixmap)
+                self.image_label.setText("") # Limpa o texto se a imagem for carregada
+                self.shown_image_path = current_path
+            elif self.shown_image_path != current_path:
+                self.image_label.clear()
+                self.image_label.setText("Carregando imagem...")
+            self._prefetch_neighbour_images(target_size)
+
         self._update_navigation_buttons()
 
+    def _prefetch_neighbour_images(self, target_size):
+        # Anterior e próxima decodificadas enquanto a atual está na tela: navegar não espera
+        for index in (self.current_image_index + 1, self.current_image_index - 1):
+            if 0 <= index < len(self.image_paths) and os.path.exists(self.image_paths[index]):
+                self.image_loader.request(self.image_paths[index], target_size)
+
+    def _on_image_loaded(self, path, success):
+        if self.image_paths and path == self.image_paths[self.current_image_index]:
+            self._display_current_image()
+
     def _update_navigation_buttons(self):
         if len(self.image_paths) > 1:
             self.prev_button.setVisible(True)
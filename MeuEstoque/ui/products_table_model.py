@@ -0,0 +1,110 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from MeuEstoque.logger import get_logger
+from MeuEstoque.ui.query_runner import QueryRunner
+
+
+class ProductsTableModel(QAbstractTableModel):
+    """
+    Modelo da tabela de produtos que busca as linhas em páginas conforme a rolagem
+    (canFetchMore/fetchMore), em vez de carregar o catálogo inteiro de uma vez.
+    As páginas são buscadas em segundo plano pelo QueryRunner.
+    """
+    loaded = pyqtSignal() # Emitido quando a primeira página de uma recarga é exibida
+    HEADERS = ["Nome do Produto", "Código", "Marca", "Quantidade Atual", "Localização"]
+    # Chave de ordenação (DatabaseManager.PRODUTOS_SORT_COLUMNS) de cada coluna
+    SORT_KEYS = ["nome_produto", "codigo_produto", "marca", "quantidade_atual", "localizacao"]
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db = db_manager
+        self.logger = get_logger(self.__class__.__name__)
+        self._rows = [] # (id, nome, código, marca, quantidade, descrição, localização)
+        self._next_key = None
+        self._search_term = ""
+        self._sort_by = "nome_produto"
+        self._descending = False
+        self._fetching = False
+        self.runner = QueryRunner.instance()
+
+    def set_search_term(self, search_term):
+        self._search_term = search_term
+        self.reload()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        # A ordenação é feita pelo banco (ORDER BY indexado), não sobre as linhas já carregadas
+        self._sort_by = self.SORT_KEYS[column]
+        self._descending = order == Qt.SortOrder.DescendingOrder
+        self.reload()
+
+    def _fetch_page(self, on_result, after=None):
+        self._fetching = True
+        self.runner.submit(
+            self.db, self.db.get_produtos_page, self._search_term, after=after, sort_by=self._sort_by,
+            descending=self._descending, on_result=on_result, on_error=self._on_error, key=self
+        )
+
+    def reload(self):
+        # O modelo só é reiniciado quando o resultado chega; até lá mantém as linhas anteriores
+        self._fetch_page(self._on_first_page)
+
+    def _on_first_page(self, page):
+        self._fetching = False
+        self.beginResetModel()
+        self._rows, self._next_key = page
+        self.endResetModel()
+        self.logger.debug(f"Primeira página de produtos carregada ({len(self._rows)} linhas).")
+        self.loaded.emit()
+
+    def _on_error(self, error):
+        self._fetching = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        p_id, p_name, p_code, p_brand, p_qty, p_desc, p_location = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            values = (p_name, p_code if p_code else 'N/A', p_brand if p_brand else 'N/A', str(p_qty),
+                      p_location if p_location else 'N/A')
+            return values[column]
+        if role == Qt.ItemDataRole.TextAlignmentRole and column == 3:
+            return int(Qt.AlignmentFlag.AlignRight) | int(Qt.AlignmentFlag.AlignVCenter)
+        if role == Qt.ItemDataRole.ToolTipRole and column == 0 and p_desc:
+            return p_desc
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._next_key is not None and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._fetch_page(self._on_next_page, after=self._next_key)
+
+    def _on_next_page(self, page):
+        self._fetching = False
+        rows, self._next_key = page
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def product_id_at(self, row):
+        return self._rows[row][0]
+
+    def product_name_at(self, row):
+        return self._rows[row][1]
@@ -0,0 +1,123 @@
+import sqlite3
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from MeuEstoque.logger import get_logger
+
+
+class _QuerySignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    cancelled = pyqtSignal()
+
+
+class _QueryTask(QRunnable):
+    # Executa a consulta numa thread do QThreadPool, usando a conexão dessa thread
+    def __init__(self, db_manager, func, args, kwargs, is_cancelled):
+        super().__init__()
+        self.db = db_manager
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.is_cancelled = is_cancelled
+        self.signals = _QuerySignals()
+        self.setAutoDelete(False) # O QueryRunner descarta a tarefa após entregar o resultado
+
+    def run(self):
+        try:
+            with self.db.cancel_when(self.is_cancelled):
+                result = self.func(*self.args, **self.kwargs)
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                self.signals.cancelled.emit()
+            else:
+                self.signals.failed.emit(e)
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class QueryRunner(QObject):
+    """
+    Executa consultas do DatabaseManager fora da thread da interface e entrega o resultado
+    ao widget por sinais (on_result é chamado na thread da interface).
+
+    Consultas enviadas com a mesma `key` se substituem: a mais nova cancela a anterior
+    (progress handler do SQLite) e só o resultado mais recente é entregue.
+    """
+    # Contadores de todas as consultas em segundo plano, para a instrumentação
+    stats = {"executadas": 0, "canceladas": 0, "falhas": 0}
+    _instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+        # Cada thread do pool mantém a sua conexão com o banco (DatabaseManager indexa as conexões
+        # pela thread); sem expiração, o número de conexões fica limitado ao de threads do pool
+        self.pool.setExpiryTimeout(-1)
+        self.logger = get_logger(self.__class__.__name__)
+        self._latest = {} # key -> tarefa mais recente
+        self._tasks = set() # Mantém as tarefas (e seus sinais) vivas até a entrega
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def submit(self, db_manager, func, *args, on_result=None, on_error=None, key=None, **kwargs):
+        task = _QueryTask(db_manager, func, args, kwargs, None)
+        if key is not None:
+            self._latest[key] = task
+            task.is_cancelled = lambda: self._latest.get(key) is not task
+        else:
+            task.is_cancelled = lambda: False
+
+        def finished(result):
+            self._tasks.discard(task)
+            if task.is_cancelled():
+                # Concluída, mas já substituída por uma consulta mais nova
+                QueryRunner.stats["canceladas"] += 1
+                return
+            self._forget(key, task)
+            if on_result is not None:
+                on_result(result)
+
+        def cancelled():
+            self._tasks.discard(task)
+            QueryRunner.stats["canceladas"] += 1
+
+        def failed(error):
+            self._tasks.discard(task)
+            self._forget(key, task)
+            QueryRunner.stats["falhas"] += 1
+            self.logger.error(f"Erro na consulta em segundo plano {getattr(func, '__name__', func)}: {error}")
+            if on_error is not None:
+                on_error(error)
+
+        task.signals.finished.connect(finished)
+        task.signals.cancelled.connect(cancelled)
+        task.signals.failed.connect(failed)
+        self._tasks.add(task)
+        QueryRunner.stats["executadas"] += 1
+        self.pool.start(task)
+        return task
+
+    def shutdown(self, timeout_ms=3000):
+        # Ao encerrar: sem entradas em _latest, as consultas com chave em andamento são
+        # abortadas pelo progress handler; aguarda as threads antes de fechar as conexões
+        self._latest.clear()
+        self.pool.waitForDone(timeout_ms)
+
+    def _forget(self, key, task):
+        if key is not None and self._latest.get(key) is task:
+            del self._latest[key]
+
+    @classmethod
+    def log_stats(cls, logger):
+        stats = cls.stats
+        logger.info(
+            f"Consultas em segundo plano: {stats['executadas']} executadas, "
+            f"{stats['canceladas']} canceladas, {stats['falhas']} com falha."
+        )
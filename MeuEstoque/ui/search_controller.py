@@ -0,0 +1,51 @@
+from PyQt6.QtCore import QObject, QTimer
+
+from MeuEstoque.config import SEARCH_DEBOUNCE_MS
+from MeuEstoque.logger import get_logger
+from MeuEstoque.ui.query_runner import QueryRunner
+
+
+class SearchController(QObject):
+    """
+    Busca enquanto o usuário digita: a consulta só é executada após SEARCH_DEBOUNCE_MS
+    sem novas teclas. run_search() recarrega a listagem em segundo plano pelo QueryRunner
+    com uma chave fixa, de modo que a busca mais nova cancela a que ainda estiver em
+    andamento e só o termo mais recente chega à tabela.
+    """
+    # Alterações de termo em todas as listagens, para a instrumentação
+    stats = {"digitados": 0, "buscas": 0}
+
+    def __init__(self, search_input, run_search, delay_ms=SEARCH_DEBOUNCE_MS, parent=None):
+        super().__init__(parent or search_input)
+        self.search_input = search_input
+        self.run_search = run_search
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._run)
+        self.search_input.textChanged.connect(self._on_text_changed)
+
+    def _on_text_changed(self, text):
+        SearchController.stats["digitados"] += 1
+        self._timer.start()
+
+    def _run(self):
+        SearchController.stats["buscas"] += 1
+        self.logger.debug(f"Buscando '{self.search_input.text()}'.")
+        self.run_search()
+
+    def flush(self):
+        # Executa imediatamente a busca pendente (ex. ao pressionar Enter)
+        if self._timer.isActive():
+            self._timer.stop()
+            self._run()
+
+    @classmethod
+    def log_stats(cls, logger):
+        logger.info(
+            f"Busca nas listagens: {cls.stats['digitados']} alterações de termo, "
+            f"{cls.stats['buscas']} buscas disparadas."
+        )
+        QueryRunner.log_stats(logger)
@@ -5,6 +5,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from MeuEstoque.database.database_manager import DatabaseManager
 from MeuEstoque.ui.add_purchase_window import AddPurchaseWindow
+from MeuEstoque.ui.paged_table_loader import PagedTableLoader
+from MeuEstoque.ui.search_controller import SearchController
 from MeuEstoque.logger import get_logger
 
 class ViewPurchasesWindow(QWidget): # Alterado para QWidget
@@ -33,7 +35,8 @@ class ViewPurchasesWindow(QWidget): # Alterado para QWidget
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Buscar compra por fornecedor ou data...")
-        self.search_input.textChanged.connect(self._load_purchases)
+        self.search_controller = SearchController(self.search_input, self._load_purchases)
+        self.search_input.returnPressed.connect(self.search_controller.flush)
         search_layout.addWidget(QLabel("Buscar:"))
         search_layout.addWidget(self.search_input)
         main_layout.addLayout(search_layout)
@@ -50,6 +53,17 @@ class ViewPurchasesWindow(QWidget): # Alterado para QWidget
         self.purchases_table.itemSelectionChanged.connect(self._toggle_action_buttons)
         main_layout.addWidget(self.purchases_table)
 
+        # Carregamento paginado; o clique no cabeçalho ordena pelo banco
+        self.purchases_loader = PagedTableLoader(
+            self.purchases_table,
+            self.db,
+            self.db.get_compras_page,
+            self._fill_purchase_row,
+            ["fornecedor", "data_emissao", "total_final", "status_pagamento", None],
+            "data_emissao", descending=True
+        )
+        self.purchases_loader.loaded.connect(self._toggle_action_buttons)
+
         # Botões de ação
         button_layout = QHBoxLayout()
 
@@ -73,27 +87,25 @@ class ViewPurchasesWindow(QWidget): # Alterado para QWidget
         main_layout.addLayout(button_layout)
 
     def _load_purchases(self):
-        search_term = self.search_input.text()
-        purchases = self.db.get_compras(search_term)
-        self.purchases_table.setRowCount(len(purchases))
-
-        for row_idx, purchase in enumerate(purchases):
-            purchase_id = purchase[0]
-            supplier_name = purchase[1]
-            issue_date = purchase[2]
-            total_final = purchase[3]
-            status_pagamento = purchase[4] # Novo campo
-
-            self.purchases_table.setItem(row_idx, 0, QTableWidgetItem(supplier_name))
-            self.purchases_table.setItem(row_idx, 1, QTableWidgetItem(issue_date))
-            total_item = QTableWidgetItem(f"R$ {total_final:.2f}")
-            total_item.setTextAlignment(int(Qt.AlignmentFlag.AlignRight) | int(Qt.AlignmentFlag.AlignVCenter))
-            self.purchases_table.setItem(row_idx, 2, total_item)
-            self.purchases_table.setItem(row_idx, 3, QTableWidgetItem(status_pagamento)) # Exibir status de pagamento
-            
-            id_item = QTableWidgetItem(str(purchase_id))
-            id_item.setData(Qt.ItemDataRole.UserRole, purchase_id)
-            self.purchases_table.setItem(row_idx, 4, id_item) # ID agora na coluna 4
+        self.purchases_loader.reload(self.search_input.text())
+
+    def _fill_purchase_row(self, row_idx, purchase):
+        purchase_id = purchase[0]
+        supplier_name = purchase[1]
+        issue_date = purchase[2]
+        total_final = purchase[3]
+        status_pagamento = purchase[4] # Novo campo
+
+        self.purchases_table.setItem(row_idx, 0, QTableWidgetItem(supplier_name))
+        self.purchases_table.setItem(row_idx, 1, QTableWidgetItem(issue_date))
+        total_item = QTableWidgetItem(f"R$ {total_final:.2f}")
+        total_item.setTextAlignment(int(Qt.AlignmentFlag.AlignRight) | int(Qt.AlignmentFlag.AlignVCenter))
+        self.purchases_table.setItem(row_idx, 2, total_item)
+        self.purchases_table.setItem(row_idx, 3, QTableWidgetItem(status_pagamento)) # Exibir status de pagamento
+        
+        id_item = QTableWidgetItem(str(purchase_id))
+        id_item.setData(Qt.ItemDataRole.UserRole, purchase_id)
+        self.purchases_table.setItem(row_idx, 4, id_item) # ID agora na coluna 4
 
     def _toggle_action_buttons(self):
         is_purchase_selected = self.purchases_table.currentItem() is not None